@@ -1,34 +1,98 @@
 # flake8: noqa
 __version__ = "1.0.0"
 
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
 
-from cellengine.resources.attachment import Attachment
-from cellengine.resources.compensation import (
-    Compensation,
-    UNCOMPENSATED,
-    FILE_INTERNAL,
-    PER_FILE,
-    FileCompensations,
-    Compensations,
-)
-from cellengine.resources.experiment import Experiment
-from cellengine.resources.fcs_file import FcsFile
-from cellengine.resources.folder import Folder
-from cellengine.resources.gate import (
-    EllipseGate,
-    Gate,
-    PolygonGate,
-    QuadrantGate,
-    RangeGate,
-    RectangleGate,
-    SplitGate,
-)
-from cellengine.resources.plot import Plot
-from cellengine.resources.population import Population
-from cellengine.resources.scaleset import ScaleSet
-from cellengine.utils.api_client.APIClient import APIClient
-from cellengine.utils.complex_population_builder import ComplexPopulationBuilder
+# Public names are imported on first access (PEP 562), so `import cellengine`
+# stays cheap. Heavy dependencies (pandas, numpy, flowio, requests_toolbelt)
+# are only imported by the methods that need them.
+_LAZY_ATTRS = {
+    "Attachment": "cellengine.resources.attachment",
+    "Compensation": "cellengine.resources.compensation",
+    "UNCOMPENSATED": "cellengine.resources.compensation",
+    "FILE_INTERNAL": "cellengine.resources.compensation",
+    "PER_FILE": "cellengine.resources.compensation",
+    "FileCompensations": "cellengine.resources.compensation",
+    "Compensations": "cellengine.resources.compensation",
+    "Experiment": "cellengine.resources.experiment",
+    "FcsFile": "cellengine.resources.fcs_file",
+    "Folder": "cellengine.resources.folder",
+    "EllipseGate": "cellengine.resources.gate",
+    "Gate": "cellengine.resources.gate",
+    "PolygonGate": "cellengine.resources.gate",
+    "QuadrantGate": "cellengine.resources.gate",
+    "RangeGate": "cellengine.resources.gate",
+    "RectangleGate": "cellengine.resources.gate",
+    "SplitGate": "cellengine.resources.gate",
+    "Plot": "cellengine.resources.plot",
+    "Population": "cellengine.resources.population",
+    "ScaleSet": "cellengine.resources.scaleset",
+    "APIClient": "cellengine.utils.api_client.APIClient",
+    "OpenTelemetryHook": "cellengine.utils.api_client.Instrumentation",
+    "RequestEvent": "cellengine.utils.api_client.Instrumentation",
+    "RequestHook": "cellengine.utils.api_client.Instrumentation",
+    "RequestStats": "cellengine.utils.api_client.Instrumentation",
+    "PlotCache": "cellengine.utils.api_client.PlotCache",
+    "RateLimiter": "cellengine.utils.api_client.RateLimiter",
+    "StatisticsCache": "cellengine.utils.api_client.StatisticsCache",
+    "ComplexPopulationBuilder": "cellengine.utils.complex_population_builder",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value  # Subsequent lookups bypass __getattr__.
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+
+if TYPE_CHECKING:
+    from cellengine.resources.attachment import Attachment
+    from cellengine.resources.compensation import (
+        Compensation,
+        UNCOMPENSATED,
+        FILE_INTERNAL,
+        PER_FILE,
+        FileCompensations,
+        Compensations,
+    )
+    from cellengine.resources.experiment import Experiment
+    from cellengine.resources.fcs_file import FcsFile
+    from cellengine.resources.folder import Folder
+    from cellengine.resources.gate import (
+        EllipseGate,
+        Gate,
+        PolygonGate,
+        QuadrantGate,
+        RangeGate,
+        RectangleGate,
+        SplitGate,
+    )
+    from cellengine.resources.plot import Plot
+    from cellengine.resources.population import Population
+    from cellengine.resources.scaleset import ScaleSet
+    from cellengine.utils.api_client.APIClient import APIClient
+    from cellengine.utils.api_client.Instrumentation import (
+        OpenTelemetryHook,
+        RequestEvent,
+        RequestHook,
+        RequestStats,
+    )
+    from cellengine.utils.api_client.PlotCache import PlotCache
+    from cellengine.utils.api_client.RateLimiter import RateLimiter
+    from cellengine.utils.api_client.StatisticsCache import StatisticsCache
+    from cellengine.utils.complex_population_builder import ComplexPopulationBuilder
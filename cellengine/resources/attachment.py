@@ -1,17 +1,22 @@
 from __future__ import annotations
-from typing import Optional, Any, Dict
+from typing import TYPE_CHECKING, Optional, Any, Dict
 from datetime import datetime
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 from cellengine.utils.helpers import timestamp_to_datetime
 
+if TYPE_CHECKING:
+    from cellengine.utils.api_client.APIClient import APIClient
 
-class Attachment:
+
+class Attachment(ClientResource):
     """A class representing a CellEngine attachment.
     Attachments are non-data files that are stored in an experiment.
     """
 
-    def __init__(self, properties: Dict[str, Any]):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
 
     @property
@@ -70,23 +75,31 @@ class Attachment:
 
     @staticmethod
     def upload(
-        experiment_id: str, filepath: str, filename: Optional[str] = None
+        experiment_id: str,
+        filepath: str,
+        filename: Optional[str] = None,
+        skip_if_exists: bool = False,
     ) -> Attachment:
         """Upload an attachment
 
         Args:
             filepath (str): Local path to file to upload.
             filename (str, optional): Optionally, specify a new name for the file.
+            skip_if_exists (bool): If True and an attachment with the same
+                content already exists in the experiment, return it instead
+                of uploading the file again.
 
         Returns:
             The newly uploaded Attachment.
         """
-        return ce.APIClient().upload_attachment(experiment_id, filepath, filename)
+        return ce.APIClient().upload_attachment(
+            experiment_id, filepath, filename, skip_if_exists
+        )
 
     def update(self) -> None:
         """Save changes to this Attachment to CellEngine."""
         update_properties = {key: self._properties[key] for key in self._changes}
-        res = ce.APIClient().update_entity(
+        res = self.client.update_entity(
             self.experiment_id, self._id, "attachments", update_properties
         )
         self._properties = res
@@ -105,7 +118,7 @@ class Attachment:
         Returns:
             content: The raw response content.
         """
-        res = ce.APIClient().download_attachment(self.experiment_id, self._id)
+        res = self.client.download_attachment(self.experiment_id, self._id)
 
         if to_file:
             with open(to_file, "wb") as f:
@@ -114,4 +127,4 @@ class Attachment:
             return res
 
     def delete(self) -> None:
-        ce.APIClient().delete_entity(self.experiment_id, "attachments", self._id)
+        self.client.delete_entity(self.experiment_id, "attachments", self._id)
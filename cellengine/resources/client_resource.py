@@ -0,0 +1,21 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+import cellengine as ce
+
+if TYPE_CHECKING:
+    from cellengine.utils.api_client.APIClient import APIClient
+
+
+class ClientResource:
+    """Base of resources that make requests with the client that retrieved
+    them."""
+
+    def __init__(self, client: Optional[APIClient] = None):
+        self._client = client
+
+    @property
+    def client(self) -> APIClient:
+        """The client used for this resource's requests: the client that
+        retrieved it, or else the current client."""
+        return self._client or ce.APIClient()
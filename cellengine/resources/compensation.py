@@ -16,13 +16,14 @@ try:
 except ImportError:
     from typing_extensions import Literal
 
-from numpy import array, linalg
-from pandas import DataFrame
-
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 
 if TYPE_CHECKING:
+    from pandas import DataFrame
+
     from cellengine.resources.fcs_file import FcsFile
+    from cellengine.utils.api_client.APIClient import APIClient
 
 
 UncompensatedType = Literal[0]
@@ -50,11 +51,12 @@ Compensations = Literal[UncompensatedType, FileInternalType, PerFileType]
 """Valid values for all compensation parameters except `fcsFile.compensation`."""
 
 
-class Compensation:
+class Compensation(ClientResource):
     """A class representing a CellEngine compensation matrix."""
 
-    def __init__(self, properties: Dict[str, Any]):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
 
     @property
@@ -99,6 +101,9 @@ class Compensation:
 
     @property
     def dataframe(self) -> DataFrame:
+        from numpy import array
+        from pandas import DataFrame
+
         return DataFrame(
             array(self.spill_matrix).reshape(self.N, self.N),
             columns=self.channels,
@@ -213,14 +218,14 @@ class Compensation:
     def update(self):
         """Save changes to this Compensation to CellEngine."""
         update_properties = {key: self._properties[key] for key in self._changes}
-        res = ce.APIClient().update_entity(
+        res = self.client.update_entity(
             self.experiment_id, self._id, "compensations", update_properties
         )
         self._properties = res
         self._changes = set()
 
     def delete(self):
-        ce.APIClient().delete_entity(self.experiment_id, "compensations", self._id)
+        self.client.delete_entity(self.experiment_id, "compensations", self._id)
 
     @property
     def dataframe_as_html(self):
@@ -253,6 +258,9 @@ class Compensation:
             DataFrame: if ``inplace=True``, updates `FcsFile.events` for
                 the target FcsFile
         """
+        from numpy import linalg
+        from pandas import DataFrame
+
         # [ the file's events have already been retrieved with the same
         #   kwargs provided here -> data := file.events
         # | true -> data := events retrieved from CellEngine ]
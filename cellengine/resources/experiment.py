@@ -1,24 +1,36 @@
 from __future__ import annotations
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union, Tuple, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+    Tuple,
+    overload,
+)
 
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
 
-from pandas.core.frame import DataFrame
-
 try:
     from typing import TypedDict, NotRequired
 except ImportError:
     from typing_extensions import TypedDict, NotRequired
 
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 from cellengine.resources.attachment import Attachment
 from cellengine.resources.compensation import Compensation, UNCOMPENSATED, Compensations
 from cellengine.resources.fcs_file import FcsFile
 from cellengine.resources.gate import (
+    GATES_BATCH_SIZE,
     EllipseGate,
     Gate,
     PolygonGate,
@@ -29,12 +41,19 @@ from cellengine.resources.gate import (
 )
 from cellengine.resources.population import Population
 from cellengine.resources.scaleset import ScaleSet
+from cellengine.utils.statistics import STATISTICS_BATCH_SIZE
 from cellengine.utils.helpers import (
     CommentList,
     timestamp_to_datetime,
     datetime_to_timestamp,
 )
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+    from cellengine.resources.plot import Plot
+    from cellengine.utils.api_client.APIClient import APIClient
+
 
 ImportOpts = TypedDict(
     "ImportOpts",
@@ -48,7 +67,7 @@ ImportOpts = TypedDict(
 )
 
 
-class Experiment:
+class Experiment(ClientResource):
     """The main container for an analysis. Don't construct directly; use
     [`Experiment.create`][cellengine.Experiment.create] or
     [`Experiment.get`][cellengine.Experiment.get].
@@ -57,8 +76,9 @@ class Experiment:
     issue if you need to use a property that is not supported.
     """
 
-    def __init__(self, properties: Dict[str, Any]):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
 
     @property
@@ -346,7 +366,7 @@ class Experiment:
         ```
         """
         update_properties = {key: self._properties[key] for key in self._changes}
-        res = ce.APIClient().update_experiment(self._id, update_properties)
+        res = self.client.update_experiment(self._id, update_properties)
         self._properties = res
         self._changes = set()
 
@@ -364,7 +384,7 @@ class Experiment:
         Returns:
             Experiment: A deep copy of the experiment.
         """
-        return ce.APIClient().clone_experiment(self._id, props)
+        return self.client.clone_experiment(self._id, props)
 
     def delete(self) -> None:
         """Marks the experiment as deleted.
@@ -374,20 +394,20 @@ class Experiment:
         """
         deleted = datetime.today()
         self.deleted = deleted
-        ce.APIClient().update_experiment(self._id, {"deleted": deleted.isoformat()})
+        self.client.update_experiment(self._id, {"deleted": deleted.isoformat()})
 
     def undelete(self) -> None:
         """Clears a scheduled deletion."""
         if self.deleted:
             self.deleted = None
-            ce.APIClient().update_experiment(self._id, {"deleted": self.deleted})
+            self.client.update_experiment(self._id, {"deleted": self.deleted})
 
     def save_revision(self, description: str) -> None:
         """
         Saves a revision of the experiment. The new revision will be the last
         entry in the `revisions` property.
         """
-        r = ce.APIClient().save_experiment_revision(self._id, description)
+        r = self.client.save_experiment_revision(self._id, description)
         self._properties["revisions"] = r.get("revisions")
         self._properties["deepUpdated"] = r.get("deepUpdated")
 
@@ -428,7 +448,7 @@ class Experiment:
         *Note: If it would be useful for this method to return the imported
         resources, open a GitHub issue letting us know.*
         """
-        ce.APIClient().import_experiment_resources(
+        self.client.import_experiment_resources(
             self._id, src_experiment_id, what, channel_map, dst_population_id
         )
 
@@ -437,52 +457,60 @@ class Experiment:
     @property
     def attachments(self) -> List[Attachment]:
         """List all attachments on the experiment."""
-        return ce.APIClient().get_attachments(self._id)
+        return self.client.get_attachments(self._id)
 
     def get_attachment(self, _id: Optional[str] = None, name: Optional[str] = None):
-        return ce.APIClient().get_attachment(self._id, _id, name)
+        return self.client.get_attachment(self._id, _id, name)
 
     def download_attachment(
         self, _id: Optional[str] = None, name: Optional[str] = None
     ) -> bytes:
         """Get a specific attachment."""
         kwargs = {"name": name} if name else {"_id": _id}
-        return ce.APIClient().download_attachment(self._id, **kwargs)
+        return self.client.download_attachment(self._id, **kwargs)
 
     def upload_attachment(
-        self, filepath: str, filename: Optional[str] = None
+        self,
+        filepath: str,
+        filename: Optional[str] = None,
+        skip_if_exists: bool = False,
     ) -> Attachment:
         """Upload an attachment to this experiment.
 
         Args:
             filepath (str): Local path to file to upload.
             filename (str, optional): Optionally, specify a new name for the file.
+            skip_if_exists (bool): If True and an attachment with the same
+                content (size, MD5 and CRC32C) already exists in this
+                experiment, return it instead of uploading the file again.
 
         Returns:
             The newly uploaded Attachment.
         """
-        return ce.APIClient().upload_attachment(self._id, filepath, filename)
+        return self.client.upload_attachment(
+            self._id, filepath, filename, skip_if_exists
+        )
 
     def delete_attachment(
         self, _id: Optional[str] = None, name: Optional[str] = None
     ) -> None:
         """Delete an attachment from this experiment."""
         kwargs = {"name": name} if name else {"_id": _id}
-        ce.APIClient().delete_attachment(self._id, **kwargs)
+        self.client.delete_attachment(self._id, **kwargs)
 
     # Compensations
 
     @property
     def compensations(self) -> List[Compensation]:
         """List all compensations on the experiment."""
-        return ce.APIClient().get_compensations(self._id)
+        return self.client.get_compensations(self._id)
 
     def get_compensation(
         self, _id: Optional[str] = None, name: Optional[str] = None
     ) -> Compensation:
         """Get a specific compensation."""
         kwargs = {"name": name} if name else {"_id": _id}
-        return ce.APIClient().get_compensation(self._id, **kwargs)
+        return self.client.get_compensation(self._id, **kwargs)
 
     @overload
     def create_compensation(
@@ -517,38 +545,204 @@ class Experiment:
             dataframe (DataFrame): A square pandas DataFrame with channel names
                 in [df.index, df.columns].
         """
-        return Compensation.create(
-            self._id,
-            name,
-            channels,  # type: ignore
-            spill_matrix,  # type: ignore
-            dataframe,  # type: ignore
-        )
+        with self.client.use():
+            return Compensation.create(
+                self._id,
+                name,
+                channels,  # type: ignore
+                spill_matrix,  # type: ignore
+                dataframe,  # type: ignore
+            )
 
     # FCS Files
 
     @property
     def fcs_files(self) -> List[FcsFile]:
         """List all FCS files on the experiment."""
-        return ce.APIClient().get_fcs_files(self._id)
+        return self.client.get_fcs_files(self._id)
 
     def get_fcs_file(
         self, _id: Optional[str] = None, name: Optional[str] = None
     ) -> FcsFile:
         """Get a specific FCS file."""
         kwargs = {"name": name} if name else {"_id": _id}
-        return ce.APIClient().get_fcs_file(self._id, **kwargs)
+        return self.client.get_fcs_file(self._id, **kwargs)
+
+    def upload_fcs_file(
+        self, filepath, filename: Optional[str] = None, skip_if_exists: bool = False
+    ):
+        """Upload an FCS file to this experiment.
+
+        Args:
+            filepath: Local path to the FCS file.
+            filename: Optionally, specify a new name for the file.
+            skip_if_exists: If True and a file with the same content (size,
+                MD5 and CRC32C) already exists in this experiment, return it
+                instead of uploading the file again. The local file is
+                checksummed in a single streaming pass.
+        """
+        return self.client.upload_fcs_file(
+            self._id, filepath, filename, skip_if_exists=skip_if_exists
+        )
+
+    def upload_fcs_files(
+        self,
+        filepaths: List[str],
+        max_workers: int = 4,
+        skip_if_exists: bool = True,
+        manifest: Optional[str] = None,
+        progress: Optional[Callable[[str, int, int], None]] = None,
+    ) -> List[Union[FcsFile, Exception]]:
+        """Upload several FCS files to this experiment concurrently.
+
+        Args:
+            filepaths: Local paths to FCS files.
+            max_workers: Maximum number of files to upload at once.
+            skip_if_exists: If True, files whose content matches a file
+                already in the experiment are not uploaded; the existing
+                FcsFile is returned instead.
+            manifest: Optionally, the path to a JSON file in which to record
+                progress, so that an interrupted batch can be resumed by
+                running it again with the same manifest.
+            progress: Optionally, a function called as each file is sent with
+                the file's path, the number of bytes sent so far and the
+                total number of bytes in the file's request.
+
+        Returns:
+            One item per path, in the same order: the uploaded (or existing)
+            FcsFile, or the exception raised if that file failed to upload.
+
+        Example:
+            ```python
+            paths = glob.glob("plate1/*.fcs")
+            results = experiment.upload_fcs_files(
+                paths, max_workers=8, manifest="plate1.json"
+            )
+            failed = [p for p, r in zip(paths, results) if isinstance(r, Exception)]
+            ```
+        """
+        return self.client.upload_fcs_files(
+            self._id, filepaths, max_workers, skip_if_exists, manifest, progress
+        )
+
+    def export_events_dataset(
+        self,
+        path: str,
+        populations: Optional[List[Union[Population, str, None]]] = None,
+        channels: Optional[List[str]] = None,
+        partition_by: List[str] = ["fcsFileId"],
+        fcs_files: Optional[List[FcsFile]] = None,
+        max_workers: int = 4,
+        **kwargs,
+    ) -> Dict[Tuple[str, Optional[str]], Exception]:
+        """Export the events of this experiment's FCS files to a
+        Hive-partitioned Parquet dataset, e.g. for machine learning across a
+        cohort. Requires pyarrow (`pip install cellengine[arrow]`).
+
+        Events are downloaded for several files at once and each file (and
+        population) is written to the dataset as soon as it arrives. Besides
+        one float32 column per channel, the dataset has string columns
+        "fcsFileId", "filename", "populationId" (if `populations` is given)
+        and one per annotation name.
+
+        Progress is recorded in the dataset's directory, so an interrupted
+        export resumes where it stopped if run again with the same arguments.
+        Files that failed are retried.
+
+        Args:
+            path: Directory to write the dataset to.
+            populations: Populations (or their IDs) to export the events of.
+                Use None in the list for ungated events. Defaults to ungated
+                events only.
+            channels: Channel names (`$PnN`) to export. Defaults to all of
+                each file's channels; specify channels if the files' channels
+                differ.
+            partition_by: Columns to partition the dataset by, e.g.
+                `["fcsFileId"]` or `["plate", "populationId"]`.
+            fcs_files: The FCS files to export. Defaults to all of the
+                experiment's non-control FCS files.
+            max_workers: Maximum number of files to download at once.
+            kwargs: Additional arguments for `FcsFile.get_events`, such as
+                `compensationId` or `postSubsampleN`.
+
+        Returns:
+            Exceptions for the (FCS file ID, population ID) pairs that could
+            not be exported, if any.
+
+        Example:
+            ```python
+            experiment.export_events_dataset(
+                "events", populations=[tcells], channels=["CD3", "CD4", "CD8"],
+                partition_by=["treatment"], compensationId=ce.FILE_INTERNAL,
+            )
+            import pyarrow.dataset as ds
+            cd4 = ds.dataset("events", partitioning="hive").to_table(
+                columns=["CD4"], filter=ds.field("treatment") == "A"
+            )
+            ```
+        """
+        from cellengine.utils.events_dataset import export_events_dataset
+
+        if fcs_files is None:
+            fcs_files = [f for f in self.fcs_files if not f.is_control]
+        return export_events_dataset(
+            self._id,
+            fcs_files,
+            path,
+            populations,
+            channels,
+            partition_by,
+            max_workers,
+            **kwargs,
+        )
+
+    # Plots
+
+    def get_plots(
+        self,
+        specs: Iterable[Dict[str, Any]],
+        max_workers: int = 4,
+        directory: Optional[str] = None,
+    ) -> Iterator[Tuple[int, Union[Plot, Exception]]]:
+        """Fetch several plots concurrently, yielding each as it arrives.
+
+        Args:
+            specs: One dict per plot, with the arguments of
+                [`Plot.get`][cellengine.Plot.get] except `experiment_id`:
+                `fcs_file_id`, `plot_type`, `x_channel`, `y_channel` and
+                optionally `z_channel`, `population_id`, `compensation` and
+                plot properties such as `width`. A `filename` key names the
+                file saved in `directory`.
+            max_workers: Maximum number of plots to fetch at once.
+            directory: Optionally, a directory in which to save each plot as
+                it arrives, instead of keeping the images in memory.
+
+        Yields:
+            `(index, plot)` pairs in order of arrival, where `index` is the
+            spec's position in `specs`, and `plot` is the Plot or the
+            exception raised while fetching it.
 
-    def upload_fcs_file(self, filepath, filename: Optional[str] = None):
-        """Upload an FCS file to this experiment."""
-        return ce.APIClient().upload_fcs_file(self._id, filepath, filename)
+        Example:
+            ```python
+            specs = [
+                {"fcs_file_id": f._id, "population_id": p._id, "plot_type": "dot",
+                 "x_channel": "FSC-A", "y_channel": "SSC-A"}
+                for f in experiment.fcs_files
+                for p in experiment.populations
+            ]
+            for i, plot in experiment.get_plots(specs, max_workers=8, directory="qc"):
+                if isinstance(plot, Exception):
+                    print(f"Plot {i} failed: {plot}")
+            ```
+        """
+        return self.client.get_plots(self._id, specs, max_workers, directory)
 
     # Gates
 
     @property
     def gates(self) -> List[Gate]:
         """List all gates on the experiment."""
-        return ce.APIClient().get_gates(self._id)
+        return self.client.get_gates(self._id)
 
     def get_gate(self, _id: str) -> Gate:
         """Get a specific gate.
@@ -562,17 +756,40 @@ class Experiment:
         [g for g in experiment.gates if g.name == "my gate"]
         ```
         """
-        return ce.APIClient().get_gate(self._id, _id=_id)
+        return self.client.get_gate(self._id, _id=_id)
+
+    def create_gates(
+        self,
+        gates: List,
+        batch_size: Optional[int] = GATES_BATCH_SIZE,
+        max_workers: int = 4,
+        retries: int = 0,
+    ):
+        """Save a collection of gate objects.
 
-    def create_gates(self, gates: List):
-        """Save a collection of gate objects."""
+        Large numbers of gates are sent in concurrent batches. See
+        [`Gate.create_many`][cellengine.Gate.create_many] for the arguments.
+
+        Example:
+            ```python
+            try:
+                gates = experiment.create_gates(tailored_gates, retries=2)
+            except cellengine.resources.gate.PartialGatesError as error:
+                created = [g for g in error.gates if g is not None]
+                experiment.client.post_gates(experiment._id, error.failed_gates)
+            ```
+        """
         for gate in gates:
             gate["experiment_id"] = self._id
-        formatted_gates = [Gate._format_gate(gate) for gate in gates]
-        return ce.APIClient().post_gates(
+        with self.client.use():
+            formatted_gates = Gate._format_gates(gates)
+        return self.client.post_gates(
             self._id,
             formatted_gates,
             {"create_population": False},
+            batch_size=batch_size,
+            max_workers=max_workers,
+            retries=retries,
         )
 
     def delete_gate(
@@ -586,15 +803,15 @@ class Experiment:
         [`APIClient`][cellengine.utils.api_client.APIClient.APIClient.delete_gate]
         for more information.
         """
-        return ce.APIClient().delete_gate(self._id, _id, gid, exclude)
+        return self.client.delete_gate(self._id, _id, gid, exclude)
 
     def delete_gates(self, ids: List[str]) -> None:
         """Deletes multiple gates provided a list of _ids."""
-        ce.APIClient().delete_gates(self._id, ids)
+        self.client.delete_gates(self._id, ids)
 
     def delete_all_gates_and_populations(self) -> None:
         """Delete all gates and populations in the experiment."""
-        ce.APIClient().delete_all_gates_and_populations(self._id)
+        self.client.delete_all_gates_and_populations(self._id)
 
     @overload
     def create_rectangle_gate(
@@ -614,12 +831,13 @@ class Experiment:
         Accepts all args and kwargs available for
         [`RectangleGate.create()`][cellengine.resources.gate.RectangleGate.create].
         """
-        return RectangleGate.create(
-            self._id,
-            *args,
-            create_population=create_population,  # type: ignore pyright limitation
-            **kwargs,
-        )
+        with self.client.use():
+            return RectangleGate.create(
+                self._id,
+                *args,
+                create_population=create_population,  # type: ignore pyright limitation
+                **kwargs,
+            )
 
     @overload
     def create_polygon_gate(
@@ -639,12 +857,13 @@ class Experiment:
         Accepts all args and kwargs available for
         [`PolygonGate.create()`][cellengine.resources.gate.PolygonGate.create].
         """
-        return PolygonGate.create(
-            self._id,
-            *args,
-            create_population=create_population,  # type: ignore pyright limitation
-            **kwargs,
-        )
+        with self.client.use():
+            return PolygonGate.create(
+                self._id,
+                *args,
+                create_population=create_population,  # type: ignore pyright limitation
+                **kwargs,
+            )
 
     @overload
     def create_ellipse_gate(
@@ -664,12 +883,13 @@ class Experiment:
         Accepts all args and kwargs available for
         [`EllipseGate.create()`][cellengine.resources.gate.EllipseGate.create].
         """
-        return EllipseGate.create(
-            self._id,
-            *args,
-            create_population=create_population,  # type: ignore pyright limitation
-            **kwargs,
-        )
+        with self.client.use():
+            return EllipseGate.create(
+                self._id,
+                *args,
+                create_population=create_population,  # type: ignore pyright limitation
+                **kwargs,
+            )
 
     @overload
     def create_range_gate(
@@ -689,12 +909,13 @@ class Experiment:
         Accepts all args and kwargs available for
         [`RangeGate.create()`][cellengine.resources.gate.RangeGate.create].
         """
-        return RangeGate.create(
-            self._id,
-            *args,
-            create_population=create_population,  # type: ignore pyright limitation
-            **kwargs,
-        )
+        with self.client.use():
+            return RangeGate.create(
+                self._id,
+                *args,
+                create_population=create_population,  # type: ignore pyright limitation
+                **kwargs,
+            )
 
     def create_split_gate(
         self, *args, create_population: bool = True, **kwargs
@@ -704,12 +925,13 @@ class Experiment:
         Accepts all args and kwargs available for
         [`SplitGate.create()`][cellengine.resources.gate.SplitGate.create].
         """
-        return SplitGate.create(
-            self._id,
-            *args,
-            create_population=create_population,  # type: ignore pyright limitation
-            **kwargs,
-        )
+        with self.client.use():
+            return SplitGate.create(
+                self._id,
+                *args,
+                create_population=create_population,  # type: ignore pyright limitation
+                **kwargs,
+            )
 
     @overload
     def create_quadrant_gate(
@@ -729,26 +951,27 @@ class Experiment:
         Accepts all args and kwargs available for
         [`QuadrantGate.create()`][cellengine.resources.gate.QuadrantGate.create].
         """
-        return QuadrantGate.create(
-            self._id,
-            *args,
-            create_population=create_population,  # type: ignore pyright limitation
-            **kwargs,
-        )
+        with self.client.use():
+            return QuadrantGate.create(
+                self._id,
+                *args,
+                create_population=create_population,  # type: ignore pyright limitation
+                **kwargs,
+            )
 
     # Populations
 
     @property
     def populations(self) -> List[Population]:
         """List all populations in the experiment."""
-        return ce.APIClient().get_populations(self._id)
+        return self.client.get_populations(self._id)
 
     def get_population(
         self, _id: Optional[str] = None, name: Optional[str] = None
     ) -> Population:
         """Get a specific population."""
         kwargs = {"name": name} if name else {"_id": _id}
-        return ce.APIClient().get_population(self._id, **kwargs)
+        return self.client.get_population(self._id, **kwargs)
 
     def create_population(self, population: Dict) -> Population:
         """Create a population.
@@ -770,14 +993,14 @@ class Experiment:
         Returns:
             The new population.
         """
-        return ce.APIClient().post_population(self._id, population)
+        return self.client.post_population(self._id, population)
 
     # ScaleSets
 
     @property
     def scaleset(self) -> ScaleSet:
         """Gets the experiment's ScaleSet"""
-        return ce.APIClient().get_scaleset(self._id)
+        return self.client.get_scaleset(self._id)
 
     def get_scaleset(self) -> ScaleSet:
         return self.scaleset
@@ -792,12 +1015,16 @@ class Experiment:
         annotations: bool = True,
         compensation_id: Union[Compensations, str] = UNCOMPENSATED,
         fcs_file_ids: Optional[List[str]] = None,
-        format: Literal["json", "pandas", "TSV", "CSV"] = "pandas",
+        format: Literal[
+            "json", "pandas", "pandas-typed", "arrow", "wide", "TSV", "CSV"
+        ] = "pandas",
         layout: Literal["short-wide", "medium", "tall-skinny"] = "medium",
         percent_of: Optional[Union[str, List[str]]] = "PARENT",
         population_ids: List[str] = [],
+        batch_size: Optional[int] = STATISTICS_BATCH_SIZE,
+        max_workers: int = 4,
     ) -> Union[Dict, str, DataFrame]:
-        return ce.APIClient().get_statistics(
+        return self.client.get_statistics(
             self._id,
             statistics,
             channels,
@@ -809,4 +1036,6 @@ class Experiment:
             layout,
             percent_of,
             population_ids,
+            batch_size,
+            max_workers,
         )
@@ -1,14 +1,35 @@
 from __future__ import annotations
-import io
 import json
 
-from cellengine.utils.parse_fcs_file import parse_fcs_file
+from cellengine.utils import binning
+from cellengine.utils.concurrency import map_concurrent
+from cellengine.utils.event_store import EventStore, LazyEvents
+from cellengine.utils.fcs_writer import FcsWriter, write_fcs
+from cellengine.utils.plot_renderer import render_plot
+from cellengine.utils.parse_fcs_file import (
+    _read_events,
+    default_row_group_size,
+    parse_fcs_file,
+    parse_fcs_file_to_arrow,
+)
 from cellengine.utils.helpers import (
     is_valid_id,
     timestamp_to_datetime,
     datetime_to_timestamp,
 )
-from typing import Any, Dict, List, Optional, Union, overload, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
 
 try:
     from typing import Literal
@@ -20,15 +41,24 @@ try:
 except ImportError:
     from typing_extensions import TypedDict
 
-from pandas.core.frame import DataFrame
 from io import BytesIO
-import flowio
 from datetime import datetime
 
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 from cellengine.resources.plot import Plot
 from cellengine.resources.compensation import Compensation, FileCompensations
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from pyarrow import Table
+
+    from numpy import ndarray
+
+    from cellengine.resources.gate import Gate
+    from cellengine.resources.scaleset import ScaleSet
+    from cellengine.utils.api_client.APIClient import APIClient
+
 
 Annotations = TypedDict("Annotations", {"name": str, "value": str})
 Channel = TypedDict(
@@ -36,16 +66,18 @@ Channel = TypedDict(
 )
 
 
-class FcsFile:
+class FcsFile(ClientResource):
     """A class representing a CellEngine FCS file."""
 
-    def __init__(self, properties: Dict[str, Any]):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
         self._orig_annotations = properties["annotations"].copy()
         # Used for caching events
         self._events_kwargs = {}
-        self._events = DataFrame()
+        self._events: Optional[DataFrame] = None
+        self._lazy_events: Optional[LazyEvents] = None
 
     @property
     def _id(self) -> str:
@@ -192,8 +224,8 @@ class FcsFile:
         `has_file_internal_comp`). Note: this property may be fetched lazily due
         to its size."""
         if "spillString" not in self._properties and self.has_file_internal_comp:
-            base_url = ce.APIClient().base_url
-            self._properties["spillString"] = ce.APIClient()._get(
+            base_url = self.client.base_url
+            self._properties["spillString"] = self.client._get(
                 f"{base_url}/api/v1/experiments/{self.experiment_id}/fcsfiles/{self._id}"  # noqa: E501
             )["spillString"]
         return self._properties["spillString"]
@@ -202,8 +234,8 @@ class FcsFile:
     def header(self) -> Dict[str, str]:
         """Note: this property may be fetched lazily."""
         if "header" not in self._properties:
-            base_url = ce.APIClient().base_url
-            self._properties["header"] = ce.APIClient()._get(
+            base_url = self.client.base_url
+            self._properties["header"] = self.client._get(
                 f"{base_url}/api/v1/experiments/{self.experiment_id}/fcsfiles/{self._id}"  # noqa: E501
             )["header"]
         return json.loads(self._properties["header"])
@@ -242,7 +274,9 @@ class FcsFile:
         return ce.APIClient().get_fcs_file(experiment_id=experiment_id, **kwargs)
 
     @classmethod
-    def upload(cls, experiment_id: str, filepath: str) -> FcsFile:
+    def upload(
+        cls, experiment_id: str, filepath: str, skip_if_exists: bool = False
+    ) -> FcsFile:
         """
         Uploads a file. The maximum file size is approximately 2.3 GB.
         Contact us if you need to work with larger files.
@@ -253,15 +287,20 @@ class FcsFile:
         Args:
             experiment_id: ID of the experiment to which the file belongs
             filepath: The file contents.
+            skip_if_exists: If True and a file with the same content already
+                exists in the experiment, return it instead of uploading the
+                file again.
         """
-        return ce.APIClient().upload_fcs_file(experiment_id, filepath)
+        return ce.APIClient().upload_fcs_file(
+            experiment_id, filepath, skip_if_exists=skip_if_exists
+        )
 
     @classmethod
     def create_from_dataframe(
         cls,
         experiment_id: str,
         filename: str,
-        df: DataFrame,
+        df: Union[DataFrame, Table],
         reagents: Optional[List[Union[str, None]]] = None,
         headers: Dict[str, str] = {},
     ) -> FcsFile:
@@ -274,6 +313,10 @@ class FcsFile:
         from the 2nd-level index of the DataFrame if present, or can be provided
         in a list in the same order as the channels via the `reagents` argument.
 
+        A `pyarrow.Table`, such as one read from a file written by `to_parquet`,
+        may be passed instead of a DataFrame; its field names and `"$PnS"` field
+        metadata give the channel and reagent names.
+
         Additional header keys can be provided via `headers`. In particular, it
         can be useful to set `$PnD` values, which CellEngine uses to set the
         initial display scaling:
@@ -287,7 +330,9 @@ class FcsFile:
           heuristics, CellEngine will usually default to arcsinh with a max
           equal to the `"$PnR"` value.
 
-        FCS files created with this method always use float32 encoding. For
+        FCS files created with this method always use float32 encoding. The
+        file is streamed to CellEngine as it is generated, a block of events at
+        a time, so large DataFrames don't need to be copied in memory. For
         efficiency, consider using float32 arrays upstream when generating the
         FCS file values.
 
@@ -351,37 +396,65 @@ class FcsFile:
         Returns:
             The created FCS file.
         """
-
-        if "$COM" not in headers:
+        headers = dict(headers)
+        if not any(k.lstrip("$").upper() == "COM" for k in headers):
             headers["$COM"] = (
                 f"Created by the CellEngine Python Toolkit v{ce.__version__}"
             )
 
-        if df.columns.nlevels > 1:
-            channels = df.columns.get_level_values(0).tolist()
-            if reagents is None:
-                reagents = df.columns.get_level_values(1).tolist()
-                # Filter out nan values. An Index will cast None to float (nan).
-                reagents = [r if r == r else None for r in reagents]
-        else:
-            channels = df.columns
+        # The file is generated as it is uploaded, so only one block of events
+        # is held in memory in FCS format at a time.
+        writer = FcsWriter(df, reagents, headers)
+        return ce.APIClient().upload_fcs_file(experiment_id, writer.reader(), filename)
 
-        bytes = io.BytesIO()
-        writer = io.BufferedRandom(
-            cast(io.RawIOBase, bytes),
-            buffer_size=df.memory_usage(index=False).sum() + 16536,
-        )
-        flowio.create_fcs(
-            file_handle=writer,
-            event_data=df.to_numpy().flatten(),
-            channel_names=channels,
-            opt_channel_names=reagents,
-            metadata_dict=headers,
-        )
+    @classmethod
+    def create_many_from_dataframes(
+        cls,
+        experiment_id: str,
+        dataframes: Union[Mapping[str, DataFrame], Iterable[Tuple[str, DataFrame]]],
+        headers: Dict[str, str] = {},
+        max_workers: int = 4,
+    ) -> List[Union[FcsFile, Exception]]:
+        """Creates FCS files from several DataFrames and uploads them to
+        CellEngine concurrently. See
+        [`create_from_dataframe`][cellengine.resources.fcs_file.FcsFile.create_from_dataframe]
+        for how each DataFrame is converted.
+
+        Each file is encoded as it is uploaded, a block of events at a time,
+        so encoding needs little memory beyond the DataFrames themselves. To
+        also bound the memory used by the DataFrames, pass a generator of
+        `(filename, DataFrame)` pairs: at most `2 * max_workers` DataFrames
+        are taken from it at a time.
+
+        Args:
+            experiment_id: ID of the experiment to which the files belong.
+            dataframes: A dict of `{filename: DataFrame}`, or an iterable of
+                `(filename, DataFrame)` pairs.
+            headers: Additional header keywords for every file.
+            max_workers: Maximum number of files to upload at once.
+
+        Returns:
+            One item per DataFrame, in the same order: the created FcsFile, or
+            the exception raised if that file could not be created.
+
+        Example:
+            ```python
+            def derived():
+                for file in experiment.fcs_files:
+                    yield f"{file.name} clustered.fcs", cluster(file.get_events())
+
+            results = FcsFile.create_many_from_dataframes(experiment._id, derived())
+            ```
+        """
+        items = dataframes.items() if isinstance(dataframes, Mapping) else dataframes
 
-        writer.flush()  # not sure if this is necessary
+        def create(item: Tuple[str, DataFrame]) -> FcsFile:
+            filename, df = item
+            return cls.create_from_dataframe(
+                experiment_id, filename, df, headers=headers
+            )
 
-        return ce.APIClient().upload_fcs_file(experiment_id, bytes, filename)
+        return map_concurrent(create, items, max_workers)
 
     @classmethod
     def create(
@@ -500,7 +573,7 @@ class FcsFile:
         update_properties = {key: self._properties[key] for key in self._changes}
         if self.annotations != self._orig_annotations:
             update_properties["annotations"] = self.annotations
-        res = ce.APIClient().update_entity(
+        res = self.client.update_entity(
             self.experiment_id, self._id, "fcsfiles", update_properties
         )
         self._properties = res
@@ -508,7 +581,7 @@ class FcsFile:
         self._orig_annotations = res["annotations"].copy()
 
     def delete(self) -> None:
-        return ce.APIClient().delete_entity(self.experiment_id, "fcsfiles", self._id)
+        return self.client.delete_entity(self.experiment_id, "fcsfiles", self._id)
 
     def plot(
         self,
@@ -537,6 +610,144 @@ class FcsFile:
         )
         return plot
 
+    def _channel_values(self, channel: str) -> ndarray:
+        if self._events is None and self._lazy_events is not None:
+            # Reads only this channel's chunks.
+            return self._lazy_events.to_numpy(channels=[channel])[:, 0]
+        values = self.events[channel]
+        if values.ndim == 2:  # Columns are (channel, reagent) pairs.
+            values = values.iloc[:, 0]
+        return values.to_numpy()
+
+    def histogram(
+        self,
+        channel: str,
+        bins: int = 256,
+        scaleset: Optional[ScaleSet] = None,
+        mask: Optional[Union[ndarray, List[int]]] = None,
+    ) -> Tuple[ndarray, ndarray]:
+        """Count this file's events in bins of a channel, locally.
+
+        Uses the events already fetched into `FcsFile.events` (for example by
+        `get_events(inplace=True)` with a population or compensation), so no
+        request is made if they are present. This is much cheaper than
+        fetching a histogram image when only the counts are needed.
+
+        Args:
+            channel: The channel name (`$PnN`).
+            bins: Number of bins.
+            scaleset: Optionally, the experiment's ScaleSet. Values are then
+                clipped to the channel's scale range, scaled and binned evenly
+                in scaled space, like CellEngine's plots. Otherwise they are
+                binned linearly between their minimum and maximum.
+            mask: Optionally, a boolean mask or array of indices selecting the
+                events to count, for example a population's events.
+
+        Returns:
+            The counts and the bin edges, as with `numpy.histogram`.
+
+        Example:
+            ```python
+            counts, edges = fcs_file.histogram("FSC-A", scaleset=experiment.scaleset)
+            plt.stairs(counts, edges)
+            ```
+        """
+        scale = scaleset.scale_for_channel(channel) if scaleset else None
+        return binning.histogram(self._channel_values(channel), bins, scale, mask)
+
+    def density2d(
+        self,
+        x: str,
+        y: str,
+        bins: Union[int, Tuple[int, int]] = 256,
+        scaleset: Optional[ScaleSet] = None,
+        mask: Optional[Union[ndarray, List[int]]] = None,
+    ) -> Tuple[ndarray, ndarray, ndarray]:
+        """Count this file's events in a 2-D grid of two channels, locally.
+
+        See [`histogram`][cellengine.resources.fcs_file.FcsFile.histogram].
+
+        Args:
+            x: The x channel name.
+            y: The y channel name.
+            bins: Number of bins on each axis, or (x bins, y bins).
+            scaleset: Optionally, the experiment's ScaleSet.
+            mask: Optionally, a boolean mask or array of indices selecting the
+                events to count.
+
+        Returns:
+            The counts, of shape (x bins, y bins), and the x and y bin edges,
+            as with `numpy.histogram2d`.
+        """
+        return binning.density2d(
+            self._channel_values(x),
+            self._channel_values(y),
+            bins,
+            scaleset.scale_for_channel(x) if scaleset else None,
+            scaleset.scale_for_channel(y) if scaleset else None,
+            mask,
+        )
+
+    def render_plot(
+        self,
+        plot_type: str,
+        x_channel: str,
+        y_channel: Optional[str] = None,
+        z_channel: Optional[str] = None,
+        scaleset: Optional[ScaleSet] = None,
+        gates: Iterable[Gate] = (),
+        mask: Optional[Union[ndarray, List[int]]] = None,
+        **kwargs: Any,
+    ) -> Plot:
+        """Render a plot of this file's local events, without a request.
+
+        Renders `FcsFile.events` (for example from
+        `get_events(inplace=True)` with a population or compensation) with
+        [`render_plot`][cellengine.utils.plot_renderer.render_plot]. The
+        returned Plot's image is a PNG (requires Pillow), and its population
+        and compensation are those of the events.
+
+        Args:
+            plot_type: "dot", "density", "contour" or "histogram".
+            x_channel: X channel name.
+            y_channel: Y channel name, for 2-D plots.
+            z_channel: For dot plots, a channel by which to color the dots.
+            scaleset: The experiment's ScaleSet, to scale the axes like
+                CellEngine's plots.
+            gates: Gates to draw, if their channels match the plot's. Of
+                gates tailored per file, this file's (or else the global
+                gate) are drawn.
+            mask: Optionally, a boolean mask or array of indices selecting the
+                events to plot.
+            **kwargs: Other arguments of `render_plot`, such as `width`,
+                `height`, `smoothing` and `color`.
+        """
+        channels = [c for c in (x_channel, y_channel, z_channel) if c]
+        events = {c: self._channel_values(c) for c in channels}
+        data = render_plot(
+            events,
+            plot_type,
+            x_channel,
+            y_channel,
+            z_channel,
+            scaleset,
+            gates=gates,
+            mask=mask,
+            fcs_file_id=self._id,
+            **kwargs,
+        )
+        return Plot(
+            experiment_id=self.experiment_id,
+            fcs_file_id=self._id,
+            x_channel=x_channel,
+            y_channel=y_channel,  # type: ignore
+            z_channel=z_channel,
+            plot_type=plot_type,
+            population_id=self._events_kwargs.get("populationId"),
+            compensation=self._events_kwargs.get("compensationId", 0),
+            data=data,  # type: ignore
+        )
+
     def get_file_internal_compensation(self) -> Compensation:
         """Get the file-internal Compensation."""
         if not self.has_file_internal_comp:
@@ -549,29 +760,51 @@ class FcsFile:
     def events(self):
         """A DataFrame containing this file's events (typically cells).
 
-        This is the last result from `FcsFile.get_events(inplace=True)`. If that
-        method has not been called, a DataFrame will be fetched with all events
+        This is the last result from `FcsFile.get_events(inplace=True)`, or
+        the events of `FcsFile.lazy_events`, read into memory. If neither
+        method has been called, a DataFrame will be fetched with all events
         (ungated, no compensation, no subsampling). To fetch events with
         subsampling, compensation and/or gating to a specific population, use
         `FcsFile.get_events()`.
         """
-        if self._events.empty:
+        if self._events is None and self._lazy_events is not None:
+            self._events = self._lazy_events.to_dataframe()
+        if self._events is None or self._events.empty:
             self.get_events(inplace=True)
         return self._events
 
+    @property
+    def lazy_events(self) -> Optional[LazyEvents]:
+        """The `LazyEvents` from `FcsFile.get_events_lazy(inplace=True)`, or
+        None. Local binning and plotting read only the channels they need from
+        them, whereas `FcsFile.events` reads all events into a DataFrame."""
+        return self._lazy_events
+
     @overload
     def get_events(
         self,
         inplace: Optional[bool] = ...,
         destination: None = ...,
+        format: Literal["pandas"] = ...,
         **kwargs: Any,
     ) -> DataFrame: ...
 
+    @overload
+    def get_events(
+        self,
+        inplace: Literal[False] = ...,
+        destination: None = ...,
+        *,
+        format: Literal["arrow"],
+        **kwargs: Any,
+    ) -> Table: ...
+
     @overload
     def get_events(
         self,
         inplace: Optional[bool] = ...,
         destination: str = ...,
+        format: Literal["pandas"] = ...,
         **kwargs: Any,
     ) -> None: ...
 
@@ -579,8 +812,9 @@ class FcsFile:
         self,
         inplace: Optional[bool] = False,
         destination: Optional[str] = None,
+        format: Literal["pandas", "arrow"] = "pandas",
         **kwargs: Any,
-    ) -> Union[DataFrame, None]:
+    ) -> Union[DataFrame, Table, None]:
         """
         Fetch a DataFrame containing this file's data.
 
@@ -592,6 +826,12 @@ class FcsFile:
         Args:
             inplace: If `True`, updates the `events` property of this `FcsFile`.
             destination: If provided, the file will be saved to the given path.
+            format: "pandas" (default) for a DataFrame, or "arrow" for a
+                `pyarrow.Table` (requires pyarrow) with one float32 column per
+                channel, named by `$PnN`. Each field's metadata holds the
+                `"$PnN"` and `"$PnS"` values, and the schema's metadata holds
+                the file's ID, experiment ID and filename. The Table is built
+                from the parsed events without an intermediate DataFrame.
             **kwargs:
                 - compensatedQ (bool): If `True`, applies the compensation
                     specified in compensationId to the exported events.
@@ -639,18 +879,123 @@ class FcsFile:
             DataFrame: This file's data, with query parameters applied.
             If inplace=True, it updates the self.events property.
             If destination is a string, saves file to the destination and returns None.
+            If format="arrow", a pyarrow Table.
         """  # noqa
+        if format not in ("pandas", "arrow"):
+            raise ValueError('format must be "pandas" or "arrow".')
+        if format == "arrow" and inplace:
+            raise ValueError('inplace is not supported with format="arrow".')
 
         if inplace is True:
             self._events_kwargs = kwargs
 
-        file = ce.APIClient().download_fcs_file(self.experiment_id, self._id, **kwargs)
+        file = self.client.download_fcs_file(self.experiment_id, self._id, **kwargs)
 
         if destination:
             with open(destination, "wb") as loc:
                 loc.write(file)
+        elif format == "arrow":
+            return parse_fcs_file_to_arrow(BytesIO(file), self._arrow_metadata())
         else:
             df = parse_fcs_file(BytesIO(file))
             if inplace:
                 self._events = df
+                self._lazy_events = None
             return df
+
+    def get_events_lazy(
+        self, store: Union[str, EventStore], inplace: bool = False, **kwargs: Any
+    ) -> LazyEvents:
+        """Get this file's events from a chunked on-disk store, reading them
+        from disk only as they are sliced. Requires zarr
+        (`pip install cellengine[zarr]`).
+
+        If the store doesn't have the events for these arguments yet, they are
+        downloaded once and written to the store in compressed chunks.
+
+        Args:
+            store: An `EventStore` or the path of its directory.
+            inplace: If True, sets `FcsFile.lazy_events` to the lazy events,
+                and `FcsFile.events` to them, read into memory when used.
+            kwargs: The same arguments as `FcsFile.get_events`.
+
+        Example:
+            ```python
+            events = fcs_file.get_events_lazy("events.zarr", compensationId=comp._id)
+            first_1000 = events[:1000]  # DataFrame
+            ```
+        """
+        if not isinstance(store, EventStore):
+            store = EventStore(store)
+        events = store.get(self._id, kwargs)
+        if events is None:
+            file = self.client.download_fcs_file(self.experiment_id, self._id, **kwargs)
+            values, data = _read_events(BytesIO(file))
+            attrs = {"experimentId": self.experiment_id, "filename": self.filename}
+            events = store.put(
+                self._id, values, data.pnn_labels, data.pns_labels, kwargs, attrs
+            )
+        if inplace:
+            self._events_kwargs = kwargs
+            self._events = None
+            self._lazy_events = events
+        return events
+
+    def _arrow_metadata(self) -> Dict[str, str]:
+        return {
+            "cellengine.fcsFileId": self._id,
+            "cellengine.experimentId": self.experiment_id,
+            "cellengine.filename": self.filename,
+        }
+
+    def to_parquet(
+        self,
+        path: Union[str, BinaryIO],
+        row_group_size: Optional[int] = None,
+        compression: str = "zstd",
+        **kwargs: Any,
+    ) -> None:
+        """Downloads this file's events and saves them as a Parquet file.
+
+        Columns are named by `$PnN` and carry the `$PnS` values as field
+        metadata; see `get_events(format="arrow")`. Requires pyarrow.
+
+        Args:
+            path: Destination path or writable binary file object.
+            row_group_size: Maximum number of events per row group. Defaults
+                to a size giving row groups of roughly 64 MB of uncompressed
+                data, which suits scan engines such as Spark and DuckDB while
+                keeping small files in one row group.
+            compression: Parquet compression codec.
+            **kwargs: Query parameters accepted by `get_events`, such as
+                `populationId` or `compensationId`.
+        """
+        table = self.get_events(format="arrow", **kwargs)
+        from pyarrow import parquet
+
+        if row_group_size is None:
+            row_group_size = default_row_group_size(table.num_columns)
+        parquet.write_table(
+            table, path, row_group_size=row_group_size, compression=compression
+        )
+
+    def to_fcs(
+        self,
+        destination: Union[str, BinaryIO],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Writes this file's `events` to a local FCS 3.1 file with float32 data.
+
+        Unlike `get_events(destination=...)`, which saves the file exported by
+        CellEngine, this writes the events as they are in memory, e.g. after
+        `Compensation.apply` or `ScaleSet.apply`. Channel (`$PnN`) and reagent
+        (`$PnS`) names are taken from the events' columns.
+
+        Args:
+            destination: A path or a writable binary file object.
+            headers: Additional TEXT keywords, such as `$PnD` display
+                settings. `$FIL` defaults to this file's name.
+        """
+        write_fcs(
+            destination, self.events, headers={"$FIL": self.filename, **(headers or {})}
+        )
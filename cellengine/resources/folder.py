@@ -1,15 +1,20 @@
 from __future__ import annotations
-from typing import Optional, Any, Dict, List, Union
+from typing import TYPE_CHECKING, Optional, Any, Dict, List, Union
 from datetime import datetime
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 from cellengine.utils.helpers import timestamp_to_datetime, datetime_to_timestamp
 
+if TYPE_CHECKING:
+    from cellengine.utils.api_client.APIClient import APIClient
 
-class Folder:
+
+class Folder(ClientResource):
     """A class representing a CellEngine folder."""
 
-    def __init__(self, properties: Dict[str, Any]):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
 
     @property
@@ -97,7 +102,7 @@ class Folder:
     def update(self) -> None:
         """Save changes to this Folder to CellEngine."""
         update_properties = {key: self._properties[key] for key in self._changes}
-        res = ce.APIClient().update_folder(self._id, update_properties)
+        res = self.client.update_folder(self._id, update_properties)
         self._properties = res
         self._changes = set()
 
@@ -108,10 +113,10 @@ class Folder:
         7 days. Until then, deleted folders can be recovered.
         """
         self.deleted = datetime.today()  # won't exactly match server, but close
-        ce.APIClient().delete_folder(self._id)
+        self.client.delete_folder(self._id)
 
     def undelete(self) -> None:
         """Clears a scheduled deletion."""
         if self.deleted:
             self.deleted = None
-            ce.APIClient().update_folder(self._id, {"deleted": self.deleted})
+            self.client.update_folder(self._id, {"deleted": self.deleted})
@@ -5,16 +5,15 @@ from cellengine.utils.types import (
     ApplyTailoringUpdate,
 )
 from math import pi
-from typing import Any, Dict, List, Optional, Union, Tuple, overload
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union, Tuple, overload
 
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
 
-from numpy import mean
-
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 from cellengine.resources.population import Population
 from cellengine.utils import parse_fcs_file_args
 from cellengine.utils import generate_id
@@ -23,6 +22,10 @@ from cellengine.utils.helpers import (
     remove_keys_with_none_values,
 )
 
+if TYPE_CHECKING:
+    from cellengine.resources.scaleset import ScaleSet
+    from cellengine.utils.api_client.APIClient import APIClient
+
 try:
     from collections.abc import Mapping
 except ImportError:
@@ -62,12 +65,50 @@ class ApplyTailoringResult:
         self.deleted: List[str] = []
 
 
-class Gate:
+GATES_BATCH_SIZE = 200
+"""Default maximum number of gates per request when creating gates in bulk."""
+
+
+class PartialGatesError(Exception):
+    """Raised when creating gates in bulk if some, but not all, batches of
+    gates failed to be created.
+
+    Attributes:
+        gates: The created gates, in the order they were given, with None in
+            place of each gate that was not created.
+        failures: For each failed batch, its formatted gates and the exception
+            it raised.
+    """
+
+    def __init__(
+        self,
+        gates: List[Optional[Gate]],
+        failures: List[Tuple[List[Dict[str, Any]], Exception]],
+    ):
+        self.gates = gates
+        self.failures = failures
+
+    @property
+    def failed_gates(self) -> List[Dict[str, Any]]:
+        """The formatted gates that were not created, e.g. to pass to
+        `APIClient.post_gates` to retry them."""
+        return [gate for batch, _ in self.failures for gate in batch]
+
+    def __str__(self):
+        return (
+            f"{len(self.failures)} gate batch(es) failed; the first failed "
+            f"with: {self.failures[0][1]!r}. The gates that were created are in "
+            "the gates attribute."
+        )
+
+
+class Gate(ClientResource):
     """Do not construct directly; use the `Experiment.create_*_gate` and
     `__Gate.create()` methods."""
 
-    def __init__(self, properties: Dict[str, Any]):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
 
     @property
@@ -126,33 +167,80 @@ class Gate:
         _class = getattr(module, gate["type"])
         return _class._format(**gate)
 
+    @staticmethod
+    def _format_gates(gates: List[Dict]) -> List[Dict]:
+        """Formats gates for bulk creation. The scaleset used for the default
+        labels of compound gates is fetched once instead of once per gate."""
+        scalesets: Dict[str, Any] = {}
+
+        def format_gate(gate: Dict) -> Dict:
+            if (
+                gate["type"] in ("QuadrantGate", "SplitGate")
+                and not gate.get("labels")
+                and not gate.get("model", {}).get("labels")
+            ):
+                experiment_id = gate["experiment_id"]
+                if experiment_id not in scalesets:
+                    scalesets[experiment_id] = ce.APIClient().get_scaleset(
+                        experiment_id
+                    )
+                gate = dict(gate, scaleset=scalesets[experiment_id])
+            return Gate._format_gate(gate)
+
+        return [format_gate(gate) for gate in gates]
+
     @classmethod
     def create_many(
         cls,
         gates: List[Dict],
+        batch_size: Optional[int] = GATES_BATCH_SIZE,
+        max_workers: int = 4,
+        retries: int = 0,
     ):
+        """Create many gates, sending large numbers of gates in concurrent
+        batches.
+
+        Args:
+            gates: Gate arguments, as for each gate type's `create` method,
+                plus `type` and `experiment_id`.
+            batch_size: Maximum number of gates per request, or None to send
+                all gates in one request.
+            max_workers: Maximum number of batches to send at once.
+            retries: Number of times to resend batches that failed. Only the
+                failed batches are resent.
+
+        Returns:
+            The created gates, in the order given.
+
+        Raises:
+            PartialGatesError: If some batches could not be created. Its
+                `gates` attribute holds the gates that were created.
+        """
         experiment_id = set([g["experiment_id"] for g in gates])
         if len(experiment_id) != 1:
             raise RuntimeError("Created gates must all be in the same Experiment.")
 
-        formatted_gates = [cls._format_gate(gate) for gate in gates]
+        formatted_gates = cls._format_gates(gates)
         return ce.APIClient().post_gates(
             experiment_id.pop(),
             formatted_gates,
             {"create_population": False},
+            batch_size=batch_size,
+            max_workers=max_workers,
+            retries=retries,
         )
 
     def update(self) -> None:
         """Save changes to this Gate to CellEngine."""
         update_properties = {key: self._properties[key] for key in self._changes}
-        res = ce.APIClient().update_entity(
+        res = self.client.update_entity(
             self.experiment_id, self._id, "gates", update_properties
         )
         self._properties = res
         self._changes = set()
 
     def delete(self) -> None:
-        ce.APIClient().delete_gate(self.experiment_id, self._id)
+        self.client.delete_gate(self.experiment_id, self._id)
 
     @staticmethod
     def update_gate_family(experiment_id: str, gid: str, body: Dict) -> None:
@@ -176,7 +264,7 @@ class Gate:
 
     def apply_tailoring(self, fcs_file_ids: List[str]) -> ApplyTailoringResult:
         """Apply this gate's tailoring (copy its geometry) to other FCS files."""
-        payload = ce.APIClient().apply_tailoring(self.experiment_id, self, fcs_file_ids)
+        payload = self.client.apply_tailoring(self.experiment_id, self, fcs_file_ids)
         ret = ApplyTailoringResult()
         [ret.inserted.append(self._synthesize_gate(i)) for i in payload["inserted"]]
         [ret.updated.append(self._synthesize_gate(i)) for i in payload["updated"]]
@@ -193,7 +281,7 @@ class Gate:
     ):
         gate = self._properties  # TODO review
         gate.update(payload)
-        return Gate(gate)
+        return Gate(gate, self._client)
 
 
 class SimpleGate(Gate):
@@ -372,6 +460,8 @@ class RectangleGate(SimpleGate):
 
         label = args.get("label", args.get("model", {}).get("label"))
         if label is None or label == []:
+            from numpy import mean
+
             label = [mean([x1, x2]), mean([y1, y2])]
 
         model = {
@@ -520,6 +610,8 @@ class PolygonGate(SimpleGate):
 
         label = args.get("label") or args.get("model", {}).get("label")
         if label is None or label == []:
+            from numpy import mean
+
             label = mean(vertices, axis=0).tolist()
 
         model = {
@@ -860,6 +952,8 @@ class RangeGate(SimpleGate):
 
         label = args.get("label", args.get("model", {}).get("label"))
         if label is None or label == []:
+            from numpy import mean
+
             label = [mean([x1, x2]), y]
 
         model = {
@@ -1040,6 +1134,7 @@ class QuadrantGate(CompoundGate):
                 args["experiment_id"],
                 args["x_channel"],
                 args["y_channel"],
+                args.get("scaleset"),
             )
         if not (
             isinstance(labels, list)
@@ -1091,9 +1186,13 @@ class QuadrantGate(CompoundGate):
 
     @classmethod
     def _get_default_label_coords(
-        cls, experiment_id: str, x_channel: str, y_channel: str
+        cls,
+        experiment_id: str,
+        x_channel: str,
+        y_channel: str,
+        scaleset: Optional[ScaleSet] = None,
     ) -> List[List[float]]:
-        scaleset = ce.APIClient().get_scaleset(experiment_id)
+        scaleset = scaleset or ce.APIClient().get_scaleset(experiment_id)
         x_scale_fn = scaleset.scale_fn_for_channel(x_channel)
         y_scale_fn = scaleset.scale_fn_for_channel(y_channel)
 
@@ -1248,7 +1347,7 @@ class SplitGate(CompoundGate):
         labels = args.get("labels", args.get("model", {}).get("labels"))
         if labels is None or labels == []:
             labels = cls._get_default_label_coords(
-                args["experiment_id"], args["x_channel"]
+                args["experiment_id"], args["x_channel"], args.get("scaleset")
             )
         if not (
             isinstance(labels, list)
@@ -1292,9 +1391,9 @@ class SplitGate(CompoundGate):
 
     @classmethod
     def _get_default_label_coords(
-        cls, experiment_id: str, x_channel: str
+        cls, experiment_id: str, x_channel: str, scaleset: Optional[ScaleSet] = None
     ) -> List[List[float]]:
-        scaleset = ce.APIClient().get_scaleset(experiment_id)
+        scaleset = scaleset or ce.APIClient().get_scaleset(experiment_id)
         x_scale_fn = scaleset.scale_fn_for_channel(x_channel)
 
         return [
@@ -1,12 +1,19 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional, Union
+from math import ceil, sqrt
+import re
+import shutil
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Tuple, Union
 
 
 import cellengine as ce
+from cellengine.utils.plot_renderer import import_pil, parse_color
 from cellengine.utils.wrapped_image_opener import WrappedImageOpener
 from cellengine.resources.compensation import UNCOMPENSATED, FILE_INTERNAL
 
+if TYPE_CHECKING:
+    from PIL.Image import Image
+
 
 @dataclass
 class Plot:
@@ -21,9 +28,15 @@ class Plot:
     population_id: Optional[str]
     compensation: Union[str, FILE_INTERNAL, UNCOMPENSATED]
     data: bytes
+    path: Optional[str] = None
+    """If set, the file that the image was saved to. `data` may then be empty,
+    in which case the image is read from this file when needed."""
 
     def __post_init__(self):
-        self.image = None
+        self.image: Any = None
+        self._thumbnail: Optional[Tuple[int, int]] = None
+        # The decoded image that replaced `data` after `release_data`.
+        self._released: Any = None
 
     def __repr__(self):
         return f"Plot(experiment_id='{self.experiment_id}', fcs_file_id='{self.fcs_file_id}', plot_type='{self.plot_type}', x_channel='{self.x_channel}', y_channel='{self.y_channel}', z_channel='{self.z_channel}', population_id='{self.population_id}') "  # noqa
@@ -114,11 +127,115 @@ class Plot:
             properties=properties,
         )
 
-    def display(self):
-        if not self.image:
-            self.image = WrappedImageOpener().open(self.data)
+    def _read_data(self) -> bytes:
+        if not self.data and self.path:
+            with open(self.path, "rb") as f:
+                return f.read()
+        return self.data
+
+    def default_filename(self) -> str:
+        """A filename for the plot built from its file, population, type and
+        channels, e.g. "5d38a6f79fae87499999a74b_ungated_dot_FSC-A_SSC-A.png"."""
+        parts = [
+            self.fcs_file_id,
+            self.population_id or "ungated",
+            self.plot_type,
+            self.x_channel,
+            self.y_channel,
+        ]
+        if self.z_channel:
+            parts.append(self.z_channel)
+        return re.sub(r"[^\w.-]+", "_", "_".join(parts)) + ".png"
+
+    def display(
+        self, thumbnail: Optional[Tuple[int, int]] = None, release_data: bool = False
+    ):
+        """Decode the image for display, with Pillow or else IPython.
+
+        The image is decoded on the first call and kept in `Plot.image`.
+        Plots with identical images share one decoded copy.
+
+        Args:
+            thumbnail: Optionally, a (width, height) within which to shrink
+                the image, keeping its aspect ratio.
+            release_data: If True, drop the encoded bytes (`Plot.data`) once
+                decoded, to halve the memory held by the plot. `save` then
+                re-encodes the decoded image (or copies `Plot.path`), and
+                thumbnails are made from the decoded image.
+        """
+        if self.image is None or thumbnail != self._thumbnail:
+            if self._released is not None and not self.path:
+                # The bytes are gone; shrink the image decoded before.
+                image = self._released
+                if thumbnail:
+                    image = image.copy()
+                    image.thumbnail(thumbnail)
+                self.image = image
+            else:
+                self.image = WrappedImageOpener().open(self._read_data(), thumbnail)
+            self._thumbnail = thumbnail
+        if release_data and self.data and WrappedImageOpener().is_pil:
+            self._released = self.image
+            self.data = b""
         return self.image
 
     def save(self, filepath: str):
+        if not self.data and self.path:
+            shutil.copyfile(self.path, filepath)
+            return
+        if not self.data and self._released is not None:
+            self._released.save(filepath, format="PNG")
+            return
         with open(filepath, "wb") as f:
             f.write(self.data)
+
+    @staticmethod
+    def montage(
+        plots: Sequence[Plot],
+        columns: Optional[int] = None,
+        thumbnail: Optional[Tuple[int, int]] = None,
+        padding: int = 4,
+        background: str = "#ffffff",
+    ) -> Image:
+        """Compose plots into one grid image, e.g. for display in a notebook.
+        Requires Pillow.
+
+        Each plot is decoded once (see `display`) and pasted into its cell, so
+        displaying the grid costs one image instead of one per plot.
+
+        Args:
+            plots: The plots, in row-major order.
+            columns: Number of columns. Defaults to a roughly square grid.
+            thumbnail: Optionally, a (width, height) within which to shrink
+                each plot.
+            padding: Pixels between and around the plots.
+            background: Background color, as #rgb, #rgba, #rrggbb or
+                #rrggbbaa.
+
+        Example:
+            ```python
+            plots = [p for _, p in experiment.get_plots(specs)]
+            Plot.montage(plots, columns=8, thumbnail=(150, 150))
+            ```
+        """
+        pil_image = import_pil()
+        images = [plot.display(thumbnail) for plot in plots]
+        columns = columns or max(1, ceil(sqrt(len(images))))
+        rows = max(1, ceil(len(images) / columns))
+        cell_w = max((i.width for i in images), default=0)
+        cell_h = max((i.height for i in images), default=0)
+        grid = pil_image.new(
+            "RGBA",
+            (
+                columns * (cell_w + padding) + padding,
+                rows * (cell_h + padding) + padding,
+            ),
+            parse_color(background),
+        )
+        for n, image in enumerate(images):
+            row, column = divmod(n, columns)
+            x = padding + column * (cell_w + padding) + (cell_w - image.width) // 2
+            y = padding + row * (cell_h + padding) + (cell_h - image.height) // 2
+            rgba = image.convert("RGBA")
+            grid.paste(rgba, (x, y), rgba)
+        return grid
@@ -1,12 +1,17 @@
 from __future__ import annotations
-from typing import Optional, Any, Union, Dict
+from typing import TYPE_CHECKING, Optional, Any, Union, Dict
 
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 
+if TYPE_CHECKING:
+    from cellengine.utils.api_client.APIClient import APIClient
 
-class Population:
-    def __init__(self, properties: Dict[str, Any]):
+
+class Population(ClientResource):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
 
     @property
@@ -90,11 +95,11 @@ class Population:
     def update(self) -> None:
         """Save changes to this Population to CellEngine."""
         update_properties = {key: self._properties[key] for key in self._changes}
-        res = ce.APIClient().update_entity(
+        res = self.client.update_entity(
             self.experiment_id, self._id, "populations", update_properties
         )
         self._properties = res
         self._changes = set()
 
     def delete(self) -> None:
-        ce.APIClient().delete_entity(self.experiment_id, "populations", self._id)
+        self.client.delete_entity(self.experiment_id, "populations", self._id)
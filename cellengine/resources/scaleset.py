@@ -1,7 +1,6 @@
 from __future__ import annotations
-from numpy import arcsinh, clip, log10
 from collections import defaultdict
-from typing import Union, overload, Any, Dict, Optional, Callable
+from typing import TYPE_CHECKING, Union, overload, Any, Dict, Optional, Callable
 
 try:
     from typing import Literal
@@ -13,11 +12,15 @@ try:
 except ImportError:
     from typing_extensions import TypedDict
 
-from pandas import DataFrame
-
 import cellengine as ce
+from cellengine.resources.client_resource import ClientResource
 from cellengine.resources.fcs_file import FcsFile
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+    from cellengine.utils.api_client.APIClient import APIClient
+
 
 ScaleDict = TypedDict(
     "ScaleDict",
@@ -28,6 +31,8 @@ FLT_MIN = 1.17549435082228750797e-38
 
 
 def apply_scale(item, scale: ScaleDict, clamp_q=False):
+    from numpy import arcsinh, clip, log10
+
     _type = scale["type"]
 
     def bad_scale_error(_):
@@ -48,9 +53,10 @@ def apply_scale(item, scale: ScaleDict, clamp_q=False):
         return fn[_type](item)
 
 
-class ScaleSet:
-    def __init__(self, properties: Dict[str, Any]):
+class ScaleSet(ClientResource):
+    def __init__(self, properties: Dict[str, Any], client: Optional[APIClient] = None):
         self._properties = properties
+        super().__init__(client)
         self._changes = set()
         self._orig_scales = properties["scales"].copy()
 
@@ -94,7 +100,7 @@ class ScaleSet:
             update_properties["scales"] = [
                 {"channelName": k, "scale": v} for k, v in self.scales.items()
             ]
-        res = ce.APIClient().update_entity(
+        res = self.client.update_entity(
             self.experiment_id, self._id, "scalesets", update_properties
         )
         self._properties = res["scaleSet"]
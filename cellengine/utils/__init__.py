@@ -4,3 +4,6 @@ from .generate_id import generate_id
 from .helpers import is_valid_id
 from .parse_fcs_file import parse_fcs_file
 from .parse_fcs_file_args import parse_fcs_file_args
+from .fcs_writer import write_fcs
+from .subsampling import subsample, subsample_populations, stratified_subsample
+from .binning import histogram, density2d
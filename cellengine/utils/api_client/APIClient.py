@@ -1,4 +1,8 @@
 from __future__ import annotations
+from abc import ABCMeta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
 from cellengine.utils.types import ApplyTailoringRes
 from functools import lru_cache
 from getpass import getpass
@@ -6,21 +10,44 @@ import importlib
 import json
 import os
 from warnings import warn
-from typing import Any, Dict, List, Optional, Tuple, TypeVar, Union
-from io import BytesIO
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
 
-import pandas
-from pandas.core.frame import DataFrame
-from requests_toolbelt.multipart.encoder import MultipartEncoder
-
 from cellengine.utils.api_client.APIError import APIError
 from cellengine.utils.api_client.BaseAPIClient import BaseAPIClient
-from cellengine.utils.singleton import Singleton
+from cellengine.utils.api_client.RateLimiter import RateLimiter
+from cellengine.utils.api_client.PlotCache import PlotCache
+from cellengine.utils.api_client.StatisticsCache import StatisticsCache
+from cellengine.utils.checksums import FileChecksums, file_checksums
+from cellengine.utils.concurrency import iter_concurrent, map_concurrent
+from cellengine.utils.statistics import (
+    STATISTICS_BATCH_SIZE,
+    PartialStatisticsError,
+    batch_ids,
+    concat_statistics,
+    pivot_statistics,
+    read_statistics_arrow,
+    read_statistics_tsv,
+    server_statistics_format,
+)
+from cellengine.utils.upload_manifest import UploadManifest
 
 from ...resources.attachment import Attachment
 from ...resources.compensation import Compensation, Compensations, UNCOMPENSATED
@@ -28,6 +55,8 @@ from ...resources.experiment import Experiment, ImportOpts
 from ...resources.fcs_file import FcsFile
 from ...resources.folder import Folder
 from ...resources.gate import (
+    GATES_BATCH_SIZE,
+    PartialGatesError,
     EllipseGate,
     Gate,
     PolygonGate,
@@ -40,6 +69,9 @@ from ...resources.plot import Plot
 from ...resources.population import Population
 from ...resources.scaleset import ScaleSet
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 
 CE = TypeVar(
     "CE",
@@ -65,23 +97,155 @@ _Gate = TypeVar(
     SplitGate,
 )
 
+_PLOT_ARGS = (
+    "fcs_file_id",
+    "plot_type",
+    "x_channel",
+    "y_channel",
+    "z_channel",
+    "population_id",
+    "compensation",
+)
+"""Plot spec keys that are arguments of `get_plot` rather than properties."""
+
+
+_current_client: ContextVar[Optional[APIClient]] = ContextVar(
+    "cellengine_client", default=None
+)
+_default_client: Optional[APIClient] = None
+
+
+class _DefaultClientMeta(ABCMeta):
+    """Calling `APIClient()` with no arguments returns the current client (see
+    `APIClient.use()`), or else the default client, creating it from
+    environment variables if necessary. Calling it with arguments always
+    creates a new client."""
+
+    def __call__(cls, *args, **kwargs):
+        global _default_client
+        if not args and not kwargs:
+            current = _current_client.get() or _default_client
+            if isinstance(current, cls):
+                return current
+        client = super(_DefaultClientMeta, cls).__call__(*args, **kwargs)
+        if _default_client is None:
+            _default_client = client
+        return client
+
+
+class APIClient(BaseAPIClient, metaclass=_DefaultClientMeta):
+    """The client used to make requests to CellEngine.
+
+    Resources (experiments, FCS files, etc.) use the client that retrieved
+    them. Class methods such as `Experiment.get()` use the current client: the
+    client activated with `client.use()`, or else the default client. The
+    first client created becomes the default; change it with
+    `client.set_default()`. `APIClient()` without arguments returns the current
+    client.
+
+    Multiple clients, e.g. with different credentials or base URLs, can be
+    used in the same process, and a client may be used from multiple threads
+    at once.
+
+    Examples:
+        ```py
+        lab_a = cellengine.APIClient(token=token_a)
+        lab_b = cellengine.APIClient(token=token_b)
+
+        exp = lab_b.get_experiment(name="my experiment")
+        exp.fcs_files  # fetched with lab_b
+
+        with lab_b.use():
+            cellengine.Experiment.get(name="my experiment")  # uses lab_b
+        ```
+    """
 
-class APIClient(BaseAPIClient, metaclass=Singleton):
     _API_NAME = "CellEngine Python Toolkit"
 
-    def __init__(self, username=None, password=None, token=None):
-        super(APIClient, self).__init__()
-        self.base_url = os.environ.get("CELLENGINE_BASE_URL", "https://cellengine.com")
-        self.username = username or os.environ.get("CELLENGINE_USERNAME")
+    def __init__(
+        self,
+        username=None,
+        password=None,
+        token=None,
+        base_url: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        pool_block: Optional[bool] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        tcp_keepalive: Optional[int] = None,
+        statistics_cache: Optional[StatisticsCache] = None,
+        plot_cache: Optional[PlotCache] = None,
+    ):
+        """
+        Connection settings default to the corresponding `CELLENGINE_*`
+        environment variable (e.g. `CELLENGINE_POOL_MAXSIZE` or
+        `CELLENGINE_READ_TIMEOUT`), then to the defaults listed here.
+
+        Args:
+            username: CellEngine username. Defaults to `CELLENGINE_USERNAME`.
+            password: CellEngine password. Defaults to `CELLENGINE_PASSWORD`.
+            token: API token; may be passed instead of username and password.
+                Defaults to `CELLENGINE_AUTH_TOKEN`.
+            base_url: Defaults to `CELLENGINE_BASE_URL`, or else
+                "https://cellengine.com".
+            rate_limiter: Limits the rate and concurrency of requests. Defaults
+                to a [`RateLimiter`][cellengine.RateLimiter] configured from
+                environment variables (unlimited if none are set).
+            pool_connections: Number of per-host connection pools to cache.
+                Defaults to 10.
+            pool_maxsize: Maximum number of connections kept open per host.
+                Set this to at least the number of threads sending requests
+                concurrently. Defaults to 10.
+            pool_block: If true, requests wait for a free connection once
+                `pool_maxsize` connections are in use instead of opening (and
+                then discarding) extra connections. Defaults to false.
+            connect_timeout: Seconds to wait for a connection to be
+                established. Defaults to 10. Set to 0 to wait indefinitely.
+            read_timeout: Seconds to wait between bytes received from the
+                server. Defaults to 300. Set to 0 to wait indefinitely.
+            tcp_keepalive: Seconds of inactivity after which TCP keep-alive
+                probes are sent on idle connections. Defaults to 60. Set to 0
+                to disable keep-alive probes.
+            statistics_cache: Optionally, a
+                [`StatisticsCache`][cellengine.StatisticsCache] in which to
+                cache `get_statistics` results.
+            plot_cache: Optionally, a [`PlotCache`][cellengine.PlotCache] in
+                which to cache `get_plot` and `get_plots` images.
+        """
+        super(APIClient, self).__init__(
+            rate_limiter,
+            pool_connections,
+            pool_maxsize,
+            pool_block,
+            connect_timeout,
+            read_timeout,
+            tcp_keepalive,
+        )
+        self.base_url = base_url or os.environ.get(
+            "CELLENGINE_BASE_URL", "https://cellengine.com"
+        )
+        if not (username or token):
+            # Only fall back to the environment if no credentials were given,
+            # so that explicit credentials are never mixed with others.
+            username = os.environ.get("CELLENGINE_USERNAME")
+            token = os.environ.get("CELLENGINE_AUTH_TOKEN")
+        self.username = username
         self.password = password or os.environ.get("CELLENGINE_PASSWORD")
-        self.token = token or os.environ.get("CELLENGINE_AUTH_TOKEN")
+        self.token = token
         self.user_id = None
         self.authenticated = self._authenticate(
             self.username, self.password, self.token
         )
 
+        # Name lookups are cached per client. lru_cache is thread-safe,
+        # although concurrent misses for the same name may both be fetched.
+        self._get_id_by_name = lru_cache(maxsize=None)(self._get_id_by_name)
         self.cache_info = self._get_id_by_name.cache_info
         self.cache_clear = self._get_id_by_name.cache_clear
+        self.statistics_cache = statistics_cache
+        self.plot_cache = plot_cache
 
     def __repr__(self):
         if self.username:
@@ -89,6 +253,32 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         else:
             return "Client(TOKEN)"
 
+    @contextmanager
+    def use(self) -> Iterator[APIClient]:
+        """Makes this the current client within a `with` block.
+
+        The current client is stored in a context variable, so it applies to
+        the current thread (or asyncio task) only. Threads started within the
+        block use the default client unless they also call `use()`.
+
+        Example:
+            ```py
+            with client.use():
+                experiment = cellengine.Experiment.get(name="my experiment")
+            ```
+        """
+        token = _current_client.set(self)
+        try:
+            yield self
+        finally:
+            _current_client.reset(token)
+
+    def set_default(self) -> None:
+        """Makes this the default client for all threads. The default client is
+        used when no client is activated with `use()`."""
+        global _default_client
+        _default_client = self
+
     def _authenticate(
         self, username: Optional[str], password: Optional[str], token: Optional[str]
     ):
@@ -134,7 +324,7 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             self.user_id = res["userId"]
 
         elif token:
-            self.requests_session.cookies.update({"token": "{0}".format(token)})
+            self._cookies.update({"token": "{0}".format(token)})
 
         else:
             raise RuntimeError(
@@ -169,7 +359,6 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             raise RuntimeError(f"More than one resource with the name '{name}' exists.")
         return res[0]
 
-    @lru_cache(maxsize=None)
     def _get_id_by_name(self, name, resource_type, experiment_id):
         if resource_type != "experiments":
             path = f"experiments/{experiment_id}/{resource_type}"
@@ -219,7 +408,7 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         attachments = self._get(
             f"{self.base_url}/api/v1/experiments/{experiment_id}/attachments"
         )
-        return [Attachment(attachment) for attachment in attachments]
+        return [Attachment(attachment, self) for attachment in attachments]
 
     def download_attachment(self, experiment_id, _id=None, name=None) -> bytes:
         """Download an attachment"""
@@ -254,23 +443,33 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             if len(attachments) == 0:
                 raise RuntimeError(f"Attachment with ID {_id} not found.")
             attachment = attachments[0]
-        return Attachment(attachment)
+        return Attachment(attachment, self)
 
     def upload_attachment(
-        self, experiment_id, filepath: str, filename: Optional[str] = None
+        self,
+        experiment_id,
+        filepath: str,
+        filename: Optional[str] = None,
+        skip_if_exists: bool = False,
     ) -> Attachment:
         """Upload an attachment
 
         Args:
             filepath (str): Local path to file to upload.
             filename (str, optional): Optionally, specify a new name for the file.
+            skip_if_exists (bool): If True and an attachment with the same
+                content already exists in the experiment, return it instead
+                of uploading the file again.
 
         Returns:
             The newly uploaded Attachment.
         """
         url = f"{self.base_url}/api/v1/experiments/{experiment_id}/attachments"
-        file, headers = self._read_multipart_file(filepath, filename)
-        return Attachment(self._post(url, data=file, headers=headers))
+        if skip_if_exists:
+            existing = self._find_existing_file(url, filepath)
+            if existing is not None:
+                return Attachment(existing, self)
+        return Attachment(self._post_multipart_file(url, filepath, filename), self)
 
     def delete_attachment(
         self, experiment_id: str, _id: Optional[str] = None, name: Optional[str] = None
@@ -292,7 +491,7 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         )
         if as_dict:
             return compensations
-        return [Compensation(c) for c in compensations]
+        return [Compensation(c, self) for c in compensations]
 
     def get_compensation(
         self,
@@ -308,20 +507,20 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             )
         else:
             raise RuntimeError("Either _id or name must be specified.")
-        return Compensation(res)
+        return Compensation(res, self)
 
     def post_compensation(self, experiment_id: str, body: Dict[str, Any]):
         res = self._post(
             f"{self.base_url}/api/v1/experiments/{experiment_id}/compensations",
             json=body,
         )
-        return Compensation(res)
+        return Compensation(res, self)
 
     # ------------------------------ Experiments -------------------------------
 
     def get_experiments(self) -> List[Experiment]:
         res = self._get(f"{self.base_url}/api/v1/experiments")
-        return [Experiment(experiment) for experiment in res]
+        return [Experiment(experiment, self) for experiment in res]
 
     def get_experiment(self, _id=None, name=None) -> Experiment:
         if name is not None:
@@ -330,16 +529,16 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             res = self._get(f"{self.base_url}/api/v1/experiments/{_id}")
         else:
             raise RuntimeError("Either _id or name must be specified.")
-        return Experiment(res)
+        return Experiment(res, self)
 
     def post_experiment(self, experiment: dict) -> Experiment:
         """Create a new experiment on CellEngine."""
         res = self._post(f"{self.base_url}/api/v1/experiments", json=experiment)
-        return Experiment(res)
+        return Experiment(res, self)
 
     def clone_experiment(self, _id, props: Dict[str, Any] = {}) -> Experiment:
         res = self._post(f"{self.base_url}/api/v1/experiments/{_id}/clone", json=props)
-        return Experiment(res)
+        return Experiment(res, self)
 
     def update_experiment(self, _id, body) -> Dict:
         return self._patch(f"{self.base_url}/api/v1/experiments/{_id}", json=body)
@@ -384,7 +583,7 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         )
         if as_dict:
             return fcs_files
-        return [FcsFile(fcs_file) for fcs_file in fcs_files]
+        return [FcsFile(fcs_file, self) for fcs_file in fcs_files]
 
     def get_fcs_file(
         self,
@@ -397,41 +596,155 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         fcs_file = self._get(
             f"{self.base_url}/api/v1/experiments/{experiment_id}/fcsfiles/{_id}"
         )
-        return FcsFile(fcs_file)
+        return FcsFile(fcs_file, self)
 
     def upload_fcs_file(
         self,
         experiment_id: str,
-        filepath_or_data: Union[str, BytesIO],
+        filepath_or_data: Union[str, BinaryIO],
         filename: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        skip_if_exists: bool = False,
     ) -> FcsFile:
         """Upload an FCS file to CellEngine
 
         Args:
             filepath_or_data: Local path to FCS file.
             filename: Optionally, specify a new name for the file.
+            progress: Optionally, a function called as the file is sent with
+                the number of bytes sent so far and the total number of bytes
+                in the request.
+            skip_if_exists: If True and a file with the same content already
+                exists in the experiment, return it instead of uploading the
+                file again.
 
         Returns:
             The newly-uploaded FcsFile
         """
         url = f"{self.base_url}/api/v1/experiments/{experiment_id}/fcsfiles"
-        file, headers = self._read_multipart_file(filepath_or_data, filename)
-        return FcsFile(self._post(url, data=file, headers=headers))
+        if skip_if_exists:
+            existing = self._find_existing_file(url, filepath_or_data)
+            if existing is not None:
+                return FcsFile(existing, self)
+        return FcsFile(
+            self._post_multipart_file(url, filepath_or_data, filename, progress), self
+        )
+
+    def upload_fcs_files(
+        self,
+        experiment_id: str,
+        filepaths: List[str],
+        max_workers: int = 4,
+        skip_if_exists: bool = True,
+        manifest: Optional[str] = None,
+        progress: Optional[Callable[[str, int, int], None]] = None,
+    ) -> List[Union[FcsFile, Exception]]:
+        """Upload several FCS files concurrently.
+
+        Args:
+            experiment_id: ID of the experiment to upload to.
+            filepaths: Local paths to FCS files.
+            max_workers: Maximum number of files to upload at once.
+            skip_if_exists: If True, files whose content (size, MD5 and, if
+                available, CRC32C) matches a file already in the experiment
+                are not uploaded; the existing FcsFile is returned instead.
+            manifest: Optionally, the path to a JSON file in which to record
+                progress. Running the same batch again with the same manifest
+                skips the files that were already uploaded, without
+                recomputing their checksums.
+            progress: Optionally, a function called as each file is sent with
+                the file's path, the number of bytes sent so far and the
+                total number of bytes in the file's request. It is called from
+                several threads.
+
+        Returns:
+            One item per path, in the same order: the uploaded (or existing)
+            FcsFile, or the exception raised if that file failed to upload.
+        """
+        existing: Dict[str, Dict[str, Any]] = {}
+        if skip_if_exists or manifest:
+            existing = {
+                f["_id"]: f for f in self.get_fcs_files(experiment_id, as_dict=True)
+            }
+        upload_manifest = UploadManifest(manifest, experiment_id) if manifest else None
+
+        def upload(path: str) -> FcsFile:
+            checksums: Optional[FileChecksums] = None
+            if upload_manifest:
+                entry = upload_manifest.get(path)
+                if entry and entry.get("fcsFileId") in existing:
+                    return FcsFile(existing[entry["fcsFileId"]], self)
+                checksums = upload_manifest.checksums(path)
+            if skip_if_exists:
+                checksums = checksums or file_checksums(path)
+                match = next(
+                    (f for f in existing.values() if checksums.matches(f)), None
+                )
+                if match:
+                    if upload_manifest:
+                        upload_manifest.record(path, checksums, match["_id"])
+                    return FcsFile(match, self)
+            fcs_file = self.upload_fcs_file(
+                experiment_id,
+                path,
+                progress=(
+                    (lambda sent, total: progress(path, sent, total))
+                    if progress
+                    else None
+                ),
+            )
+            if upload_manifest:
+                upload_manifest.record(path, checksums, fcs_file._id)
+            return fcs_file
+
+        return map_concurrent(upload, filepaths, max_workers)
+
+    def _find_existing_file(
+        self, url: str, file: Union[str, BinaryIO]
+    ) -> Optional[Dict[str, Any]]:
+        """Returns the properties of the file in the collection at `url` (FCS
+        files or attachments) with the same content as `file`, if any. The
+        file is checksummed on a worker thread while the collection is
+        fetched."""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            checksums = executor.submit(file_checksums, file)
+            existing = self._get(url)
+            return next((f for f in existing if checksums.result().matches(f)), None)
+
+    def _post_multipart_file(
+        self,
+        url: str,
+        file: Union[str, BinaryIO],
+        filename: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Any:
+        """Posts a file as multipart/form-data, streaming it from disk."""
+        from requests_toolbelt.multipart.encoder import (
+            MultipartEncoder,
+            MultipartEncoderMonitor,
+        )
 
-    def _read_multipart_file(
-        self, file: Union[str, BytesIO], filename: Optional[str] = None
-    ):
-        """Posts a MultipartEncoder of the file and its content-type"""
         if filename is None:
             if isinstance(file, str):
                 filename = os.path.basename(file)
             else:
                 raise ValueError("filename is required")
         reader = open(file, "rb") if isinstance(file, str) else file
-        mpe = MultipartEncoder(
-            fields={"data": (filename, reader, "application/octet-stream")}
-        )
-        return mpe, {"Content-Type": mpe.content_type}
+        try:
+            mpe = MultipartEncoder(
+                fields={"data": (filename, reader, "application/octet-stream")}
+            )
+            data = mpe
+            if progress is not None:
+                data = MultipartEncoderMonitor(
+                    mpe, lambda monitor: progress(monitor.bytes_read, monitor.len)
+                )
+            return self._post(
+                url, data=data, headers={"Content-Type": mpe.content_type}
+            )
+        finally:
+            if reader is not file:
+                reader.close()
 
     def create_fcs_file(self, experiment_id, body) -> FcsFile:
         """Creates an FCS file by copying, concatenating and/or
@@ -439,7 +752,7 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         used to import files from other experiments.
         """
         url = f"{self.base_url}/api/v1/experiments/{experiment_id}/fcsfiles"
-        return FcsFile(self._post(url, json=body))
+        return FcsFile(self._post(url, json=body), self)
 
     def download_fcs_file(
         self, experiment_id: str, fcs_file_id: str, **kwargs: Any
@@ -507,7 +820,7 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
 
     def get_folders(self) -> List[Folder]:
         res = self._get(f"{self.base_url}/api/v1/folders")
-        return [Folder(folder) for folder in res]
+        return [Folder(folder, self) for folder in res]
 
     def get_folder(self, _id=None, name=None) -> Folder:
         if name is not None:
@@ -516,12 +829,12 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             res = self._get(f"{self.base_url}/api/v1/folders/{_id}")
         else:
             raise RuntimeError("Either _id or name must be specified.")
-        return Folder(res)
+        return Folder(res, self)
 
     def post_folder(self, folder: dict) -> Folder:
         """Create a new folder on CellEngine."""
         res = self._post(f"{self.base_url}/api/v1/folders", json=folder)
-        return Folder(res)
+        return Folder(res, self)
 
     def update_folder(self, _id, body) -> Dict:
         return self._patch(f"{self.base_url}/api/v1/folders/{_id}", json=body)
@@ -563,13 +876,71 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         experiment_id: str,
         body: List[Dict[str, Any]],
         params: Dict = {},
+        batch_size: Optional[int] = GATES_BATCH_SIZE,
+        max_workers: int = 4,
+        retries: int = 0,
     ) -> List[Gate]:
-        r = self._post(
-            f"{self.base_url}/api/v1/experiments/{experiment_id}/gates",
-            json=body,
-            params=params,
-        )
-        return [self._parse_gate_population(g)[0] for g in r]
+        """Creates formatted gates in bulk.
+
+        If there are more than `batch_size` gates, they are sent in
+        concurrent batches, so that very large requests (e.g. a tailored gate
+        for each of hundreds of files) aren't rejected as a whole.
+
+        Args:
+            experiment_id: ID of the experiment.
+            body: Formatted gates (see `Gate._format_gates`).
+            params: Query parameters.
+            batch_size: Maximum number of gates per request, or None to send
+                all gates in one request.
+            max_workers: Maximum number of batches to send at once.
+            retries: Number of times to resend batches that failed. Only the
+                failed batches are resent. Note that a batch that failed with
+                a timeout may have been created anyway.
+
+        Returns:
+            The created gates, in the order of `body`.
+
+        Raises:
+            PartialGatesError: If some, but not all, batches failed. If all
+                batches failed, the first batch's exception is raised.
+        """
+        url = f"{self.base_url}/api/v1/experiments/{experiment_id}/gates"
+
+        def post(batch: List[Dict[str, Any]]) -> List[Gate]:
+            r = self._post(url, json=batch, params=params)
+            return [self._parse_gate_population(g)[0] for g in r]
+
+        if batch_size is None or len(body) <= batch_size:
+            # One batch, which is still retried.
+            batches = [body]
+        elif batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        else:
+            starts = range(0, len(body), batch_size)
+            batches = [body[i : i + batch_size] for i in starts]  # noqa: E203
+        results = map_concurrent(post, batches, max_workers)
+        for _ in range(retries):
+            failed = [i for i, r in enumerate(results) if isinstance(r, Exception)]
+            if not failed:
+                break
+            retried = map_concurrent(post, [batches[i] for i in failed], max_workers)
+            for i, result in zip(failed, retried):
+                results[i] = result
+
+        failures = [
+            (batch, r) for batch, r in zip(batches, results) if isinstance(r, Exception)
+        ]
+        if len(failures) == len(batches):
+            raise failures[0][1]
+        gates: List[Optional[Gate]] = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                gates.extend([None] * len(batch))
+            else:
+                gates.extend(result)
+        if failures:
+            raise PartialGatesError(gates, failures)
+        return gates  # type: ignore
 
     def post_gate(
         self,
@@ -649,17 +1020,17 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         keys = res.keys()
         if "population" in keys:
             gate = res["gate"]
-            pop = Population(res["population"])
+            pop = Population(res["population"], self)
         elif "populations" in keys:
             gate = res["gate"]
-            pop = [Population(p) for p in res["populations"]]
+            pop = [Population(p, self) for p in res["populations"]]
         else:
             gate = res
             pop = None
         module = importlib.import_module("cellengine")
         gate_subclass = getattr(module, gate["type"])
         return (
-            gate_subclass(gate),
+            gate_subclass(gate, self),
             pop,
         )
 
@@ -693,7 +1064,14 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         compensation: Union[str, Literal[-1], Literal[0]] = 0,
         properties: Optional[Dict] = None,
         raw=False,
+        deep_updated: Optional[str] = None,
     ) -> Plot:
+        """Gets a plot image.
+
+        If the client has a `plot_cache`, images are cached until the
+        experiment changes. `deep_updated` is the experiment's `deepUpdated`
+        timestamp, if known; otherwise it is fetched when the cache is used.
+        """
 
         req_params = {
             "fcsFileId": fcs_file_id,
@@ -708,11 +1086,18 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         if properties:
             req_params.update(properties)
 
-        data = self._get(
-            f"{self.base_url}/api/v1/experiments/{experiment_id}/plot",
-            params=req_params,
-            raw=True,
-        )
+        url = f"{self.base_url}/api/v1/experiments/{experiment_id}/plot"
+        cache, key = self.plot_cache, None
+        if cache is not None:
+            deep_updated = deep_updated or self._get_deep_updated(experiment_id)
+            key = cache.key(experiment_id, deep_updated, req_params)
+        data = cache.get(key) if cache is not None and key is not None else None
+        if data is not None:
+            self._emit_cache_hit("GET", url)
+        else:
+            data = self._get(url, params=req_params, raw=True)
+            if cache is not None and key is not None:
+                cache.put(key, data)
         if raw:
             return data
         return Plot(
@@ -727,27 +1112,79 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             data=data,
         )
 
+    def get_plots(
+        self,
+        experiment_id: str,
+        specs: Iterable[Dict[str, Any]],
+        max_workers: int = 4,
+        directory: Optional[str] = None,
+    ) -> Iterator[Tuple[int, Union[Plot, Exception]]]:
+        """Fetches several plots concurrently, yielding each as it arrives.
+
+        Args:
+            experiment_id: ID of the experiment.
+            specs: One dict per plot, with the arguments of `get_plot`
+                (`fcs_file_id`, `plot_type`, `x_channel`, `y_channel` and
+                optionally `z_channel`, `population_id` and `compensation`).
+                Other keys are passed as plot properties (e.g. `width`,
+                `smoothing`), except `filename`, which names the file saved in
+                `directory`.
+            max_workers: Maximum number of plots to fetch at once.
+            directory: Optionally, a directory in which to save each plot as
+                it arrives (see `Plot.default_filename`). The images are then
+                not kept in memory; the yielded Plots' `path` attributes point
+                to the files.
+
+        Yields:
+            `(index, plot)` pairs in order of arrival, where `index` is the
+            spec's position in `specs`, and `plot` is the Plot or the
+            exception raised while fetching or saving it.
+        """
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        deep_updated = None
+        if self.plot_cache is not None:
+            deep_updated = self._get_deep_updated(experiment_id)
+
+        def fetch(spec: Dict[str, Any]) -> Plot:
+            properties = dict(spec)
+            filename = properties.pop("filename", None)
+            args = {k: properties.pop(k) for k in _PLOT_ARGS if k in properties}
+            plot = self.get_plot(
+                experiment_id,
+                properties=properties,
+                deep_updated=deep_updated,
+                **args,
+            )
+            if directory is not None:
+                path = os.path.join(directory, filename or plot.default_filename())
+                plot.save(path)
+                plot.path, plot.data = path, b""
+            return plot
+
+        return iter_concurrent(fetch, specs, max_workers, ordered=False)
+
     # ----------------------------- Populations --------------------------------
 
     def get_populations(self, experiment_id) -> List[Population]:
         populations: List[Dict[str, Any]] = self._get(
             f"{self.base_url}/api/v1/experiments/{experiment_id}/populations"
         )
-        return [Population(pop) for pop in populations]
+        return [Population(pop, self) for pop in populations]
 
     def get_population(self, experiment_id, _id=None, name=None) -> Population:
         _id = _id or self._get_id_by_name(name, "populations", experiment_id)
         population = self._get(
             f"{self.base_url}/api/v1/experiments/{experiment_id}/populations/{_id}"
         )
-        return Population(population)
+        return Population(population, self)
 
     def post_population(self, experiment_id, population: Dict[str, Any]) -> Population:
         res = self._post(
             f"{self.base_url}/api/v1/experiments/{experiment_id}/populations",
             json=population,
         )
-        return Population(res)
+        return Population(res, self)
 
     # ------------------------------ ScaleSets ---------------------------------
 
@@ -756,7 +1193,7 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         scaleset = self._get(
             f"{self.base_url}/api/v1/experiments/{experiment_id}/scalesets"
         )[0]
-        return ScaleSet(scaleset)
+        return ScaleSet(scaleset, self)
 
     # ------------------------------ Statistics --------------------------------
 
@@ -773,10 +1210,18 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
         layout: Optional[str] = None,
         percent_of: Optional[Union[str, List[str]]] = "PARENT",
         population_ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = STATISTICS_BATCH_SIZE,
+        max_workers: int = 4,
     ) -> Union[Dict, str, DataFrame]:
         """
         Request Statistics from CellEngine.
 
+        Large requests are split into batches of FCS files and populations,
+        which are requested concurrently and whose results are concatenated.
+
+        If the client has a `statistics_cache`, results are cached until the
+        experiment changes.
+
         Args:
             experiment_id: ID of the experiment.
             statistics: Statistics to calculate. Any of "mean", "median",
@@ -798,7 +1243,15 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
                 omitted, statistics for all non-control FCS files will be returned.
             format: str: One of "TSV (with[out] header)",
                 "CSV (with[out] header)" or "json" (default), "pandas",
-                case-insensitive.
+                "pandas-typed" or "arrow", case-insensitive. "pandas-typed"
+                and "arrow" are requested as TSV and parsed directly into
+                typed columns: float64 statistics and categorical
+                (dictionary-encoded) names. They are much faster and smaller
+                than "pandas" for large results. "arrow" returns a pyarrow
+                Table. "wide" returns a DataFrame with one row per file and a
+                column per (population, channel, statistic); see
+                `cellengine.utils.statistics.pivot_statistics`. With
+                `annotations`, the files' annotations are added to its index.
             layout: str: The file (TSV/CSV) or object (JSON) layout.
                 One of "tall-skinny", "medium", or "short-wide".
             percent_of: str or List[str]: Population ID or array of
@@ -809,14 +1262,54 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
                 those populations.
             population_ids: List[str]: List of population IDs.
                 Defaults to ungated.
+            batch_size: Maximum number of (FCS file, population) pairs per
+                request. If `fcs_file_ids` is omitted, the experiment's
+                non-control files are listed (one request, cached with the
+                statistics) to batch them. If None or 0, a single request is
+                made. Unless `layout` is "tall-skinny", a file's populations
+                are never split across requests, which may then exceed
+                `batch_size`.
+            max_workers: Maximum number of batches to request at once.
 
         Returns:
             statistics: Dict, String, or pandas.Dataframe
+
+        Raises:
+            PartialStatisticsError: If some batches failed. Its `result`
+                attribute has the statistics of the batches that succeeded.
         """
 
         if "quantile" == statistics and not isinstance(q, float):
             raise ValueError("'q' must be a number for 'quantile' statistic.")
 
+        if format.lower() == "wide":
+            files = None
+            if annotations:
+                files = self.get_fcs_files(experiment_id, as_dict=True)
+                if fcs_file_ids is None:
+                    # Saves listing the files again to batch them.
+                    fcs_file_ids = [f["_id"] for f in files if not f.get("isControl")]
+            try:
+                tall = self.get_statistics(
+                    experiment_id,
+                    statistics,
+                    channels,
+                    q,
+                    False,
+                    compensation_id,
+                    fcs_file_ids,
+                    "pandas-typed",
+                    "tall-skinny",
+                    percent_of,
+                    population_ids,
+                    batch_size,
+                    max_workers,
+                )
+            except PartialStatisticsError as error:
+                error.result = pivot_statistics(error.result, files)
+                raise
+            return pivot_statistics(tall, files)
+
         params = {
             "statistics": statistics,
             "q": q,
@@ -824,28 +1317,125 @@ class APIClient(BaseAPIClient, metaclass=Singleton):
             "annotations": annotations,
             "compensationId": compensation_id,
             "fcsFileIds": fcs_file_ids,
-            "format": "json" if format == "pandas" else format,
+            "format": server_statistics_format(format),
             "layout": layout,
             "percentOf": percent_of,
             "populationIds": population_ids,
         }
         req_params = {key: val for key, val in params.items() if val is not None}
 
-        raw_stats = self._post(
-            f"{self.base_url}/api/v1/experiments/{experiment_id}/bulkstatistics",
-            json=req_params,
-            raw=True,
+        deep_updated = None
+        if self.statistics_cache is not None:
+            deep_updated = self._get_deep_updated(experiment_id)
+
+        batches = None
+        pops = population_ids or []
+        if batch_size:
+            if fcs_file_ids is None:
+                fcs_file_ids = self._statistics_file_ids(experiment_id, deep_updated)
+            if len(fcs_file_ids) * max(1, len(pops)) > batch_size:
+                # Other layouts have rows or columns per file, spanning
+                # populations, so a file's populations must not be split.
+                batches = batch_ids(
+                    fcs_file_ids,
+                    pops,
+                    batch_size,
+                    split_populations=layout == "tall-skinny",
+                )
+        if not batches:
+            return self._get_statistics_batch(
+                experiment_id, req_params, format, deep_updated
+            )
+
+        def get_batch(batch: Tuple[List[str], List[Optional[str]]]):
+            batch_params = dict(req_params, fcsFileIds=batch[0])
+            if population_ids:
+                batch_params["populationIds"] = batch[1]
+            return self._get_statistics_batch(
+                experiment_id, batch_params, format, deep_updated
+            )
+
+        results = map_concurrent(get_batch, batches, max_workers)
+        failures = [
+            ({"fcsFileIds": b[0], "populationIds": b[1]}, r)
+            for b, r in zip(batches, results)
+            if isinstance(r, Exception)
+        ]
+        if len(failures) == len(results):
+            raise failures[0][1]
+        result = concat_statistics(
+            [r for r in results if not isinstance(r, Exception)], format
         )
+        if failures:
+            raise PartialStatisticsError(result, failures)
+        return result
+
+    def _get_deep_updated(self, experiment_id: str) -> str:
+        """The experiment's `deepUpdated` timestamp, which changes whenever
+        anything in the experiment changes. Used to key cached results."""
+        return self._get(f"{self.base_url}/api/v1/experiments/{experiment_id}")[
+            "deepUpdated"
+        ]
+
+    def _statistics_file_ids(
+        self, experiment_id: str, deep_updated: Optional[str]
+    ) -> List[str]:
+        """IDs of the non-control files, for which statistics are calculated if
+        no files are specified. Cached with the statistics, if enabled."""
+        cache, key = self.statistics_cache, None
+        if cache is not None and deep_updated:
+            key = cache.key(experiment_id, deep_updated, {"fcsFileIds": None})
+            cached = cache.get(key)
+            if cached is not None:
+                self._emit_cache_hit(
+                    "GET",
+                    f"{self.base_url}/api/v1/experiments/{experiment_id}/fcsfiles",
+                )
+                return json.loads(cached)
+        ids = [
+            f["_id"]
+            for f in self.get_fcs_files(experiment_id, as_dict=True)
+            if not f.get("isControl")
+        ]
+        if cache is not None and key is not None:
+            cache.put(key, json.dumps(ids).encode())
+        return ids
+
+    def _get_statistics_batch(
+        self,
+        experiment_id: str,
+        req_params: Dict[str, Any],
+        format: str,
+        deep_updated: Optional[str] = None,
+    ) -> Union[Dict, str, DataFrame]:
+        url = f"{self.base_url}/api/v1/experiments/{experiment_id}/bulkstatistics"
+        cache = self.statistics_cache
+        if cache is not None and deep_updated:
+            key = cache.key(experiment_id, deep_updated, req_params)
+            raw_stats = cache.get(key)
+            if raw_stats is not None:
+                self._emit_cache_hit("POST", url)
+            else:
+                raw_stats = self._post(url, json=req_params, raw=True)
+                cache.put(key, raw_stats)
+        else:
+            raw_stats = self._post(url, json=req_params, raw=True)
 
         format = format.lower()
         if format == "json":
             return json.loads(raw_stats)
+        elif format == "pandas-typed":
+            return read_statistics_tsv(raw_stats)
+        elif format == "arrow":
+            return read_statistics_arrow(raw_stats)
         elif "sv" in format:
             try:
                 return raw_stats.decode()
             except Exception as e:
                 raise ValueError("Invalid output format {}".format(format), e)
         elif format == "pandas":
+            import pandas
+
             try:
                 return pandas.DataFrame.from_dict(json.loads(raw_stats))
             except Exception as e:
@@ -1,14 +1,26 @@
 from __future__ import annotations
-from abc import abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from abc import ABCMeta, abstractmethod
+import os
+import socket
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple, Union
+from warnings import warn
 
 import requests
 from requests import Response
 from requests.sessions import HTTPAdapter
+from urllib3.connection import HTTPConnection
 
 from cellengine import __version__ as CEV
 from cellengine.utils.api_client.APIError import APIError
-from cellengine.utils.singleton import AbstractSingleton
+from cellengine.utils.api_client.Instrumentation import (
+    RequestEvent,
+    RequestHook,
+    endpoint_for_url,
+)
+from cellengine.utils.api_client.RateLimiter import RateLimiter, classify_endpoint
 
 
 def prepare_params(params: Dict) -> Dict:
@@ -17,18 +29,131 @@ def prepare_params(params: Dict) -> Dict:
     return {k: str(v).lower() if type(v) == bool else v for k, v in params.items()}
 
 
-class BaseAPIClient(metaclass=AbstractSingleton):
+def _env(name: str, default: Any, convert=float) -> Any:
+    value = os.environ.get(f"CELLENGINE_{name}")
+    return default if value is None or value == "" else convert(value)
+
+
+def _env_bool(value: str) -> bool:
+    return value.lower() not in ("0", "false", "no", "")
+
+
+def keepalive_socket_options(idle: int) -> List[Tuple[int, int, int]]:
+    """Socket options enabling TCP keep-alive probes after `idle` seconds of
+    inactivity, on platforms that support configuring them."""
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+    elif hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, idle // 4)))
+    if hasattr(socket, "TCP_KEEPCNT"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 4))
+    return options
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter that sets extra socket options (e.g. TCP keep-alive) on
+    the connections in its pool."""
+
+    def __init__(self, socket_options: Optional[List[Tuple]] = None, **kwargs):
+        self.socket_options = socket_options
+        super(KeepAliveHTTPAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options:
+            kwargs["socket_options"] = (
+                HTTPConnection.default_socket_options + self.socket_options
+            )
+        super(KeepAliveHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+class BaseAPIClient(metaclass=ABCMeta):
+    """Base class for API clients.
+
+    A client may be used from several threads at once. `requests.Session` is
+    not thread-safe, so each thread gets its own session (see
+    `requests_session`); all of a client's sessions share one cookie jar and
+    one connection pool.
+    """
+
     @property
     @abstractmethod
     def _API_NAME(self):
         """Define this property in subclasses"""
         assert self._API_NAME
 
-    def __init__(self):
-        self.requests_session = requests.Session()
-        self.requests_session.mount("http://", HTTPAdapter(max_retries=3))
-        self.requests_session.mount("https://", HTTPAdapter(max_retries=3))
-        self.requests_session.headers.update(
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        pool_block: Optional[bool] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        tcp_keepalive: Optional[int] = None,
+    ):
+        """See `APIClient` for a description of the arguments."""
+        self.rate_limiter = rate_limiter or RateLimiter.from_env()
+        self.pool_connections = pool_connections or _env("POOL_CONNECTIONS", 10, int)
+        self.pool_maxsize = pool_maxsize or _env("POOL_MAXSIZE", 10, int)
+        self.pool_block = (
+            pool_block
+            if pool_block is not None
+            else _env("POOL_BLOCK", False, _env_bool)
+        )
+        connect_timeout = (
+            connect_timeout
+            if connect_timeout is not None
+            else _env("CONNECT_TIMEOUT", 10.0)
+        )
+        read_timeout = (
+            read_timeout if read_timeout is not None else _env("READ_TIMEOUT", 300.0)
+        )
+        self.timeout = (connect_timeout or None, read_timeout or None)
+        self.tcp_keepalive = (
+            tcp_keepalive
+            if tcp_keepalive is not None
+            else _env("TCP_KEEPALIVE", 60, int)
+        )
+        self._adapter = KeepAliveHTTPAdapter(
+            socket_options=(
+                keepalive_socket_options(self.tcp_keepalive)
+                if self.tcp_keepalive
+                else None
+            ),
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=3,
+        )
+        self._cookies = requests.cookies.RequestsCookieJar()
+        self._local = threading.local()
+        # Weak, so that each session is dropped with the thread that used it;
+        # thread pools are short-lived (see `iter_concurrent`).
+        self._sessions: weakref.WeakSet[requests.Session] = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        self.hooks: Tuple[RequestHook, ...] = ()
+
+    @property
+    def requests_session(self) -> requests.Session:
+        """The `requests.Session` used by the current thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._create_session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.add(session)
+        return session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies = self._cookies
+        # The adapter (and its connection pool) is shared by all sessions.
+        session.mount("http://", self._adapter)
+        session.mount("https://", self._adapter)
+        session.headers.update(
             {
                 "Content-Type": "application/json",
                 # fmt: off
@@ -37,9 +162,15 @@ class BaseAPIClient(metaclass=AbstractSingleton):
                 # fmt: on
             }
         )
+        return session
 
     def close(self):
-        self.requests_session.close()
+        with self._sessions_lock:
+            sessions, self._sessions = list(self._sessions), weakref.WeakSet()
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
+        self._adapter.close()
 
     @staticmethod
     def _make_headers(headers):
@@ -68,6 +199,64 @@ class BaseAPIClient(metaclass=AbstractSingleton):
         except Exception as error:
             raise APIError(response.url, response.status_code, repr(error))
 
+    def add_hook(self, hook: RequestHook) -> None:
+        """Registers a [`RequestHook`][cellengine.RequestHook] to be notified
+        of requests made by this client."""
+        self.hooks = self.hooks + (hook,)
+
+    def remove_hook(self, hook: RequestHook) -> None:
+        self.hooks = tuple(h for h in self.hooks if h is not hook)
+
+    def _emit(self, name: str, event: RequestEvent) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, name)(event)
+            except Exception as error:
+                warn(f"Request hook {hook!r} raised {error!r}.")
+
+    def _emit_cache_hit(self, method: str, url: str) -> None:
+        """Notifies hooks that a client-side cache answered a request."""
+        if self.hooks:
+            event = RequestEvent(
+                method,
+                url,
+                endpoint_for_url(url),
+                classify_endpoint(method, url),
+                start=time.perf_counter(),
+                cache_hit=True,
+            )
+            self._emit("on_cache_hit", event)
+
+    def _request(self, method: str, url: str, **kwargs) -> Response:
+        """Sends a request through the session, subject to `rate_limiter`, and
+        notifies any hooks."""
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint_class = classify_endpoint(method, url)
+        with self.rate_limiter.limit(endpoint_class):
+            if not self.hooks:
+                return self.requests_session.request(method, url, **kwargs)
+
+            event = RequestEvent(method, url, endpoint_for_url(url), endpoint_class)
+            self._emit("on_request_start", event)
+            event.start = time.perf_counter()
+            try:
+                response = self.requests_session.request(method, url, **kwargs)
+            except Exception as error:
+                event.error = error
+                raise
+            else:
+                event.status_code = response.status_code
+                event.bytes_sent = int(
+                    response.request.headers.get("Content-Length") or 0
+                )
+                event.bytes_received = len(response.content)
+                retries = getattr(response.raw, "retries", None)
+                event.retries = len(retries.history) if retries else 0
+                return response
+            finally:
+                event.duration = time.perf_counter() - event.start
+                self._emit("on_request_end", event)
+
     def _get(
         self,
         url,
@@ -75,14 +264,12 @@ class BaseAPIClient(metaclass=AbstractSingleton):
         headers: Optional[Dict] = None,
         raw=False,
     ) -> Any:
-        try:
-            response = self.requests_session.get(
-                url,
-                headers=self._make_headers(headers),
-                params=prepare_params(params or {}),
-            )
-        except Exception as error:
-            raise error
+        response = self._request(
+            "GET",
+            url,
+            headers=self._make_headers(headers),
+            params=prepare_params(params or {}),
+        )
         return self._parse_response(response, raw=raw)
 
     def _post(
@@ -95,7 +282,8 @@ class BaseAPIClient(metaclass=AbstractSingleton):
         data=None,
         raw=False,
     ) -> Any:
-        response = self.requests_session.post(
+        response = self._request(
+            "POST",
             url,
             json=json,
             headers=self._make_headers(headers),
@@ -114,7 +302,8 @@ class BaseAPIClient(metaclass=AbstractSingleton):
         files: Optional[Dict] = None,
         raw=False,
     ):
-        response = self.requests_session.patch(
+        response = self._request(
+            "PATCH",
             url,
             json=json,
             headers=self._make_headers(headers),
@@ -126,7 +315,8 @@ class BaseAPIClient(metaclass=AbstractSingleton):
     def _delete(
         self, url, params: Optional[dict] = None, headers: Optional[dict] = None
     ):
-        response = self.requests_session.delete(
+        response = self._request(
+            "DELETE",
             url,
             headers=self._make_headers(headers),
             params=prepare_params(params or {}),
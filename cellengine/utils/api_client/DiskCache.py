@@ -0,0 +1,15 @@
+"""Helpers shared by the caches that store responses on disk
+(`StatisticsCache` and `PlotCache`). Their files are written with
+`cellengine.utils.atomic_write.write_atomic`."""
+
+from __future__ import annotations
+import hashlib
+import json
+from typing import Any
+
+
+def cache_key(**parts: Any) -> str:
+    """Returns a key for the JSON-serializable parts of a request, independent
+    of the order of dict keys. Safe to use as a file name."""
+    normalized = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode()).hexdigest()
@@ -0,0 +1,273 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field, replace
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+_ID_RE = re.compile(r"(?<=/)[a-f0-9]{24}(?=[/.]|$)", re.I)
+
+
+def endpoint_for_url(url: str) -> str:
+    """Returns the URL's path with resource IDs replaced by "{id}", e.g.
+    "/api/v1/experiments/{id}/fcsfiles/{id}.fcs"."""
+    return _ID_RE.sub("{id}", urlsplit(url).path)
+
+
+def _failed(event: RequestEvent) -> bool:
+    return event.error is not None or (
+        event.status_code is not None and not 200 <= event.status_code < 300
+    )
+
+
+@dataclass
+class RequestEvent:
+    """Describes one request to CellEngine. The same instance is passed to a
+    hook's `on_request_start` and `on_request_end` methods.
+
+    Attributes:
+        method: HTTP method.
+        url: The request URL (query parameters passed separately are not
+            included).
+        endpoint: The URL path with IDs replaced by "{id}".
+        endpoint_class: See [`RateLimiter`][cellengine.RateLimiter].
+        start: `time.perf_counter()` value when the request was sent.
+        duration: Seconds from sending the request to receiving the full
+            response. Set when the request ends.
+        status_code: HTTP status code, or None if no response was received.
+        bytes_sent: Size of the request body.
+        bytes_received: Size of the response body.
+        retries: Number of times the request was retried due to connection
+            errors.
+        error: The exception raised, if the request failed without a response.
+        cache_hit: True if the response was served from a client-side cache
+            (no request was sent).
+        context: Scratch space for hooks to store per-request state.
+    """
+
+    method: str
+    url: str
+    endpoint: str
+    endpoint_class: str
+    start: float = 0.0
+    duration: Optional[float] = None
+    status_code: Optional[int] = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    retries: int = 0
+    error: Optional[BaseException] = None
+    cache_hit: bool = False
+    context: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+class RequestHook:
+    """Base class for request instrumentation. Subclass and override any of
+    the methods, then register an instance with `client.add_hook(hook)`.
+
+    Hooks are called on the thread making the request, so they must be
+    thread-safe if the client is used from multiple threads. Exceptions raised
+    by hooks are reported as warnings and do not affect the request.
+    """
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        """Called after any rate limiting, just before the request is sent."""
+
+    def on_request_end(self, event: RequestEvent) -> None:
+        """Called when the response has been fully received, or the request
+        has failed."""
+
+    def on_cache_hit(self, event: RequestEvent) -> None:
+        """Called when a client-side cache answers a request without sending
+        it."""
+
+
+@dataclass
+class _EndpointStats:
+    """Running totals of one endpoint's requests."""
+
+    latencies: Deque[float]
+    count: int = 0
+    errors: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    sent: int = 0
+    duration: float = 0.0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+
+class RequestStats(RequestHook):
+    """A hook that aggregates per-endpoint latency and throughput.
+
+    Counts and totals are kept as running sums, and latency percentiles are
+    calculated from the most recent `max_samples` requests to each endpoint,
+    so memory use is bounded in long-running processes.
+
+    Args:
+        max_samples: Number of latencies kept per endpoint for percentiles.
+
+    Example:
+        ```py
+        stats = cellengine.RequestStats()
+        client.add_hook(stats)
+        # ... make requests ...
+        stats.summary()
+        ```
+    """
+
+    def __init__(self, max_samples: int = 10_000):
+        if max_samples < 1:
+            raise ValueError("max_samples must be at least 1.")
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _EndpointStats] = {}
+
+    def on_request_end(self, event: RequestEvent) -> None:
+        with self._lock:
+            stats = self._stats.get((event.method, event.endpoint))
+            if stats is None:
+                stats = _EndpointStats(deque(maxlen=self.max_samples))
+                self._stats[(event.method, event.endpoint)] = stats
+            stats.count += 1
+            stats.errors += _failed(event)
+            stats.retries += event.retries
+            stats.cache_hits += event.cache_hit
+            stats.bytes_sent += event.bytes_sent
+            stats.bytes_received += event.bytes_received
+            if not event.cache_hit and event.duration is not None:
+                stats.sent += 1
+                stats.duration += event.duration
+                stats.latencies.append(event.duration)
+
+    def on_cache_hit(self, event: RequestEvent) -> None:
+        self.on_request_end(event)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+    def summary(self) -> DataFrame:
+        """Returns a DataFrame indexed by (method, endpoint) with columns:
+
+        - count: number of requests, including cache hits
+        - errors: requests that failed or received a non-2xx status
+        - retries: total connection retries
+        - cache_hits: requests answered by a client-side cache
+        - p50_ms, p95_ms, p99_ms: latency percentiles of the most recent
+          requests that were sent (see `max_samples`)
+        - mean_ms: mean latency of all requests that were sent
+        - bytes_sent, bytes_received: totals
+        - mb_per_s: megabytes transferred per second spent in requests
+        """
+        import numpy
+        import pandas
+
+        with self._lock:
+            snapshot = {
+                k: (replace(v), numpy.array(v.latencies, dtype="f8") * 1000)
+                for k, v in self._stats.items()
+            }
+
+        rows = []
+        for (method, endpoint), (stats, latencies) in sorted(snapshot.items()):
+            p50, p95, p99 = (
+                numpy.percentile(latencies, [50, 95, 99])
+                if len(latencies)
+                else (numpy.nan,) * 3
+            )
+            transferred = stats.bytes_sent + stats.bytes_received
+            rows.append(
+                {
+                    "method": method,
+                    "endpoint": endpoint,
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "cache_hits": stats.cache_hits,
+                    "p50_ms": p50,
+                    "p95_ms": p95,
+                    "p99_ms": p99,
+                    "mean_ms": (
+                        stats.duration / stats.sent * 1000 if stats.sent else numpy.nan
+                    ),
+                    "bytes_sent": stats.bytes_sent,
+                    "bytes_received": stats.bytes_received,
+                    "mb_per_s": (
+                        transferred / stats.duration / 1e6
+                        if stats.duration > 0
+                        else numpy.nan
+                    ),
+                }
+            )
+        columns = [
+            "method",
+            "endpoint",
+            "count",
+            "errors",
+            "retries",
+            "cache_hits",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "mean_ms",
+            "bytes_sent",
+            "bytes_received",
+            "mb_per_s",
+        ]
+        return pandas.DataFrame(rows, columns=columns).set_index(["method", "endpoint"])
+
+
+class OpenTelemetryHook(RequestHook):
+    """A hook that emits an OpenTelemetry span for each request, following
+    the HTTP client semantic conventions. Requires the `opentelemetry-api`
+    package; configure an exporter with the OpenTelemetry SDK as usual.
+
+    Args:
+        tracer: The tracer to use. Defaults to
+            `opentelemetry.trace.get_tracer("cellengine")`.
+    """
+
+    def __init__(self, tracer: Any = None):
+        try:
+            from opentelemetry import trace
+        except ModuleNotFoundError:
+            raise ImportError(
+                "OpenTelemetryHook requires opentelemetry-api. "
+                "Install it with `pip install opentelemetry-api`."
+            )
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("cellengine")
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        event.context["otel_span"] = self.tracer.start_span(
+            f"{event.method} {event.endpoint}",
+            kind=self._trace.SpanKind.CLIENT,
+            attributes={
+                "http.request.method": event.method,
+                "url.full": event.url,
+                "cellengine.endpoint_class": event.endpoint_class,
+            },
+        )
+
+    def on_request_end(self, event: RequestEvent) -> None:
+        span = event.context.pop("otel_span", None)
+        if span is None:
+            return
+        if event.status_code is not None:
+            span.set_attribute("http.response.status_code", event.status_code)
+        span.set_attribute("http.request.body.size", event.bytes_sent)
+        span.set_attribute("http.response.body.size", event.bytes_received)
+        if event.retries:
+            span.set_attribute("http.request.resend_count", event.retries)
+        if event.error is not None:
+            span.record_exception(event.error)
+        if event.error is not None or (
+            event.status_code is not None and event.status_code >= 400
+        ):
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from collections import OrderedDict
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from cellengine.utils.api_client.DiskCache import cache_key
+from cellengine.utils.atomic_write import write_atomic
+
+
+class PlotCache:
+    """Caches plot images on disk, so that re-running a report only fetches
+    plots that have changed.
+
+    Images are keyed by the full, normalized set of plot parameters (file,
+    channels, population, compensation and properties such as size and
+    smoothing) and the experiment's `deepUpdated` timestamp, which changes
+    whenever anything in the experiment changes. Stale images are therefore
+    never returned. The client checks the timestamp with one lightweight
+    request per `get_plot` call, or once per `get_plots` call.
+
+    The cache directory is bounded in size: once it holds more than
+    `max_bytes`, the least recently used images are deleted. Images cached by
+    other processes are picked up when the cache is created.
+
+    Args:
+        path: Directory in which to store the images. Created if it does not
+            exist.
+        max_bytes: Maximum total size of the cached images. Defaults to 1 GiB.
+
+    Example:
+        ```py
+        client = cellengine.APIClient(
+            token=token, plot_cache=cellengine.PlotCache(".plot-cache")
+        )
+        ```
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        # Sizes of the cached images, least recently used first.
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        entries = []
+        for entry in os.scandir(path):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+        self.size = sum(self._sizes.values())
+        self._evict()
+
+    @staticmethod
+    def key(experiment_id: str, deep_updated: str, params: Dict[str, Any]) -> str:
+        """Returns the cache key for a plot request."""
+        return cache_key(
+            experimentId=experiment_id,
+            deepUpdated=deep_updated,
+            # Query parameters are sent as strings, so 200 and "200" match.
+            params={k: str(v) for k, v in params.items() if v is not None},
+        )
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns a cached image, or None."""
+        try:
+            with open(self._file(key), "rb") as f:
+                value: Optional[bytes] = f.read()
+            # The modification time records use, for eviction across processes.
+            os.utime(self._file(key))
+        except FileNotFoundError:
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                if key in self._sizes:
+                    # Deleted by another process.
+                    self.size -= self._sizes.pop(key)
+            else:
+                self.hits += 1
+                if key not in self._sizes:
+                    self._sizes[key] = len(value)
+                    self.size += len(value)
+                self._sizes.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        """Caches an image, evicting the least recently used images if the
+        cache becomes too large."""
+        write_atomic(self._file(key), value)
+        with self._lock:
+            self.size += len(value) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(value)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """Removes all cached images."""
+        with self._lock:
+            for key in self._sizes:
+                try:
+                    os.remove(self._file(key))
+                except FileNotFoundError:
+                    pass
+            self._sizes.clear()
+            self.size = 0
@@ -0,0 +1,236 @@
+from __future__ import annotations
+from contextlib import contextmanager
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+try:
+    from typing import TypedDict
+except ImportError:
+    from typing_extensions import TypedDict
+
+
+ENDPOINT_CLASSES = ("events", "statistics", "plots", "metadata")
+"""Classes of endpoints that can be limited independently."""
+
+_EVENTS_RE = re.compile(r"/(fcsfiles|attachments)(/[a-f0-9]{24})?/?$")
+
+ThrottleStats = TypedDict(
+    "ThrottleStats",
+    {"requests": int, "throttled": int, "throttled_seconds": float},
+)
+
+
+def classify_endpoint(method: str, url: str) -> str:
+    """Returns the endpoint class (one of `ENDPOINT_CLASSES`) for a request."""
+    path = url.split("?", 1)[0]
+    if path.endswith("/bulkstatistics"):
+        return "statistics"
+    if path.endswith("/plot"):
+        return "plots"
+    if path.endswith(".fcs"):
+        return "events"
+    match = _EVENTS_RE.search(path)
+    if match:
+        # File uploads and attachment downloads move event data; listing and
+        # updating files' metadata does not.
+        if method == "POST" and not match.group(2):
+            return "events"
+        if method == "GET" and match.group(1) == "attachments" and match.group(2):
+            return "events"
+    return "metadata"
+
+
+class TokenBucket:
+    """A thread-safe token bucket.
+
+    Args:
+        rate: Tokens (requests) added per second.
+        burst: Maximum number of tokens that can accumulate. Defaults to
+            `rate`, allowing one second's worth of requests to burst.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0.")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1.0))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes one token, sleeping until one is available. Returns the number
+        of seconds spent waiting."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            # Reserve the token now and sleep outside of the lock, so that
+            # waiting callers are served in order.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class _Limit:
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.semaphore = (
+            threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        )
+
+    @property
+    def active(self) -> bool:
+        return self.bucket is not None or self.semaphore is not None
+
+
+class RateLimiter:
+    """Client-side request rate limiter and concurrency governor.
+
+    Limits may be set globally (applying to all requests) and per endpoint
+    class (see `ENDPOINT_CLASSES`): "events" (FCS file and attachment
+    downloads and uploads), "statistics", "plots" and "metadata" (everything
+    else). A request must satisfy both the global and its class's limits.
+
+    A single `RateLimiter` is safe to share between threads and between
+    `APIClient` instances.
+
+    By default no limits are set. Limits can also be set with environment
+    variables: `CELLENGINE_RATE_LIMIT` (requests per second),
+    `CELLENGINE_RATE_BURST` and `CELLENGINE_MAX_IN_FLIGHT` for the global
+    limits, and the same names suffixed with the upper-case endpoint class
+    (e.g. `CELLENGINE_MAX_IN_FLIGHT_EVENTS`) for per-class limits.
+
+    Args:
+        rate: Maximum sustained requests per second.
+        burst: Maximum number of requests that may be sent at once after a
+            quiet period. Defaults to `rate`.
+        max_in_flight: Maximum number of concurrent requests.
+
+    Examples:
+        ```py
+        limiter = RateLimiter(rate=20, max_in_flight=16)
+        limiter.configure("events", max_in_flight=4)
+        client = cellengine.APIClient(token=token, rate_limiter=limiter)
+        ```
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        self._global = _Limit(rate, burst, max_in_flight)
+        self._classes: Dict[str, _Limit] = {}
+        self._stats: Dict[str, ThrottleStats] = {}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> RateLimiter:
+        """Creates a RateLimiter configured from environment variables."""
+
+        def read(name: str, suffix: str = ""):
+            value = os.environ.get(f"CELLENGINE_{name}{suffix}")
+            return float(value) if value else None
+
+        def read_int(name: str, suffix: str = ""):
+            value = read(name, suffix)
+            return int(value) if value else None
+
+        limiter = cls(read("RATE_LIMIT"), read("RATE_BURST"), read_int("MAX_IN_FLIGHT"))
+        for endpoint_class in ENDPOINT_CLASSES:
+            suffix = f"_{endpoint_class.upper()}"
+            rate = read("RATE_LIMIT", suffix)
+            burst = read("RATE_BURST", suffix)
+            max_in_flight = read_int("MAX_IN_FLIGHT", suffix)
+            if rate or max_in_flight:
+                limiter.configure(endpoint_class, rate, burst, max_in_flight)
+        return limiter
+
+    def configure(
+        self,
+        endpoint_class: Optional[str] = None,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        """Sets (replaces) the limits for an endpoint class, or the global
+        limits if `endpoint_class` is None. Passing no limits removes them.
+
+        Changing limits while requests are in flight is safe; in-flight
+        requests are counted against the limits they started under.
+        """
+        limit = _Limit(rate, burst, max_in_flight)
+        if endpoint_class is None:
+            self._global = limit
+        elif endpoint_class in ENDPOINT_CLASSES:
+            self._classes[endpoint_class] = limit
+        else:
+            raise ValueError(
+                f"endpoint_class must be one of {', '.join(ENDPOINT_CLASSES)}."
+            )
+
+    @contextmanager
+    def limit(self, endpoint_class: str) -> Iterator[None]:
+        """Blocks until a request of the given class may be sent, and holds its
+        in-flight slots until the context exits."""
+        limits = [self._global, self._classes.get(endpoint_class)]
+        limits = [limit for limit in limits if limit is not None and limit.active]
+        if not limits:
+            self._record(endpoint_class, 0.0)
+            yield
+            return
+
+        waited = 0.0
+        acquired = []
+        try:
+            for limit in limits:
+                if limit.semaphore is not None:
+                    if not limit.semaphore.acquire(blocking=False):
+                        start = time.monotonic()
+                        limit.semaphore.acquire()
+                        waited += time.monotonic() - start
+                    acquired.append(limit.semaphore)
+            for limit in limits:
+                if limit.bucket is not None:
+                    waited += limit.bucket.acquire()
+            self._record(endpoint_class, waited)
+            yield
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+    def _record(self, endpoint_class: str, waited: float) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                endpoint_class,
+                {"requests": 0, "throttled": 0, "throttled_seconds": 0.0},
+            )
+            stats["requests"] += 1
+            if waited > 0:
+                stats["throttled"] += 1
+                stats["throttled_seconds"] += waited
+
+    @property
+    def stats(self) -> Dict[str, ThrottleStats]:
+        """Per endpoint class: the number of requests, the number of requests
+        that were delayed, and the total time spent waiting, in seconds."""
+        with self._stats_lock:
+            return {k: dict(v) for k, v in self._stats.items()}  # type: ignore
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats = {}
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from collections import OrderedDict
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from cellengine.utils.api_client.DiskCache import cache_key
+from cellengine.utils.atomic_write import write_atomic
+
+
+class StatisticsCache:
+    """Caches bulk statistics responses, so that repeating a `get_statistics`
+    call returns without the server recalculating the statistics.
+
+    Entries are keyed by the normalized request body and the experiment's
+    `deepUpdated` timestamp, which changes whenever anything in the experiment
+    (gates, compensations, FCS files, annotations...) changes. Stale entries
+    are therefore never returned, and the client checks the timestamp with one
+    lightweight request before each `get_statistics` call.
+
+    Raw responses are cached, so each call parses its own copy of the result.
+
+    Args:
+        max_entries: Maximum number of responses kept in memory. The least
+            recently used responses are evicted first.
+        path: Optionally, a directory in which to also store responses, so that
+            they survive across processes. Created if it does not exist.
+
+    Example:
+        ```py
+        client = cellengine.APIClient(
+            token=token,
+            statistics_cache=cellengine.StatisticsCache(path=".stats-cache"),
+        )
+        ```
+    """
+
+    def __init__(self, max_entries: int = 128, path: Optional[str] = None):
+        if max_entries < 0:
+            raise ValueError("max_entries must not be negative.")
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(experiment_id: str, deep_updated: str, body: Dict[str, Any]) -> str:
+        """Returns the cache key for a request."""
+        return cache_key(
+            experimentId=experiment_id, deepUpdated=deep_updated, body=body
+        )
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.bin")  # type: ignore
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns a cached response, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        if value is None and self.path and os.path.exists(self._file(key)):
+            with open(self._file(key), "rb") as f:
+                value = f.read()
+            self._remember(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        """Caches a response."""
+        self._remember(key, value)
+        if self.path:
+            write_atomic(self._file(key), value)
+
+    def _remember(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries, including those on disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            for name in os.listdir(self.path):
+                if name.endswith(".bin"):
+                    os.remove(os.path.join(self.path, name))
@@ -0,0 +1,22 @@
+from __future__ import annotations
+import os
+import threading
+from typing import Union
+
+
+def write_atomic(path: str, value: Union[bytes, str]) -> None:
+    """Writes a file via a temporary file, so that other threads and processes
+    never read a partly-written file, and the file is left intact if the
+    process is killed. The temporary file is removed if the write fails."""
+    data = value.encode() if isinstance(value, str) else value
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
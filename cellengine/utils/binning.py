@@ -0,0 +1,140 @@
+"""Local binning of events into histograms and 2-D densities.
+
+These compute the counts behind CellEngine's histogram and density plots from
+events that are already held locally, returning NumPy arrays that any plotting
+library can draw. Values are scaled with the channel's scale (as in a
+`ScaleSet`), clipped to the scale's range and binned evenly in scaled space,
+so the bins line up with the axes of CellEngine's plots:
+
+```python
+counts, edges = histogram(events["FSC-A"], bins=256, scale=scales["FSC-A"])
+plt.stairs(counts, edges)
+```
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+    from cellengine.resources.scaleset import ScaleDict
+
+Bins = Union[int, Tuple[int, int]]
+
+
+def _scaled(
+    values, scale: Optional[ScaleDict], limits: Optional[Tuple[float, float]]
+) -> Tuple[ndarray, float, float]:
+    """Scales and clips values, returning them with the scaled range."""
+    import numpy as np
+
+    from cellengine.resources.scaleset import apply_scale
+
+    values = np.asarray(values)
+    if scale is not None:
+        lo, hi = apply_scale(np.array([scale["minimum"], scale["maximum"]]), scale)
+        values = apply_scale(values, scale, clamp_q=True)
+    elif limits is not None:
+        lo, hi = limits
+    else:
+        finite = values[np.isfinite(values)]
+        lo, hi = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+    return values, float(lo), float(hi)
+
+
+def _bin_indices(values: ndarray, bins: int, lo: float, hi: float) -> ndarray:
+    """The bin of each value, for `bins` even bins between lo and hi. Values
+    outside the range fall in the first or last bin; NaNs in neither (-1)."""
+    import numpy as np
+
+    if hi <= lo:
+        hi = lo + 1
+    idx = np.floor((values - lo) * (bins / (hi - lo)))
+    np.clip(idx, 0, bins - 1, out=idx)
+    idx[~np.isfinite(values)] = -1
+    return idx.astype(np.intp)
+
+
+def _select(values, mask: Optional[Union[ndarray, Sequence[int]]]):
+    import numpy as np
+
+    values = np.asarray(values)
+    return values if mask is None else values[np.asarray(mask)]
+
+
+def histogram(
+    values: Union[ndarray, Sequence[float]],
+    bins: int = 256,
+    scale: Optional[ScaleDict] = None,
+    mask: Optional[Union[ndarray, Sequence[int]]] = None,
+    range: Optional[Tuple[float, float]] = None,
+) -> Tuple[ndarray, ndarray]:
+    """Counts events in even bins of a channel's scaled values.
+
+    Args:
+        values: A channel's (unscaled) values, e.g. `events["FSC-A"]`.
+        bins: Number of bins.
+        scale: The channel's scale (`ScaleSet.scale_for_channel`). Values are
+            clipped to its minimum and maximum and scaled. If omitted, values
+            are binned linearly over `range`.
+        mask: Optionally, a boolean mask or array of indices selecting the
+            events to count, e.g. a population's events.
+        range: Without a scale, the (min, max) of the bins. Defaults to the
+            range of the values. Values outside it are counted in the first or
+            last bin.
+
+    Returns:
+        The counts (int64, of length `bins`) and the `bins + 1` bin edges, in
+        scaled units, like `numpy.histogram`.
+    """
+    import numpy as np
+
+    scaled, lo, hi = _scaled(_select(values, mask), scale, range)
+    idx = _bin_indices(scaled, bins, lo, hi)
+    counts = np.bincount(idx[idx >= 0], minlength=bins)
+    return counts, np.linspace(lo, hi, bins + 1)
+
+
+def density2d(
+    x: Union[ndarray, Sequence[float]],
+    y: Union[ndarray, Sequence[float]],
+    bins: Bins = 256,
+    x_scale: Optional[ScaleDict] = None,
+    y_scale: Optional[ScaleDict] = None,
+    mask: Optional[Union[ndarray, Sequence[int]]] = None,
+    x_range: Optional[Tuple[float, float]] = None,
+    y_range: Optional[Tuple[float, float]] = None,
+) -> Tuple[ndarray, ndarray, ndarray]:
+    """Counts events in an even 2-D grid of two channels' scaled values.
+
+    Args:
+        x: The x channel's (unscaled) values.
+        y: The y channel's (unscaled) values.
+        bins: Number of bins on each axis, or (x bins, y bins).
+        x_scale: The x channel's scale. See `histogram`.
+        y_scale: The y channel's scale.
+        mask: Optionally, a boolean mask or array of indices selecting the
+            events to count.
+        x_range: Without `x_scale`, the (min, max) of the x bins.
+        y_range: Without `y_scale`, the (min, max) of the y bins.
+
+    Returns:
+        The counts, of shape (x bins, y bins), and the x and y bin edges, like
+        `numpy.histogram2d`. Events with a NaN value are not counted.
+    """
+    import numpy as np
+
+    nx, ny = (bins, bins) if isinstance(bins, int) else bins
+    x_scaled, x_lo, x_hi = _scaled(_select(x, mask), x_scale, x_range)
+    y_scaled, y_lo, y_hi = _scaled(_select(y, mask), y_scale, y_range)
+    ix = _bin_indices(x_scaled, nx, x_lo, x_hi)
+    iy = _bin_indices(y_scaled, ny, y_lo, y_hi)
+    valid = (ix >= 0) & (iy >= 0)
+    # One bincount over the flattened grid instead of a 2-D histogram.
+    counts = np.bincount(ix[valid] * ny + iy[valid], minlength=nx * ny)
+    return (
+        counts.reshape(nx, ny),
+        np.linspace(x_lo, x_hi, nx + 1),
+        np.linspace(y_lo, y_hi, ny + 1),
+    )
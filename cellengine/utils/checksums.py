@@ -0,0 +1,85 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+from typing import BinaryIO, Callable, Optional, Union
+
+CHUNK_SIZE = 1 << 20
+
+
+def _crc32c_function() -> Optional[Callable[[bytes, int], int]]:
+    """Returns a function `(data, crc) -> crc` that extends a CRC32C checksum,
+    if a compiled implementation is installed. A pure-Python implementation
+    would be far slower than the upload it's meant to avoid."""
+    try:
+        import crc32c
+
+        return lambda data, crc: crc32c.crc32c(data, crc)
+    except ImportError:
+        pass
+    try:
+        import google_crc32c
+
+        return lambda data, crc: google_crc32c.extend(crc, data)
+    except ImportError:
+        return None
+
+
+@dataclass(frozen=True)
+class FileChecksums:
+    """Checksums in the format that CellEngine reports them for FCS files and
+    attachments (lower-case hex).
+
+    Attributes:
+        size: File size in bytes.
+        md5: MD5 digest.
+        crc32c: CRC32C checksum, or None if neither the `crc32c` nor the
+            `google-crc32c` package is installed.
+    """
+
+    size: int
+    md5: str
+    crc32c: Optional[str] = None
+
+    def matches(self, properties: dict) -> bool:
+        """True if a CellEngine FCS file's or attachment's properties have the
+        same content as the file these checksums describe."""
+        if properties.get("size") != self.size or properties.get("md5") != self.md5:
+            return False
+        remote_crc = properties.get("crc32c")
+        return self.crc32c is None or remote_crc is None or remote_crc == self.crc32c
+
+
+def file_checksums(
+    file: Union[str, BinaryIO], chunk_size: int = CHUNK_SIZE
+) -> FileChecksums:
+    """Computes a file's size, MD5 and CRC32C in one streaming pass, so memory
+    use is bounded by `chunk_size`.
+
+    Args:
+        file: A path, or a binary file object. A file object is read from its
+            current position, which is restored afterwards.
+        chunk_size: Number of bytes to read at a time.
+    """
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return file_checksums(f, chunk_size)
+
+    crc32c = _crc32c_function()
+    md5 = hashlib.md5()
+    crc = 0
+    size = 0
+    start = file.tell()
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            md5.update(chunk)
+            if crc32c is not None:
+                crc = crc32c(chunk, crc)
+            size += len(chunk)
+    finally:
+        file.seek(start)
+    return FileChecksums(
+        size, md5.hexdigest(), f"{crc:08x}" if crc32c is not None else None
+    )
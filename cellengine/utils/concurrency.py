@@ -0,0 +1,77 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import contextvars
+from typing import Callable, Deque, Iterable, Iterator, List, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def iter_concurrent(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 4,
+    ordered: bool = True,
+) -> Iterator[Tuple[int, Union[R, Exception]]]:
+    """Calls `fn` on each item using a pool of threads, yielding
+    `(index, result)` pairs. If a call raises, the exception is yielded in
+    place of its result so that one failure doesn't abort the others.
+
+    At most `2 * max_workers` items are taken from `items` and held at once,
+    so `items` may be a lazy iterable of large objects.
+
+    Each call runs in a copy of the caller's context, so the current
+    `APIClient` (see `APIClient.use()`) applies inside `fn`.
+
+    Args:
+        fn: The function to call.
+        items: The items to call `fn` on.
+        max_workers: Maximum number of concurrent calls.
+        ordered: If True, results are yielded in the order of `items`;
+            otherwise, as they complete.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+
+    def call(item: T) -> Union[R, Exception]:
+        try:
+            return fn(item)
+        except Exception as error:
+            return error
+
+    items_iter = iter(enumerate(items))
+    pending: Deque[Tuple[int, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit() -> bool:
+            for index, item in items_iter:
+                context = contextvars.copy_context()
+                pending.append((index, executor.submit(context.run, call, item)))
+                return True
+            return False
+
+        try:
+            while len(pending) < 2 * max_workers and submit():
+                pass
+            while pending:
+                if ordered:
+                    index, future = pending.popleft()
+                else:
+                    done, _ = wait([f for _, f in pending], return_when=FIRST_COMPLETED)
+                    index, future = next(p for p in pending if p[1] in done)
+                    pending.remove((index, future))
+                yield index, future.result()
+                submit()
+        finally:
+            # Don't start queued work if the consumer stops early.
+            for _, future in pending:
+                future.cancel()
+
+
+def map_concurrent(
+    fn: Callable[[T], R], items: Iterable[T], max_workers: int = 4
+) -> List[Union[R, Exception]]:
+    """Like `iter_concurrent`, but returns a list of results in the order of
+    `items`."""
+    return [result for _, result in iter_concurrent(fn, items, max_workers)]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from pandas import DataFrame
+
+CHUNK_ROWS = 1 << 16
+"""Default number of events per chunk."""
+
+
+def import_zarr():
+    try:
+        import zarr
+
+        return zarr
+    except ModuleNotFoundError:
+        raise ImportError(
+            "Try installing zarr with `pip install 'zarr<3'` or "
+            "`pip install cellengine[zarr]`."
+        )
+
+
+def _array_name(query: Dict[str, Any]) -> str:
+    """Name of the array holding the events of one `get_events` query."""
+    if not query:
+        return "events"
+    digest = hashlib.sha1(json.dumps(query, sort_keys=True).encode()).hexdigest()
+    return f"events-{digest[:16]}"
+
+
+class LazyEvents:
+    """A file's events in an `EventStore`, read from disk only as they are
+    sliced.
+
+    Indexing by rows returns a DataFrame like `FcsFile.get_events()` does, with
+    a two-level column index of channel and reagent names, holding only the
+    requested rows:
+
+    ```python
+    events = fcs_file.get_events_lazy("events.zarr")
+    events[:1000]  # DataFrame of the first 1000 events
+    events[np.array([5, 10, 20])]  # DataFrame of three events
+    events.to_numpy(slice(0, 1000), ["FSC-A", "SSC-A"])
+    ```
+
+    Attributes:
+        array: The underlying `zarr.Array` of shape (events, channels).
+        channels: Channel names (`$PnN`).
+        reagents: Reagent names (`$PnS`), "" if not set.
+    """
+
+    def __init__(self, array):
+        self.array = array
+        self.channels: List[str] = array.attrs["channels"]
+        self.reagents: List[str] = array.attrs["reagents"]
+
+    def __repr__(self):
+        return f"LazyEvents(events={len(self)}, channels={len(self.channels)})"
+
+    def __len__(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    @property
+    def empty(self) -> bool:
+        return 0 in self.array.shape
+
+    def to_numpy(
+        self,
+        rows: Union[slice, Sequence[int], ndarray] = slice(None),
+        channels: Optional[List[str]] = None,
+    ) -> ndarray:
+        """Reads some rows, and optionally some channels, as a float32 array.
+        Only the chunks holding those rows are read and decompressed."""
+        import numpy as np
+
+        if isinstance(rows, slice):
+            values = self.array[rows]
+        else:
+            values = self.array.get_orthogonal_selection(
+                (np.asarray(rows), slice(None))
+            )
+        if channels is not None:
+            values = values[:, [self.channels.index(c) for c in channels]]
+        return values
+
+    def __getitem__(self, rows: Union[slice, Sequence[int], ndarray]) -> DataFrame:
+        from pandas import DataFrame
+
+        return DataFrame(
+            self.to_numpy(rows), columns=[self.channels, self.reagents], copy=False
+        )
+
+    def to_dataframe(self) -> DataFrame:
+        """Reads all events."""
+        return self[:]
+
+
+class EventStore:
+    """A Zarr store of FCS file events, for random access to slices of events
+    without loading whole files. Requires zarr (`pip install cellengine[zarr]`).
+
+    Each FCS file has a group, named by its ID, holding one float32 array of
+    shape (events, channels) per `get_events` query. Arrays are stored in
+    compressed chunks of `chunk_rows` events; channel and reagent names and the
+    query are stored as attributes.
+
+    Args:
+        path: A directory (created if needed) or any zarr store.
+        chunk_rows: Number of events per chunk.
+        compressor: A numcodecs compressor. Defaults to Blosc with zstd and
+            byte shuffling.
+    """
+
+    def __init__(self, path: Any, chunk_rows: int = CHUNK_ROWS, compressor=None):
+        zarr = import_zarr()
+        if compressor is None:
+            from numcodecs import Blosc
+
+            compressor = Blosc(cname="zstd", clevel=3, shuffle=Blosc.SHUFFLE)
+        self.root = zarr.open_group(path, mode="a")
+        self.chunk_rows = chunk_rows
+        self.compressor = compressor
+
+    def get(self, fcs_file_id: str, query: Dict[str, Any] = {}) -> Optional[LazyEvents]:
+        """Returns the stored events of an FCS file and query, or None."""
+        group = self.root.get(fcs_file_id)
+        array = group.get(_array_name(query)) if group is not None else None
+        # Arrays are marked complete only once all their chunks are written.
+        if array is None or not array.attrs.get("complete"):
+            return None
+        return LazyEvents(array)
+
+    def put(
+        self,
+        fcs_file_id: str,
+        events: ndarray,
+        channels: List[str],
+        reagents: List[str],
+        query: Dict[str, Any] = {},
+        attrs: Dict[str, Any] = {},
+    ) -> LazyEvents:
+        """Stores an (events x channels) array of an FCS file's events."""
+        group = self.root.require_group(fcs_file_id)
+        group.attrs.update(attrs)
+        array = group.create_dataset(
+            _array_name(query),
+            shape=events.shape,
+            chunks=(self.chunk_rows, events.shape[1]),
+            dtype="<f4",
+            compressor=self.compressor,
+            overwrite=True,
+        )
+        array[:] = events
+        array.attrs.update(
+            {
+                "channels": list(channels),
+                "reagents": [r or "" for r in reagents],
+                "query": query,
+                "complete": True,
+            }
+        )
+        return LazyEvents(array)
+
+    def delete(self, fcs_file_id: str) -> None:
+        """Removes all of an FCS file's events from the store."""
+        if fcs_file_id in self.root:
+            del self.root[fcs_file_id]
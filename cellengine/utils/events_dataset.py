@@ -0,0 +1,161 @@
+from __future__ import annotations
+import json
+import os
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from cellengine.utils.atomic_write import write_atomic
+from cellengine.utils.concurrency import iter_concurrent
+from cellengine.utils.parse_fcs_file import default_row_group_size, import_pyarrow
+
+if TYPE_CHECKING:
+    from pyarrow import Table
+    from cellengine.resources.fcs_file import FcsFile
+    from cellengine.resources.population import Population
+
+MANIFEST_NAME = "_cellengine_export.json"
+"""Name of the file recording an export's progress. Files starting with "_"
+are ignored when pyarrow discovers a dataset's files."""
+
+_FIXED_COLUMNS = ["fcsFileId", "filename", "populationId"]
+
+
+class _ExportManifest:
+    """Records the options of an export and which (FCS file, population) parts
+    have been written, so that an interrupted export can be resumed."""
+
+    def __init__(self, path: str, options: Dict[str, Any]):
+        self.path = path
+        self.options = options
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("options") != options:
+                raise ValueError(
+                    f"The dataset at {os.path.dirname(path)} was exported with "
+                    "different options. Use a new path or the same options."
+                )
+            self.done = set(data.get("done", []))
+
+    def record(self, key: str) -> None:
+        self.done.add(key)
+        data = {"options": self.options, "done": sorted(self.done)}
+        write_atomic(self.path, json.dumps(data))
+
+
+def _part_key(fcs_file_id: str, population_id: Optional[str]) -> str:
+    return f"{fcs_file_id}-{population_id or 'ungated'}"
+
+
+def export_events_dataset(
+    experiment_id: str,
+    fcs_files: Sequence[FcsFile],
+    path: str,
+    populations: Optional[Sequence[Union[Population, str, None]]] = None,
+    channels: Optional[List[str]] = None,
+    partition_by: Sequence[str] = ("fcsFileId",),
+    max_workers: int = 4,
+    **kwargs,
+) -> Dict[Tuple[str, Optional[str]], Exception]:
+    """Writes the events of several FCS files to a Hive-partitioned Parquet
+    dataset. See `Experiment.export_events_dataset`."""
+    pa = import_pyarrow()
+    from pyarrow import dataset
+
+    population_ids = (
+        [None]
+        if populations is None
+        else [p if p is None or isinstance(p, str) else p._id for p in populations]
+    )
+    annotation_names: List[str] = []
+    for fcs_file in fcs_files:
+        for annotation in fcs_file.annotations:
+            if annotation["name"] not in annotation_names:
+                annotation_names.append(annotation["name"])
+    fixed = _FIXED_COLUMNS if populations is not None else _FIXED_COLUMNS[:2]
+    string_columns = fixed + annotation_names
+    collisions = set(fixed) & set(annotation_names) or (
+        set(string_columns) & set(channels or [])
+    )
+    if collisions:
+        raise ValueError(
+            f"Column names {sorted(collisions)} are used more than once. Rename "
+            "the annotations or channels."
+        )
+    unknown = [c for c in partition_by if c not in string_columns]
+    if unknown:
+        raise ValueError(f"Cannot partition by {unknown}: not one of {string_columns}.")
+
+    os.makedirs(path, exist_ok=True)
+    options = {
+        "experimentId": experiment_id,
+        "populations": population_ids,
+        "channels": channels,
+        "partitionBy": list(partition_by),
+        "query": kwargs,
+    }
+    manifest = _ExportManifest(os.path.join(path, MANIFEST_NAME), options)
+    parts = [
+        (fcs_file, population_id)
+        for fcs_file in fcs_files
+        for population_id in population_ids
+        if _part_key(fcs_file._id, population_id) not in manifest.done
+    ]
+    partitioning = dataset.partitioning(
+        pa.schema([(c, pa.string()) for c in partition_by]), flavor="hive"
+    )
+
+    def read_part(part: Tuple[FcsFile, Optional[str]]) -> Table:
+        fcs_file, population_id = part
+        query = dict(kwargs, populationId=population_id) if population_id else kwargs
+        table = fcs_file.get_events(format="arrow", **query)
+        if channels is not None:
+            missing = [c for c in channels if c not in table.column_names]
+            if missing:
+                raise ValueError(f"FCS file {fcs_file._id} has no channels {missing}.")
+            table = table.select(channels)
+        annotations = {a["name"]: a["value"] for a in fcs_file.annotations}
+        values = {
+            "fcsFileId": fcs_file._id,
+            "filename": fcs_file.filename,
+            "populationId": population_id,
+            **annotations,
+        }
+        for column in string_columns:
+            value = values.get(column)
+            scalar = pa.scalar(None if value is None else str(value), pa.string())
+            table = table.append_column(column, pa.repeat(scalar, table.num_rows))
+        return table
+
+    failures: Dict[Tuple[str, Optional[str]], Exception] = {}
+    for index, result in iter_concurrent(
+        read_part, parts, max_workers=max_workers, ordered=False
+    ):
+        fcs_file, population_id = parts[index]
+        key = _part_key(fcs_file._id, population_id)
+        if isinstance(result, Exception):
+            failures[(fcs_file._id, population_id)] = result
+            continue
+        # Deterministic file names let a resumed export overwrite a part that
+        # was interrupted while being written.
+        dataset.write_dataset(
+            result,
+            path,
+            format="parquet",
+            partitioning=partitioning,
+            basename_template=f"{key}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=default_row_group_size(result.num_columns),
+        )
+        manifest.record(key)
+    return failures
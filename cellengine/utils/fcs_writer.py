@@ -0,0 +1,306 @@
+from __future__ import annotations
+import io
+import re
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from pandas import DataFrame
+    from pyarrow import Table
+
+CHUNK_BYTES = 4 << 20
+"""Approximate size of each block of the DATA segment."""
+
+_TEXT_START = 58  # The HEADER segment is 58 bytes.
+_DELIMITER = "/"
+_HEADER_OFFSET_LIMIT = 99_999_999
+
+_REQUIRED_KEYWORDS = {
+    "BEGINANALYSIS",
+    "BEGINDATA",
+    "BEGINSTEXT",
+    "BYTEORD",
+    "DATATYPE",
+    "ENDANALYSIS",
+    "ENDDATA",
+    "ENDSTEXT",
+    "MODE",
+    "NEXTDATA",
+    "PAR",
+    "TOT",
+}
+_OPTIONAL_KEYWORDS = {
+    "ABRT",
+    "BTIM",
+    "CELLS",
+    "COM",
+    "CSMODE",
+    "CSVBITS",
+    "CYT",
+    "CYTSN",
+    "DATE",
+    "ETIM",
+    "EXP",
+    "FIL",
+    "GATE",
+    "INST",
+    "LAST_MODIFIED",
+    "LAST_MODIFIER",
+    "LOST",
+    "OP",
+    "ORIGINALITY",
+    "PLATEID",
+    "PLATENAME",
+    "PROJ",
+    "SMNO",
+    "SPILLOVER",
+    "SRC",
+    "SYS",
+    "TIMESTEP",
+    "TR",
+    "VOL",
+    "WELLID",
+}
+# Parameter keywords that the writer sets itself ($PnB, $PnE, $PnN, $PnS) or
+# that take a default ($PnG, $PnR).
+_WRITER_PARAMETER_RE = re.compile(r"^P(\d+)([BEGRNS])$")
+_OPTIONAL_PARAMETER_RE = re.compile(r"^P\d+([DFLOPTV]|CALIBRATION)$")
+
+
+def _normalize_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Upper-cases keywords and adds the "$" prefix to standard keywords, so
+    that e.g. "P3D", "p3d" and "$P3D" are equivalent."""
+    normalized = {}
+    for key, value in headers.items():
+        key = key.lstrip("$").upper()
+        if key in _OPTIONAL_KEYWORDS or key in _REQUIRED_KEYWORDS:
+            key = f"${key}"
+        elif _WRITER_PARAMETER_RE.match(key) or _OPTIONAL_PARAMETER_RE.match(key):
+            key = f"${key}"
+        normalized[key] = str(value)
+    return normalized
+
+
+class FcsWriter:
+    """Writes a DataFrame as an FCS 3.1 file of float32, list-mode data.
+
+    The file is produced incrementally: first the HEADER and TEXT segments,
+    then the DATA segment in blocks of rows, each converted to a C-contiguous
+    little-endian float32 array and emitted with `ndarray.tobytes()`. Extra
+    memory use is proportional to the block size, not to the DataFrame.
+
+    Channel names (`$PnN`) are read from the DataFrame's column names, or the
+    first level of a two-level column index. Reagent names (`$PnS`) are read
+    from the second level, if present, or from `reagents`.
+
+    A `pyarrow.Table` may be given instead of a DataFrame, e.g. one read from
+    Parquet files written by `FcsFile.to_parquet`. Channel names are then read
+    from the field names and reagent names from the fields' `"$PnS"` metadata.
+
+    Args:
+        df: The events, one row per event and one column per channel.
+        reagents: Reagent names, one per channel. None for no reagent.
+        headers: Additional TEXT keywords. The leading "$" of standard
+            keywords is optional. Values set by the writer (e.g. `$TOT`,
+            `$PnB`, `$PnN`) cannot be overridden; `$PnR` defaults to 262144
+            and `$PnG` to 1.0.
+        chunk_bytes: Approximate size of each block of the DATA segment.
+    """
+
+    def __init__(
+        self,
+        df: Union[DataFrame, Table],
+        reagents: Optional[Sequence[Union[str, None]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        chunk_bytes: int = CHUNK_BYTES,
+    ):
+        self._is_table = hasattr(df, "schema")
+        if self._is_table:
+            channels = [str(f.name) for f in df.schema]
+            if reagents is None:
+                reagents = [
+                    (f.metadata or {}).get(b"$PnS", b"").decode() or None
+                    for f in df.schema
+                ]
+        elif df.columns.nlevels > 1:
+            channels = [str(c) for c in df.columns.get_level_values(0)]
+            if reagents is None:
+                # An Index will cast None to float (nan).
+                reagents = [
+                    r if r == r else None for r in df.columns.get_level_values(1)
+                ]
+        else:
+            channels = [str(c) for c in df.columns]
+        if not channels:
+            raise ValueError("The DataFrame must have at least one column.")
+        if reagents is not None and len(reagents) != len(channels):
+            raise ValueError("reagents must have one value per channel.")
+
+        self.df = df
+        self.channels: List[str] = channels
+        self.reagents = list(reagents) if reagents is not None else None
+        self.headers = _normalize_headers(headers or {})
+        self.chunk_rows = max(1, chunk_bytes // (4 * max(1, len(channels))))
+        self.data_size = 4 * len(df) * len(channels)
+        self._text = self._build_text()
+
+    def _keywords(self, begin_data: int, end_data: int) -> Dict[str, str]:
+        keywords = {
+            "$BEGINANALYSIS": "0",
+            "$BEGINDATA": str(begin_data),
+            "$BEGINSTEXT": "0",
+            "$BYTEORD": "1,2,3,4",
+            "$DATATYPE": "F",
+            "$ENDANALYSIS": "0",
+            "$ENDDATA": str(end_data),
+            "$ENDSTEXT": "0",
+            "$MODE": "L",
+            "$NEXTDATA": "0",
+            "$PAR": str(len(self.channels)),
+            "$TOT": str(len(self.df)),
+        }
+        for i, channel in enumerate(self.channels, start=1):
+            keywords[f"$P{i}B"] = "32"
+            keywords[f"$P{i}E"] = "0,0"
+            keywords[f"$P{i}G"] = self.headers.get(f"$P{i}G", "1.0")
+            keywords[f"$P{i}R"] = self.headers.get(f"$P{i}R", "262144")
+            keywords[f"$P{i}N"] = channel
+            if self.reagents is not None and self.reagents[i - 1]:
+                keywords[f"$P{i}S"] = str(self.reagents[i - 1])
+        for key, value in self.headers.items():
+            keyword = key[1:] if key.startswith("$") else None
+            if keyword in _REQUIRED_KEYWORDS or (
+                keyword and _WRITER_PARAMETER_RE.match(keyword)
+            ):
+                continue
+            if value:  # Keyword values may not be empty.
+                keywords[key] = value
+        return keywords
+
+    def _build_text(self) -> bytes:
+        # $BEGINDATA and $ENDDATA are in the TEXT segment, so its length
+        # depends on the number of digits in the offsets. Iterate until the
+        # offsets are consistent (at most a couple of rounds).
+        begin_data = _TEXT_START
+        while True:
+            end_data = begin_data + self.data_size - 1
+            escaped = (
+                f"{k.replace(_DELIMITER, _DELIMITER * 2)}{_DELIMITER}"
+                f"{v.replace(_DELIMITER, _DELIMITER * 2)}{_DELIMITER}"
+                for k, v in self._keywords(begin_data, end_data).items()
+            )
+            text = (_DELIMITER + "".join(escaped)).encode("utf-8")
+            if _TEXT_START + len(text) == begin_data:
+                return text
+            begin_data = _TEXT_START + len(text)
+
+    @property
+    def size(self) -> int:
+        """Total size of the file in bytes."""
+        return _TEXT_START + len(self._text) + self.data_size
+
+    def _header(self) -> bytes:
+        begin_data = _TEXT_START + len(self._text)
+        end_data = begin_data + self.data_size - 1
+        if end_data > _HEADER_OFFSET_LIMIT:
+            # Offsets that don't fit are given only in the TEXT segment.
+            begin_data = end_data = 0
+        offsets = [_TEXT_START, _TEXT_START + len(self._text) - 1]
+        offsets += [begin_data, end_data, 0, 0]
+        return ("FCS3.1    " + "".join(f"{o:>8}" for o in offsets)).encode("ascii")
+
+    def chunks(self) -> Iterator[bytes]:
+        """Yields the file's bytes: the HEADER and TEXT segments, then blocks
+        of the DATA segment."""
+        yield self._header() + self._text
+        for start in range(0, len(self.df), self.chunk_rows):
+            if self._is_table:
+                yield self._table_block(start).tobytes()
+            else:
+                block = self.df.iloc[start : start + self.chunk_rows]  # noqa: E203
+                yield block.to_numpy(dtype="<f4").tobytes(order="C")
+
+    def _table_block(self, start: int) -> ndarray:
+        import numpy as np
+
+        block = self.df.slice(start, self.chunk_rows)
+        values = np.empty((block.num_rows, block.num_columns), dtype="<f4")
+        for i, column in enumerate(block.columns):
+            values[:, i] = column.to_numpy()
+        return values
+
+    def reader(self) -> _ChunkReader:
+        """Returns a read-only file object that generates the file as it is
+        read, e.g. for streaming it into an upload."""
+        return _ChunkReader(self.chunks(), self.size)
+
+
+class _ChunkReader(io.RawIOBase):
+    """A file object reading from an iterator of byte strings of known total
+    length."""
+
+    def __init__(self, chunks: Iterator[bytes], size: int):
+        self._chunks = chunks
+        self._buffer = memoryview(b"")
+        self._size = size
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self._position += n
+        return n
+
+
+def write_fcs(
+    destination: Union[str, BinaryIO],
+    df: Union[DataFrame, Table],
+    reagents: Optional[Sequence[Union[str, None]]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> None:
+    """Writes a DataFrame to an FCS 3.1 file with float32 data.
+
+    The file can be read back with `parse_fcs_file`, yielding the same
+    channels, reagents and (float32) values.
+
+    Args:
+        destination: A path or a writable binary file object.
+        df: The events, one row per event and one column per channel. Channel
+            names (`$PnN`) are read from the column names, or the first level
+            of a two-level column index, whose second level gives the reagent
+            names (`$PnS`). May also be a `pyarrow.Table`; see `FcsWriter`.
+        reagents: Reagent names, one per channel, if not given by the columns.
+        headers: Additional TEXT keywords, e.g. `{"$P1D": "Linear,0,1000"}`.
+    """
+    writer = FcsWriter(df, reagents, headers)
+    if isinstance(destination, str):
+        with open(destination, "wb") as f:
+            for chunk in writer.chunks():
+                f.write(chunk)
+    else:
+        for chunk in writer.chunks():
+            destination.write(chunk)
@@ -1,7 +1,9 @@
 from datetime import datetime
 import re
-from typing import Any, Dict, TypeVar
-import numpy.typing as npt
+from typing import TYPE_CHECKING, Any, Dict, TypeVar
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
 
 
 ID_REGEX = re.compile(r"^[a-f0-9]{24}$", re.I)
@@ -72,7 +74,7 @@ def datetime_to_timestamp(value: datetime) -> str:
     return datetime.strftime(value, "%Y-%m-%dT%H:%M:%S.%fZ")
 
 
-T = TypeVar("T", float, npt.NDArray)
+T = TypeVar("T", float, "npt.NDArray")
 
 
 def remove_keys_with_none_values(d: Dict[str, Any]) -> Dict[str, Any]:
@@ -1,12 +1,78 @@
-import flowio
-from pandas import DataFrame
-import numpy as np
-from typing import BinaryIO, Union
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Optional, Tuple, Union
 
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from pandas import DataFrame
+    from pyarrow import Table
+
+
+def _read_events(file: Union[BinaryIO, str]) -> Tuple[ndarray, Any]:
+    """Returns the events as an (events x channels) array, and the FlowData."""
+    import flowio
+    import numpy as np
 
-def parse_fcs_file(file: Union[BinaryIO, str]) -> DataFrame:
     data = flowio.FlowData(file, True)
     events = np.reshape(data.events, (-1, data.channel_count))  # type: ignore
+    return events, data
+
+
+def parse_fcs_file(file: Union[BinaryIO, str]) -> DataFrame:
+    from pandas import DataFrame
+
+    events, data = _read_events(file)
     pnn = data.pnn_labels
     pns = data.pns_labels
     return DataFrame(events, columns=[pnn, pns], dtype="float32")
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+
+        return pyarrow
+    except ModuleNotFoundError:
+        raise ImportError(
+            "Try installing pyarrow with `pip install pyarrow` or "
+            "`pip install cellengine[arrow]`."
+        )
+
+
+ROW_GROUP_BYTES = 64 << 20
+
+
+def default_row_group_size(n_channels: int) -> int:
+    """Number of float32 events per Parquet row group giving row groups of
+    about `ROW_GROUP_BYTES` of uncompressed data."""
+    return max(1, ROW_GROUP_BYTES // (4 * max(1, n_channels)))
+
+
+def parse_fcs_file_to_arrow(
+    file: Union[BinaryIO, str], metadata: Optional[Dict[str, str]] = None
+) -> Table:
+    """Parses an FCS file into a pyarrow Table with one float32 column per
+    channel, named by the channel's `$PnN` value. Each field's metadata has the
+    channel's `"$PnN"` and, if set, `"$PnS"` (reagent) values.
+
+    The Table is built directly from the parsed events with a single copy,
+    into column-major order; no DataFrame is created.
+
+    Args:
+        file: A path or binary file object.
+        metadata: Optional metadata for the Table's schema.
+    """
+    import numpy as np
+
+    pa = import_pyarrow()
+    events, data = _read_events(file)
+    # One copy into column-major order makes every column contiguous, so the
+    # arrow arrays below wrap the columns without copying again.
+    events = np.asfortranarray(events, dtype="float32")
+    fields = []
+    for pnn, pns in zip(data.pnn_labels, data.pns_labels):
+        field_metadata = {"$PnN": pnn}
+        if pns:
+            field_metadata["$PnS"] = pns
+        fields.append(pa.field(pnn, pa.float32(), metadata=field_metadata))
+    columns = [pa.array(events[:, i]) for i in range(events.shape[1])]
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields, metadata=metadata))
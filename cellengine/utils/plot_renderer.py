@@ -0,0 +1,399 @@
+"""Local rendering of plots from events that are already held in memory.
+
+`render_plot` draws the same plot types as `Plot.get` ("dot", "density",
+"contour" and "histogram") by accumulating events directly into an RGBA
+raster with NumPy, without matplotlib, and optionally encodes it as a PNG with
+Pillow (`pip install cellengine[interactive]`). Axes, ticks and labels are not
+drawn. `render_plots` renders many plots on a process pool.
+
+```python
+events = fcs_file.get_events(populationId=population._id)
+png = render_plot(events, "density", "FSC-A", "SSC-A", scaleset=scaleset,
+                  smoothing=1, gates=experiment.gates)
+```
+
+Gates are drawn in the plot's scaled coordinates. Rectangle, polygon, range,
+split and quadrant gate coordinates are in the channels' units and are scaled
+like the events; ellipse gates are defined in scaled coordinates.
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from math import cos, sin
+import os
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from cellengine.utils.binning import _bin_indices, _scaled, _select
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+    from cellengine.resources.gate import Gate
+    from cellengine.resources.scaleset import ScaleDict, ScaleSet
+
+PLOT_TYPES = ("dot", "density", "contour", "histogram")
+
+_COLORMAP = [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)]
+"""Anchor colors of the colormap used for densities and z channels."""
+
+
+def import_pil():
+    try:
+        from PIL import Image
+
+        return Image
+    except ModuleNotFoundError:
+        raise ImportError(
+            "Try installing Pillow with `pip install pillow` or "
+            "`pip install cellengine[interactive]`."
+        )
+
+
+def parse_color(color: str) -> Tuple[int, int, int, int]:
+    """Parses a #rgb, #rgba, #rrggbb or #rrggbbaa color into RGBA values."""
+    digits = color.lstrip("#")
+    if len(digits) in (3, 4):
+        digits = "".join(c * 2 for c in digits)
+    if len(digits) == 6:
+        digits += "ff"
+    try:
+        rgba = bytes.fromhex(digits)
+    except ValueError:
+        rgba = b""
+    if len(rgba) != 4:
+        raise ValueError(f"'{color}' is not a valid color.")
+    return rgba[0], rgba[1], rgba[2], rgba[3]
+
+
+def _colormap(values: ndarray) -> ndarray:
+    """Maps values from 0 to 1 to RGB colors."""
+    import numpy as np
+
+    anchors = np.array(_COLORMAP, dtype="f8")
+    stops = np.linspace(0, 1, len(anchors))
+    rgb = [np.interp(values, stops, anchors[:, i]) for i in range(3)]
+    return np.stack(rgb, axis=-1).round().astype(np.uint8)
+
+
+def _smooth(grid: ndarray, smoothing: float) -> ndarray:
+    """Gaussian smoothing, as separable convolutions along each axis."""
+    import numpy as np
+
+    grid = grid.astype("f8")
+    if smoothing <= 0:
+        return grid
+    # Smoothing 1 blurs by about 1% of the plot's size.
+    sigma = smoothing * max(grid.shape) / 100
+    radius = int(3 * sigma) + 1
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-(offsets**2) / (2 * sigma**2))
+    kernel /= kernel.sum()
+    for axis in range(grid.ndim):
+        pad = [(0, 0)] * grid.ndim
+        pad[axis] = (radius, radius)
+        padded = np.pad(grid, pad)
+        length = grid.shape[axis]
+        out = np.zeros_like(grid)
+        for k, weight in enumerate(kernel):
+            out += weight * np.take(padded, np.arange(k, k + length), axis=axis)
+        grid = out
+    return grid
+
+
+def _channel(events: Any, channel: str) -> ndarray:
+    import numpy as np
+
+    values = np.asarray(events[channel])
+    if values.ndim == 2:  # DataFrame columns are (channel, reagent) pairs.
+        values = values[:, 0]
+    return values
+
+
+class _Axis:
+    """Maps a channel's values to pixel coordinates."""
+
+    def __init__(self, values, scale: Optional[ScaleDict], pixels: int):
+        self.scale = scale
+        self.pixels = pixels
+        self.scaled, self.lo, self.hi = _scaled(values, scale, None)
+        if self.hi <= self.lo:
+            self.hi = self.lo + 1
+
+    def indices(self) -> ndarray:
+        return _bin_indices(self.scaled, self.pixels, self.lo, self.hi)
+
+    def to_pixels(self, values, scaled: bool = False) -> ndarray:
+        """Fractional pixel positions of values in the channel's units (or in
+        scaled units)."""
+        import numpy as np
+
+        from cellengine.resources.scaleset import apply_scale
+
+        values = np.asarray(values, dtype="f8")
+        if not scaled and self.scale is not None:
+            values = apply_scale(values, self.scale).astype("f8")
+        return (values - self.lo) * (self.pixels / (self.hi - self.lo))
+
+
+def _draw_polyline(
+    image: ndarray, xs: Sequence[float], ys: Sequence[float], color: ndarray
+) -> None:
+    """Draws line segments through points in pixel coordinates (y up)."""
+    import numpy as np
+
+    height, width = image.shape[:2]
+    points_x, points_y = [], []
+    for x0, y0, x1, y1 in zip(xs[:-1], ys[:-1], xs[1:], ys[1:]):
+        if not np.isfinite([x0, y0, x1, y1]).all():
+            continue
+        # Bound the segment to the image (plus a margin) before sampling it.
+        x0, x1 = np.clip([x0, x1], -width, 2 * width)
+        y0, y1 = np.clip([y0, y1], -height, 2 * height)
+        n = int(max(abs(x1 - x0), abs(y1 - y0))) + 2
+        points_x.append(np.linspace(x0, x1, n))
+        points_y.append(np.linspace(y0, y1, n))
+    if not points_x:
+        return
+    cols = np.floor(np.concatenate(points_x)).astype(np.intp)
+    rows = height - 1 - np.floor(np.concatenate(points_y)).astype(np.intp)
+    inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+    image[rows[inside], cols[inside]] = color
+
+
+def _gate_lines(
+    gate: Union[Gate, Dict[str, Any]],
+    x_axis: _Axis,
+    y_axis: Optional[_Axis],
+    height: int,
+) -> List[Tuple[ndarray, ndarray]]:
+    """The gate's outline as polylines in pixel coordinates."""
+    import numpy as np
+
+    properties = getattr(gate, "_properties", gate)
+    model = properties["model"]
+    gate_type = properties["type"]
+    w = x_axis.pixels
+    if gate_type in ("RangeGate", "SplitGate"):
+        shape = model["range" if gate_type == "RangeGate" else "split"]
+        xs = [shape["x1"], shape["x2"]] if "x1" in shape else [shape["x"]]
+        px = x_axis.to_pixels(xs)
+        py = height * shape.get("y", 0.5)
+        lines = [(np.array([x, x]), np.array([0, height])) for x in px]
+        span = [px[0], px[-1]] if len(px) > 1 else [0, w]
+        lines.append((np.array(span), np.array([py, py])))
+        return lines
+    if y_axis is None:
+        return []
+    if gate_type == "RectangleGate":
+        r = model["rectangle"]
+        xs = [r["x1"], r["x2"], r["x2"], r["x1"], r["x1"]]
+        ys = [r["y1"], r["y1"], r["y2"], r["y2"], r["y1"]]
+        return [(x_axis.to_pixels(xs), y_axis.to_pixels(ys))]
+    if gate_type == "PolygonGate":
+        vertices = np.asarray(model["polygon"]["vertices"], dtype="f8")
+        vertices = np.vstack([vertices, vertices[:1]])
+        return [(x_axis.to_pixels(vertices[:, 0]), y_axis.to_pixels(vertices[:, 1]))]
+    if gate_type == "EllipseGate":
+        e = model["ellipse"]
+        t = np.linspace(0, 2 * np.pi, 129)
+        a, b, angle = e["major"], e["minor"], e["angle"]
+        xs = e["center"][0] + a * np.cos(t) * cos(angle) - b * np.sin(t) * sin(angle)
+        ys = e["center"][1] + a * np.cos(t) * sin(angle) + b * np.sin(t) * cos(angle)
+        return [(x_axis.to_pixels(xs, True), y_axis.to_pixels(ys, True))]
+    if gate_type == "QuadrantGate":
+        q = model["quadrant"]
+        cx, cy = x_axis.to_pixels([q["x"]])[0], y_axis.to_pixels([q["y"]])[0]
+        reach = 2 * (w + height)
+        return [
+            (np.array([cx, cx + reach * cos(a)]), np.array([cy, cy + reach * sin(a)]))
+            for a in q["angles"]
+        ]
+    raise ValueError(f"Cannot render gates of type '{gate_type}'.")
+
+
+def _gates_for_file(
+    gates: Iterable[Union[Gate, Dict[str, Any]]], fcs_file_id: Optional[str]
+) -> List[Dict[str, Any]]:
+    """The gates that apply to a file: of each tailored gate group (gates
+    sharing a gid), the file's own gate if it has one, else the global
+    gate."""
+    chosen: Dict[Any, Dict[str, Any]] = {}
+    for i, gate in enumerate(gates):
+        properties = getattr(gate, "_properties", gate)
+        gid = properties.get("gid", i)
+        gate_file = properties.get("fcsFileId")
+        if gate_file is None:
+            chosen.setdefault(gid, properties)
+        elif gate_file == fcs_file_id:
+            chosen[gid] = properties
+    return list(chosen.values())
+
+
+def render_plot(
+    events: Any,
+    plot_type: str,
+    x_channel: str,
+    y_channel: Optional[str] = None,
+    z_channel: Optional[str] = None,
+    scaleset: Optional[Union[ScaleSet, Mapping[str, ScaleDict]]] = None,
+    width: int = 228,
+    height: int = 228,
+    smoothing: float = 0,
+    color: str = "#000000",
+    percentile_start: float = 10,
+    percentile_step: float = 10,
+    gates: Iterable[Union[Gate, Dict[str, Any]]] = (),
+    gate_color: str = "#ff0000",
+    mask: Optional[Union[ndarray, Sequence[int]]] = None,
+    format: str = "png",
+    fcs_file_id: Optional[str] = None,
+) -> Union[bytes, ndarray]:
+    """Renders a plot of local events.
+
+    Args:
+        events: The events: a DataFrame from `FcsFile.get_events`, or any
+            mapping of channel names to arrays of values.
+        plot_type: "dot", "density", "contour" or "histogram".
+        x_channel: X channel name.
+        y_channel: Y channel name, for 2-D plots.
+        z_channel: For dot plots, a channel by which to color the dots.
+        scaleset: The experiment's ScaleSet (or its `scales`). The channels'
+            values are clipped to their scale ranges and scaled, like
+            CellEngine's plots. Unscaled channels span their values' range.
+        width: Image width in pixels.
+        height: Image height in pixels.
+        smoothing: For density, contour and histogram plots, the amount of
+            smoothing. 0 (no smoothing) to 10; 1 is typical.
+        color: Color of the dots, contour lines and histogram curve, as
+            #rgb, #rgba, #rrggbb or #rrggbbaa.
+        percentile_start: For contour plots, the percentile of the events
+            outside of the first contour.
+        percentile_step: For contour plots, the percentile step between
+            contours.
+        gates: Gates to draw, if their channels match the plot's. Of gates
+            tailored per file, only those of `fcs_file_id` (or else the
+            global gate) are drawn, so `experiment.gates` can be passed.
+        gate_color: Color of the gates.
+        mask: Optionally, a boolean mask or array of indices selecting the
+            events to plot, e.g. a population's events.
+        format: "png" for PNG bytes (requires Pillow) or "rgba" for a
+            (height, width, 4) uint8 array.
+        fcs_file_id: The ID of the plotted file, to select tailored gates.
+    """
+    import numpy as np
+
+    plot_type = plot_type.lower()
+    if plot_type not in PLOT_TYPES:
+        raise ValueError(f"plot_type must be one of {', '.join(PLOT_TYPES)}.")
+    if plot_type != "histogram" and y_channel is None:
+        raise ValueError(f"A y_channel is required for {plot_type} plots.")
+    if format not in ("png", "rgba"):
+        raise ValueError('format must be "png" or "rgba".')
+    scales: Mapping[str, ScaleDict] = getattr(scaleset, "scales", scaleset) or {}
+    foreground = np.array(parse_color(color), dtype=np.uint8)
+
+    image = np.full((height, width, 4), 255, dtype=np.uint8)
+    x_axis = _Axis(
+        _select(_channel(events, x_channel), mask), scales.get(x_channel), width
+    )
+    y_axis = None
+
+    if plot_type == "histogram":
+        ix = x_axis.indices()
+        counts = _smooth(np.bincount(ix[ix >= 0], minlength=width), smoothing)
+        peak = counts.max() if len(counts) else 0
+        tops = np.round(counts / (peak or 1) * (height - 1)).astype(np.intp)
+        # Connect each column's top to the previous column's.
+        lows = np.minimum(tops, np.concatenate([tops[:1], tops[:-1]]))
+        heights = np.arange(height)[:, None]
+        on_curve = (heights >= lows) & (heights <= tops)
+        image[on_curve[::-1]] = foreground
+    else:
+        y_values = _select(_channel(events, y_channel), mask)  # type: ignore
+        y_axis = _Axis(y_values, scales.get(y_channel), height)  # type: ignore
+        ix, iy = x_axis.indices(), y_axis.indices()
+        valid = (ix >= 0) & (iy >= 0)
+        pixels = (height - 1 - iy[valid]) * width + ix[valid]
+        flat = image.reshape(-1, 4)
+        if plot_type == "dot":
+            if z_channel is None:
+                flat[pixels] = foreground
+            else:
+                z_values = _select(_channel(events, z_channel), mask)
+                z_axis = _Axis(z_values, scales.get(z_channel), 1)
+                z = (z_axis.scaled[valid] - z_axis.lo) / (z_axis.hi - z_axis.lo)
+                flat[pixels, :3] = _colormap(np.nan_to_num(z))
+        else:
+            counts = np.bincount(pixels, minlength=width * height)
+            density = _smooth(counts.reshape(height, width), smoothing)
+            if plot_type == "density":
+                filled = density > 1e-3
+                level = np.log1p(density) / np.log1p(density.max() or 1)
+                image[filled, :3] = _colormap(level[filled])
+            elif len(pixels):  # An empty population has no contours.
+                percentiles = np.arange(percentile_start, 100, percentile_step)
+                levels = np.percentile(density.flat[pixels], percentiles)
+                bands = np.searchsorted(levels, density, side="right")
+                edge = np.zeros_like(bands, dtype=bool)
+                edge[:, 1:] |= bands[:, 1:] != bands[:, :-1]
+                edge[1:, :] |= bands[1:, :] != bands[:-1, :]
+                image[edge] = foreground
+
+    gate_rgba = np.array(parse_color(gate_color), dtype=np.uint8)
+    for properties in _gates_for_file(gates, fcs_file_id):
+        if properties.get("xChannel") != x_channel or (
+            y_axis is not None and properties.get("yChannel") not in (None, y_channel)
+        ):
+            continue
+        for xs, ys in _gate_lines(properties, x_axis, y_axis, height):
+            _draw_polyline(image, xs, ys, gate_rgba)
+
+    if format == "rgba":
+        return image
+    Image = import_pil()
+    buffer = BytesIO()
+    Image.fromarray(image, "RGBA").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _render_job(kwargs: Dict[str, Any]) -> Union[bytes, ndarray]:
+    return render_plot(**kwargs)
+
+
+def render_plots(
+    jobs: Iterable[Dict[str, Any]], max_workers: Optional[int] = None
+) -> List[Union[bytes, ndarray]]:
+    """Renders many plots on a pool of processes.
+
+    Each job's events are copied to a worker process, so pass only the needed
+    channels (e.g. `{c: events[c] for c in ("FSC-A", "SSC-A")}`) for large
+    files. On platforms that start processes by spawning (Windows, macOS),
+    call this from within an `if __name__ == "__main__":` block.
+
+    Args:
+        jobs: For each plot, the arguments of `render_plot`.
+        max_workers: Number of processes. Defaults to the number of CPUs. With
+            1, plots are rendered in this process.
+
+    Returns:
+        The rendered plots, in the order of `jobs`.
+    """
+    jobs = list(jobs)
+    if max_workers == 1 or len(jobs) < 2:
+        return [_render_job(job) for job in jobs]
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        chunksize = max(1, len(jobs) // (4 * workers))
+        return list(executor.map(_render_job, jobs, chunksize=chunksize))
@@ -0,0 +1,294 @@
+from __future__ import annotations
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from pyarrow import Table
+
+STATISTICS_BATCH_SIZE = 1000
+"""Default maximum number of (FCS file, population) pairs per bulk statistics
+request."""
+
+COLUMNAR_FORMATS = ("pandas-typed", "arrow")
+"""`get_statistics` formats that are requested as TSV and parsed into typed
+columns."""
+
+TSV_FORMAT = "TSV (with header)"
+
+STATISTIC_COLUMNS = {
+    "mean",
+    "median",
+    "quantile",
+    "mad",
+    "geometricMean",
+    "eventCount",
+    "cv",
+    "stddev",
+    "percent",
+    "value",
+}
+"""Columns holding statistic values, parsed as float64."""
+
+NAME_COLUMNS = {
+    "fcsFileId",
+    "filename",
+    "populationId",
+    "population",
+    "uniquePopulationName",
+    "parentPopulation",
+    "parentPopulationId",
+    "percentOfId",
+    "percentOf",
+    "percentOfUniqueName",
+    "channel",
+    "reagent",
+    "statistic",
+}
+"""Columns holding names and IDs, parsed as categoricals (pandas) or
+dictionary-encoded strings (arrow), since each value repeats many times."""
+
+
+class PartialStatisticsError(Exception):
+    """Raised by `get_statistics` when some, but not all, batches of a batched
+    request failed.
+
+    Attributes:
+        result: The statistics from the batches that succeeded, in the
+            requested format.
+        failures: For each failed batch, its `fcsFileIds` and `populationIds`
+            and the exception it raised.
+    """
+
+    def __init__(self, result: Any, failures: List[Tuple[Dict[str, Any], Exception]]):
+        self.result = result
+        self.failures = failures
+
+    def __str__(self):
+        return (
+            f"{len(self.failures)} statistics batch(es) failed; the first "
+            f"failed with: {self.failures[0][1]!r}. The other batches' results "
+            "are in the result attribute."
+        )
+
+
+def batch_ids(
+    fcs_file_ids: Sequence[str],
+    population_ids: Sequence[Optional[str]],
+    batch_size: int,
+    split_populations: bool = True,
+) -> List[Tuple[List[str], List[Optional[str]]]]:
+    """Splits the files and populations of a statistics request into batches of
+    at most `batch_size` (file, population) pairs (or one file and
+    `batch_size` populations).
+
+    Populations are split only if there are more than `batch_size` of them, so
+    that each file's statistics usually come from one request. With
+    `split_populations=False`, they never are: each batch has whole files, and
+    may exceed `batch_size` if one file has more populations. Results in
+    layouts whose rows or columns span populations can then be concatenated.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    pops = list(population_ids) or [None]
+    pop_step = min(len(pops), batch_size) if split_populations else len(pops)
+    file_step = max(1, batch_size // pop_step)
+    files = list(fcs_file_ids)
+    starts = range(0, len(pops), pop_step)
+    pop_batches = [pops[i : i + pop_step] for i in starts]  # noqa: E203
+    return [
+        (files[i : i + file_step], pop_batch)  # noqa: E203
+        for i in range(0, len(files), file_step)
+        for pop_batch in pop_batches
+    ]
+
+
+def concat_statistics(results: List[Any], format: str) -> Any:
+    """Concatenates the results of several statistics requests made with the
+    same format and layout. Unless the layout is "tall-skinny", each file's
+    statistics must come from one request (see `batch_ids`)."""
+    format = format.lower()
+    if format == "pandas":
+        import pandas
+
+        return pandas.concat(results, ignore_index=True)
+    if format == "pandas-typed":
+        import pandas
+
+        df = pandas.concat(results, ignore_index=True)
+        # Categoricals with different categories are concatenated as objects.
+        categorical = results[0].columns[results[0].dtypes == "category"]
+        return df.astype({c: "category" for c in categorical})
+    if format == "arrow":
+        import pyarrow
+
+        return pyarrow.concat_tables(results, promote_options="default")
+    if "sv" in format:
+        if "without" not in format:
+            # Keep only the first result's header line.
+            results = results[:1] + [r.partition("\n")[2] for r in results[1:]]
+        parts: List[str] = []
+        for result in filter(None, results):
+            if parts and not parts[-1].endswith("\n"):
+                parts.append("\n")
+            parts.append(result)
+        return "".join(parts)
+    if all(isinstance(r, list) for r in results):
+        return [row for result in results for row in result]
+    raise ValueError("Statistics in this layout cannot be batched; set batch_size=0.")
+
+
+def server_statistics_format(format: str) -> str:
+    """The format to request from the server for a `get_statistics` format."""
+    if format.lower() == "pandas":
+        return "json"
+    if format.lower() in COLUMNAR_FORMATS:
+        return TSV_FORMAT
+    return format
+
+
+def read_statistics_tsv(data: bytes) -> DataFrame:
+    """Parses bulk statistics in "TSV (with header)" format into a DataFrame.
+
+    The data is parsed by pandas' C reader in a single pass. Statistic columns
+    are float64; name and ID columns (and any other text columns, such as
+    annotations) are categoricals.
+    """
+    import pandas
+
+    dtype = {c: "float64" for c in STATISTIC_COLUMNS}
+    dtype.update({c: "category" for c in NAME_COLUMNS})
+    df = pandas.read_csv(
+        BytesIO(data), sep="\t", dtype=dtype, keep_default_na=False, na_values=[""]
+    )
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].astype("category")
+    return df
+
+
+def read_statistics_arrow(data: bytes) -> Table:
+    """Parses bulk statistics in "TSV (with header)" format into a pyarrow
+    Table, with float64 statistic columns and dictionary-encoded text
+    columns."""
+    from cellengine.utils.parse_fcs_file import import_pyarrow
+
+    pa = import_pyarrow()
+    from pyarrow import csv
+
+    return csv.read_csv(
+        BytesIO(data),
+        parse_options=csv.ParseOptions(delimiter="\t"),
+        convert_options=csv.ConvertOptions(
+            column_types={c: pa.float64() for c in STATISTIC_COLUMNS},
+            strings_can_be_null=True,
+            auto_dict_encode=True,
+            auto_dict_max_cardinality=1 << 20,
+        ),
+    )
+
+
+CHANNEL_INDEPENDENT_STATISTICS = {"eventcount", "percent"}
+"""Statistics that don't depend on a channel. In wide format, their channel is
+""."""
+
+
+def pivot_statistics(
+    df: DataFrame, fcs_files: Optional[List[Dict[str, Any]]] = None
+) -> DataFrame:
+    """Pivots statistics into a file x (population, channel, statistic)
+    DataFrame.
+
+    The pivot is a single scatter of the values into a NumPy array indexed by
+    factorized row and column keys, without grouping or Python loops over the
+    rows.
+
+    Args:
+        df: Statistics in "tall-skinny" layout (with "statistic" and "value"
+            columns) or "medium" layout (one column per statistic), e.g. from
+            `get_statistics(format="pandas-typed")`.
+        fcs_files: Optionally, FCS file properties (e.g. from
+            `get_fcs_files(as_dict=True)`), whose annotations are added as
+            levels of the row index.
+
+    Returns:
+        A DataFrame with one row per FCS file, indexed by "fcsFileId",
+        "filename" (if present) and each annotation name, and a column for
+        each (population, channel, statistic). Populations are labeled by their
+        unique names, and channel-independent statistics (event count and
+        percent) have the channel "". If the statistics have a percentOf
+        column, the columns have a fourth level, "percentOf", with the
+        population that each percent is of (and "" for other statistics).
+    """
+    import numpy as np
+    import pandas
+
+    if "statistic" not in df.columns:
+        value_columns = [c for c in df.columns if c in STATISTIC_COLUMNS]
+        id_columns = [c for c in df.columns if c not in STATISTIC_COLUMNS]
+        df = df.melt(
+            id_vars=id_columns,
+            value_vars=value_columns,
+            var_name="statistic",
+            value_name="value",
+        )
+
+    population_column = next(
+        (
+            c
+            for c in ("uniquePopulationName", "population", "populationId")
+            if c in df.columns
+        ),
+        None,
+    )
+    statistic = df["statistic"].astype(str).to_numpy()
+    lower_statistic = np.char.lower(statistic.astype(str))
+    if "channel" in df.columns:
+        channel = df["channel"].astype(object).fillna("").astype(str).to_numpy()
+        independent = np.isin(lower_statistic, list(CHANNEL_INDEPENDENT_STATISTICS))
+        channel = np.where(independent, "", channel)
+    else:
+        channel = np.full(len(df), "")
+    if population_column:
+        population = df[population_column].astype(object).fillna("Ungated")
+    else:
+        population = np.full(len(df), "Ungated")
+
+    keys = {"population": population, "channel": channel, "statistic": statistic}
+    percent_of_column = next(
+        (
+            c
+            for c in ("percentOfUniqueName", "percentOf", "percentOfId")
+            if c in df.columns
+        ),
+        None,
+    )
+    if percent_of_column:
+        # Percents of different populations would otherwise share a column.
+        percent_of = df[percent_of_column].astype(object).fillna("").astype(str)
+        keys["percentOf"] = np.where(lower_statistic == "percent", percent_of, "")
+
+    row_codes, file_ids = pandas.factorize(df["fcsFileId"])
+    column_codes, columns = pandas.MultiIndex.from_arrays(
+        list(keys.values())
+    ).factorize()
+    columns = columns.set_names(list(keys))
+    values = np.full((len(file_ids), len(columns)), np.nan)
+    values[row_codes, column_codes] = df["value"].to_numpy(dtype="float64")
+
+    file_ids = [str(f) for f in file_ids]
+    levels: Dict[str, Any] = {"fcsFileId": file_ids}
+    if "filename" in df.columns:
+        _, first = np.unique(row_codes, return_index=True)
+        levels["filename"] = df["filename"].to_numpy()[first]
+    if fcs_files is not None:
+        annotations = {
+            f["_id"]: {a["name"]: a["value"] for a in f.get("annotations", [])}
+            for f in fcs_files
+        }
+        names = list(dict.fromkeys(n for a in annotations.values() for n in a))
+        for name in names:
+            levels[name] = [annotations.get(f, {}).get(name) for f in file_ids]
+    index = pandas.MultiIndex.from_arrays(list(levels.values()), names=list(levels))
+    if len(levels) == 1:
+        index = index.get_level_values(0)
+    return pandas.DataFrame(values, index=index, columns=columns)
@@ -0,0 +1,166 @@
+"""Local, reproducible subsampling of events.
+
+These functions mirror the `preSubsampleN/P`, `postSubsampleN/P` and `seed`
+arguments of `FcsFile.get_events`, but operate on events that are already held
+locally, so trying different subsample sizes doesn't download anything.
+
+They return sorted arrays of row indices rather than copies of the events, so
+the original event order is kept and the caller decides when to copy:
+
+```python
+events = fcs_file.get_events()
+idx = subsample(len(events), n=10_000, seed=42)
+events.iloc[idx]
+```
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from numpy.random import Generator
+
+Seed = Union[int, "Generator", None]
+
+
+def _sample_size(total: int, n: Optional[int], p: Optional[float]) -> int:
+    if (n is None) == (p is None):
+        raise ValueError("Specify exactly one of n and p.")
+    if n is not None:
+        if n < 0:
+            raise ValueError("n must not be negative.")
+        return min(n, total)
+    if not 0 <= p <= 1:  # type: ignore
+        raise ValueError("p must be between 0 and 1.")
+    return int(round(p * total))  # type: ignore
+
+
+def _rng(seed: Seed) -> Generator:
+    import numpy as np
+
+    return np.random.default_rng(seed)
+
+
+def _choose(rng: Generator, indices: ndarray, size: int) -> ndarray:
+    import numpy as np
+
+    if size >= len(indices):
+        return indices
+    chosen = rng.choice(len(indices), size=size, replace=False, shuffle=False)
+    return indices[np.sort(chosen)]
+
+
+def subsample(
+    n_events: int,
+    n: Optional[int] = None,
+    p: Optional[float] = None,
+    seed: Seed = None,
+) -> ndarray:
+    """Uniformly subsamples events without replacement.
+
+    Args:
+        n_events: The number of events to sample from.
+        n: The number of events to keep. All are kept if there are fewer.
+        p: The fraction of events to keep (0 to 1). Exclusive with `n`.
+        seed: Seed or `numpy.random.Generator`, for reproducible subsamples.
+            If omitted, a pseudo-random seed is used.
+
+    Returns:
+        The sorted indices of the kept events.
+    """
+    import numpy as np
+
+    indices = np.arange(n_events)
+    return _choose(_rng(seed), indices, _sample_size(n_events, n, p))
+
+
+def subsample_populations(
+    populations: Mapping[str, ndarray],
+    n: Optional[int] = None,
+    p: Optional[float] = None,
+    seed: Seed = None,
+) -> Dict[str, ndarray]:
+    """Subsamples each population's events independently, like
+    `postSubsampleN/P`.
+
+    Each population is sampled from its own random stream derived from
+    `seed`, so a population's subsample doesn't depend on the other
+    populations, and events in several populations may be kept for one and not
+    another.
+
+    Args:
+        populations: For each population (e.g. by ID), a boolean mask over
+            the events or an array of the indices of its events.
+        n: The number of events to keep per population.
+        p: The fraction of each population's events to keep (0 to 1).
+        seed: Seed or `numpy.random.Generator`, for reproducible subsamples.
+            If omitted, a pseudo-random seed is used.
+
+    Returns:
+        For each population, the sorted indices of its kept events.
+    """
+    import numpy as np
+
+    names = sorted(populations)
+    if isinstance(seed, np.random.Generator) and hasattr(seed, "spawn"):
+        rngs = seed.spawn(len(names))  # NumPy >= 1.25
+    else:
+        entropy = seed
+        if isinstance(seed, np.random.Generator):
+            entropy = seed.integers(1 << 32, size=4)
+        children = np.random.SeedSequence(entropy).spawn(len(names))
+        rngs = [_rng(child) for child in children]
+    result = {}
+    for name, rng in zip(names, rngs):
+        members = np.asarray(populations[name])
+        if members.dtype == bool:
+            members = np.flatnonzero(members)
+        else:
+            members = np.sort(members)
+        size = _sample_size(len(members), n, p)
+        result[name] = _choose(rng, members, size)
+    return result
+
+
+def stratified_subsample(
+    groups: Union[ndarray, Sequence[int]],
+    n: Optional[int] = None,
+    p: Optional[float] = None,
+    seed: Seed = None,
+    lengths: bool = False,
+) -> ndarray:
+    """Subsamples each group of events separately, e.g. each FCS file of a
+    concatenation of several files, so that every group is represented.
+
+    Args:
+        groups: A label for each event, e.g. its FCS file's ID, or, with
+            `lengths=True`, the number of events in each group of consecutive
+            events, e.g. `[len(df) for df in frames]` for
+            `pandas.concat(frames)`.
+        n: The number of events to keep per group.
+        p: The fraction of each group's events to keep (0 to 1).
+        seed: Seed or `numpy.random.Generator`, for reproducible subsamples.
+            If omitted, a pseudo-random seed is used.
+        lengths: Whether `groups` holds group lengths instead of labels.
+
+    Returns:
+        The sorted indices of the kept events.
+    """
+    import numpy as np
+
+    rng = _rng(seed)
+    if lengths:
+        ends = np.cumsum(groups)
+        starts = ends - np.asarray(groups)
+        members = [np.arange(s, e) for s, e in zip(starts, ends)]
+    else:
+        labels = np.asarray(groups)
+        _, inverse = np.unique(labels, return_inverse=True)
+        # A stable sort keeps each group's indices in increasing order.
+        order = np.argsort(inverse, kind="stable")
+        members = np.split(order, np.flatnonzero(np.diff(inverse[order])) + 1)
+    chosen = [_choose(rng, m, _sample_size(len(m), n, p)) for m in members]
+    if not chosen:
+        return np.arange(0)
+    return np.sort(np.concatenate(chosen))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+from dataclasses import asdict
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from cellengine.utils.atomic_write import write_atomic
+from cellengine.utils.checksums import FileChecksums
+
+
+class UploadManifest:
+    """A JSON file recording which local files of a batch upload have been
+    uploaded, so that an interrupted batch can resume where it stopped.
+
+    Entries are keyed by absolute path and are only used while the file's size
+    and modification time are unchanged. The file is rewritten atomically after
+    each change, so it is always valid even if the process is killed.
+
+    Args:
+        path: Path to the manifest file. Created if it does not exist.
+        experiment_id: The experiment that the files are uploaded to.
+    """
+
+    def __init__(self, path: str, experiment_id: str):
+        self.path = path
+        self.experiment_id = experiment_id
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("experimentId") != experiment_id:
+                raise ValueError(
+                    f"Manifest {path} is for experiment {data.get('experimentId')}, "
+                    f"not {experiment_id}."
+                )
+            self._files = data.get("files", {})
+
+    @staticmethod
+    def _stat(path: str) -> Dict[str, int]:
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Returns the entry for a file, or None if there is none or the file
+        has changed since it was recorded."""
+        with self._lock:
+            entry = self._files.get(os.path.abspath(path))
+        if entry is None or entry.get("stat") != self._stat(path):
+            return None
+        return entry
+
+    def checksums(self, path: str) -> Optional[FileChecksums]:
+        """Returns a file's recorded checksums, if it is unchanged."""
+        entry = self.get(path)
+        if entry is None or "checksums" not in entry:
+            return None
+        return FileChecksums(**entry["checksums"])
+
+    def record(
+        self,
+        path: str,
+        checksums: Optional[FileChecksums] = None,
+        fcs_file_id: Optional[str] = None,
+    ) -> None:
+        """Records a file's checksums and/or the ID of the FCS file it was
+        uploaded as, and saves the manifest."""
+        entry: Dict[str, Any] = {"stat": self._stat(path)}
+        if checksums is not None:
+            entry["checksums"] = asdict(checksums)
+        if fcs_file_id is not None:
+            entry["fcsFileId"] = fcs_file_id
+        with self._lock:
+            self._files[os.path.abspath(path)] = entry
+            self._save()
+
+    def _save(self) -> None:
+        data = {"experimentId": self.experiment_id, "files": self._files}
+        write_atomic(self.path, json.dumps(data))
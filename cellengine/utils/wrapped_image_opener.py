@@ -1,19 +1,43 @@
+import hashlib
 from io import BytesIO
+from typing import Optional, Tuple
+from weakref import WeakValueDictionary
 
 from cellengine.utils.singleton import AbstractSingleton
 
 
 class WrappedImageOpener(metaclass=AbstractSingleton):
-    """Display images with an already-installed image library, if possible"""
+    """Display images with an already-installed image library, if possible.
+
+    With Pillow, decoded images are shared: opening the same bytes (at the
+    same thumbnail size) again returns the same image while it is in use,
+    instead of decoding another copy.
+    """
 
     def __init__(self):
         self.imager = self.get_imager()
-
-    def open(self, data):
-        if "PIL" in str(self.imager):
-            image = self.imager.open(BytesIO(data))  # type: ignore
+        self.is_pil = "PIL" in str(self.imager)
+        self._decoded: WeakValueDictionary = WeakValueDictionary()
+
+    def open(self, data: bytes, thumbnail: Optional[Tuple[int, int]] = None):
+        if thumbnail is not None:
+            thumbnail = (int(thumbnail[0]), int(thumbnail[1]))
+        if self.is_pil:
+            key = (hashlib.sha1(data).digest(), thumbnail)
+            image = self._decoded.get(key)
+            if image is None:
+                image = self.imager.open(BytesIO(data))  # type: ignore
+                if thumbnail:
+                    # Decodes at a reduced size where the format allows it.
+                    image.thumbnail(thumbnail)
+                else:
+                    image.load()
+                self._decoded[key] = image
         elif "IPython" in str(self.imager):
-            image = self.imager.display(self.imager.Image(data))  # type: ignore
+            width, height = thumbnail or (None, None)
+            image = self.imager.display(  # type: ignore
+                self.imager.Image(data, width=width, height=height)  # type: ignore
+            )
         else:
             raise RuntimeError("Pillow or IPython is not installed.")
         return image
@@ -47,7 +47,13 @@ setup(
         "requests-toolbelt~=0.9",
         "urllib3~=1.25",
     ],
-    extras_require={"interactive": ["Pillow~=9.0"]},
+    extras_require={
+        "interactive": ["Pillow~=9.0"],
+        "otel": ["opentelemetry-api~=1.0"],
+        "crc32c": ["crc32c~=2.3"],
+        "arrow": ["pyarrow>=14"],
+        "zarr": ["zarr>=2.11,<3"],
+    },
     tests_require=["pytest"],
     python_requires=">=3.7",
     test_suite="tests.test_all",
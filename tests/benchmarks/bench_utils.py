@@ -0,0 +1,18 @@
+"""Helpers for the benchmarks. Imported by name (like `stub_server`), so that
+it doesn't depend on which conftest.py was loaded last."""
+
+import tracemalloc
+from typing import Any, Callable
+
+
+def run(benchmark, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Benchmarks `fn`, recording the peak memory of one call in
+    `benchmark.extra_info["peak_memory_mb"]`."""
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_memory_mb"] = round(peak / 1e6, 2)
+    return benchmark(fn, *args, **kwargs)
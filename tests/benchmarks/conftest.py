@@ -0,0 +1,47 @@
+"""
+Benchmarks run against a local stub server (see `stub_server.py`) and do not
+need CellEngine credentials or network access. Run them with:
+
+    python -m pytest tests/benchmarks --benchmark-only
+
+and compare runs with `--benchmark-autosave` / `--benchmark-compare`. The size
+of the synthetic data is controlled by environment variables:
+
+- CELLENGINE_BENCH_EVENTS: events per FCS file (default 100,000)
+- CELLENGINE_BENCH_CHANNELS: channels per FCS file (default 20)
+- CELLENGINE_BENCH_FILES: FCS files in the experiment (default 4)
+- CELLENGINE_BENCH_POPULATIONS: populations in the experiment (default 8)
+
+Each benchmark also records the peak memory allocated during one call in the
+benchmark's `extra_info` (see the JSON report from `--benchmark-json`).
+"""
+
+import os
+from typing import Iterator
+
+import pytest
+
+from cellengine.utils.api_client import APIClient as api_client_module
+from cellengine.utils.api_client.APIClient import APIClient
+from stub_server import StubCellEngine
+
+
+@pytest.fixture(scope="session")
+def stub() -> Iterator[StubCellEngine]:
+    with StubCellEngine(
+        n_events=int(os.environ.get("CELLENGINE_BENCH_EVENTS", 100_000)),
+        n_channels=int(os.environ.get("CELLENGINE_BENCH_CHANNELS", 20)),
+        n_files=int(os.environ.get("CELLENGINE_BENCH_FILES", 4)),
+        n_populations=int(os.environ.get("CELLENGINE_BENCH_POPULATIONS", 8)),
+    ) as stub:
+        yield stub
+
+
+@pytest.fixture()
+def stub_client(stub: StubCellEngine, monkeypatch) -> Iterator[APIClient]:
+    # Don't let the stub client become the default client for other tests.
+    monkeypatch.setattr(api_client_module, "_default_client", None)
+    client = APIClient(token="stub", base_url=stub.base_url)
+    with client.use():
+        yield client
+    client.close()
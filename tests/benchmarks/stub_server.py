@@ -0,0 +1,296 @@
+"""A minimal local stand-in for the CellEngine API, serving synthetic data.
+
+Only the routes exercised by the benchmarks are implemented. Responses are
+generated once up front so that benchmarks measure the toolkit, not the stub.
+"""
+
+import io
+import json
+import re
+import struct
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import flowio
+import numpy as np
+
+from cellengine.utils.generate_id import generate_id
+
+
+def make_fcs(n_events: int, channels: List[str], seed: int = 0) -> bytes:
+    """Creates an FCS 3.1 file with float32 log-normal events."""
+    rng = np.random.default_rng(seed)
+    events = rng.lognormal(6, 1.5, size=(n_events, len(channels))).astype("f4")
+    f = io.BytesIO()
+    flowio.create_fcs(f, events.flatten(), channels, metadata_dict={})
+    return f.getvalue()
+
+
+def make_png(width: int = 228, height: int = 228) -> bytes:
+    """Creates a blank RGBA PNG."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    raw = b"".join(b"\x00" + b"\xff" * (width * 4) for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+class StubCellEngine:
+    """Serves one experiment with `n_files` identical FCS files of `n_events`
+    events and `n_channels` channels, `n_populations` populations, a
+    compensation and a scaleset.
+
+    Example:
+        ```py
+        with StubCellEngine(n_events=10_000) as stub:
+            client = APIClient(token="stub", base_url=stub.base_url)
+        ```
+    """
+
+    def __init__(
+        self,
+        n_events: int = 100_000,
+        n_channels: int = 20,
+        n_files: int = 4,
+        n_populations: int = 8,
+    ):
+        self.experiment_id = generate_id()
+        self.channels = [f"Ch{i + 1}-A" for i in range(n_channels)]
+        self.fcs_bytes = make_fcs(n_events, self.channels)
+        self.png_bytes = make_png()
+        self.requests: List[Tuple[str, str]] = []
+
+        self.experiment = {
+            "_id": self.experiment_id,
+            "name": "Benchmark experiment",
+            "deepUpdated": "2024-01-01T00:00:00.000Z",
+        }
+        self.fcs_files = [
+            {
+                "_id": generate_id(),
+                "experimentId": self.experiment_id,
+                "filename": f"file{i}.fcs",
+                "annotations": [{"name": "well", "value": f"A{i + 1}"}],
+                "panel": [
+                    {"channel": c, "reagent": None, "index": j + 1}
+                    for j, c in enumerate(self.channels)
+                ],
+                "panelName": "Panel 1",
+                "eventCount": n_events,
+                "size": len(self.fcs_bytes),
+                "hasFileInternalComp": False,
+                "isControl": False,
+                "gatesLocked": False,
+                "deleted": None,
+            }
+            for i in range(n_files)
+        ]
+        self.populations = [
+            {
+                "_id": generate_id(),
+                "experimentId": self.experiment_id,
+                "name": f"Pop {i}",
+                "uniqueName": f"Pop {i}",
+                "gates": "{}",
+                "parentId": None,
+                "terminalGateGid": generate_id(),
+            }
+            for i in range(n_populations)
+        ]
+        rng = np.random.default_rng(1)
+        spill = np.eye(n_channels) + np.triu(rng.uniform(0, 0.1, (n_channels,) * 2), 1)
+        self.compensation = {
+            "_id": generate_id(),
+            "experimentId": self.experiment_id,
+            "name": "Comp",
+            "channels": self.channels,
+            "spillMatrix": spill.flatten().tolist(),
+        }
+        self.scaleset = {
+            "_id": generate_id(),
+            "experimentId": self.experiment_id,
+            "name": "Scales",
+            "scales": [
+                {
+                    "channelName": c,
+                    "scale": {
+                        "type": "ArcSinhScale",
+                        "minimum": -200,
+                        "maximum": 262144,
+                        "cofactor": 150,
+                    },
+                }
+                for c in self.channels
+            ],
+        }
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        assert self._server, "Stub server is not running."
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self) -> None:
+        stub = self
+
+        class Handler(_Handler):
+            pass
+
+        Handler.stub = stub
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def statistics(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Synthetic "tall-skinny" statistics for a bulkstatistics request."""
+        file_ids = body.get("fcsFileIds") or [f["_id"] for f in self.fcs_files]
+        files = [f for f in self.fcs_files if f["_id"] in file_ids]
+        pop_ids = body.get("populationIds") or [None]
+        pops = {p["_id"]: p for p in self.populations}
+        rows = []
+        for f in files:
+            for pop_id in pop_ids:
+                pop = pops.get(pop_id)
+                for channel in body.get("channels", []):
+                    for stat in body.get("statistics", []):
+                        rows.append(
+                            {
+                                "fcsFileId": f["_id"],
+                                "filename": f["filename"],
+                                "populationId": pop_id,
+                                "population": pop["name"] if pop else "Ungated",
+                                "uniquePopulationName": (
+                                    pop["uniqueName"] if pop else "Ungated"
+                                ),
+                                "parentPopulation": None,
+                                "parentPopulationId": None,
+                                "channel": channel,
+                                "reagent": None,
+                                "statistic": stat,
+                                "value": float(len(rows)),
+                            }
+                        )
+        return rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    stub: StubCellEngine
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("GET", r"/experiments/(?P<e>\w+)$", "get_experiment"),
+        ("GET", r"/experiments/(?P<e>\w+)/fcsfiles$", "get_fcs_files"),
+        ("GET", r"/experiments/(?P<e>\w+)/fcsfiles/(?P<f>\w+)\.fcs$", "get_events"),
+        ("GET", r"/experiments/(?P<e>\w+)/fcsfiles/(?P<f>\w+)$", "get_fcs_file"),
+        ("POST", r"/experiments/(?P<e>\w+)/fcsfiles$", "post_fcs_file"),
+        ("GET", r"/experiments/(?P<e>\w+)/populations$", "get_populations"),
+        ("GET", r"/experiments/(?P<e>\w+)/compensations/(?P<c>\w+)$", "get_comp"),
+        ("GET", r"/experiments/(?P<e>\w+)/scalesets$", "get_scalesets"),
+        ("POST", r"/experiments/(?P<e>\w+)/gates$", "post_gates"),
+        ("POST", r"/experiments/(?P<e>\w+)/bulkstatistics$", "post_statistics"),
+        ("GET", r"/experiments/(?P<e>\w+)/plot$", "get_plot"),
+    ]
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        path = url.path.replace("/api/v1", "", 1)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        self.stub.requests.append((method, path))
+        for route_method, pattern, handler in self.ROUTES:
+            match = re.match(pattern, path)
+            if route_method == method and match:
+                return getattr(self, handler)(**match.groupdict())
+        self._json({"error": f"No stub route for {method} {path}"}, 404)
+
+    def _send(self, data: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, body: Any, status: int = 200):
+        self._send(json.dumps(body).encode(), "application/json", status)
+
+    def get_experiment(self, e):
+        self._json(self.stub.experiment)
+
+    def get_fcs_files(self, e):
+        self._json(self.stub.fcs_files)
+
+    def get_fcs_file(self, e, f):
+        self._json(next(x for x in self.stub.fcs_files if x["_id"] == f))
+
+    def get_events(self, e, f):
+        self._send(self.stub.fcs_bytes, "application/vnd.isac.fcs")
+
+    def post_fcs_file(self, e):
+        created = dict(self.stub.fcs_files[0], _id=generate_id(), size=len(self.body))
+        self._json(created, 201)
+
+    def get_populations(self, e):
+        self._json(self.stub.populations)
+
+    def get_comp(self, e, c):
+        self._json(self.stub.compensation)
+
+    def get_scalesets(self, e):
+        self._json([self.stub.scaleset])
+
+    def post_gates(self, e):
+        body = json.loads(self.body)
+        many = isinstance(body, list)
+        gates = [dict(g, _id=generate_id()) for g in (body if many else [body])]
+        if many:
+            return self._json(gates, 201)
+        if self.query.get("createPopulation") == "true":
+            population = dict(self.stub.populations[0], _id=generate_id())
+            return self._json({"gate": gates[0], "population": population}, 201)
+        self._json(gates[0], 201)
+
+    def post_statistics(self, e):
+        body = json.loads(self.body)
+        rows = self.stub.statistics(body)
+        if not body.get("format", "").startswith("TSV"):
+            return self._json(rows)
+        columns = list(rows[0]) if rows else []
+        lines = ["\t".join(columns)]
+        lines += ["\t".join(str(r[c] or "") for c in columns) for r in rows]
+        self._send(("\n".join(lines) + "\n").encode(), "text/tab-separated-values")
+
+    def get_plot(self, e):
+        self._send(self.stub.png_bytes, "image/png")
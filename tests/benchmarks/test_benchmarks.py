@@ -0,0 +1,132 @@
+from io import BytesIO
+
+import pytest
+
+from cellengine.resources.experiment import Experiment
+from cellengine.resources.fcs_file import FcsFile
+from cellengine.utils.api_client.APIClient import APIClient
+from cellengine.utils.fcs_writer import write_fcs
+from cellengine.utils.parse_fcs_file import parse_fcs_file
+from bench_utils import run
+from stub_server import StubCellEngine
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture()
+def experiment(stub: StubCellEngine, stub_client: APIClient) -> Experiment:
+    return stub_client.get_experiment(_id=stub.experiment_id)
+
+
+@pytest.fixture()
+def fcs_file(stub: StubCellEngine, experiment: Experiment):
+    file = experiment.get_fcs_file(_id=stub.fcs_files[0]["_id"])
+    file.get_events(inplace=True)
+    return file
+
+
+def test_bench_get_events(benchmark, stub: StubCellEngine, fcs_file):
+    events = run(benchmark, fcs_file.get_events)
+    assert events.shape == (fcs_file.event_count, len(stub.channels))
+
+
+def test_bench_parse_fcs_file(benchmark, stub: StubCellEngine):
+    events = run(benchmark, lambda: parse_fcs_file(BytesIO(stub.fcs_bytes)))
+    assert events.shape[1] == len(stub.channels)
+
+
+def test_bench_compensation_apply(
+    benchmark, stub: StubCellEngine, experiment, fcs_file
+):
+    comp = experiment.get_compensation(_id=stub.compensation["_id"])
+    comped = run(benchmark, comp.apply, fcs_file, inplace=False)
+    assert comped.shape == fcs_file.events.shape
+
+
+def test_bench_scaleset_apply(benchmark, experiment, fcs_file):
+    scaleset = experiment.get_scaleset()
+    scaled = run(benchmark, scaleset.apply, fcs_file, clamp_q=True, in_place=False)
+    assert scaled.shape == fcs_file.events.shape
+
+
+def test_bench_create_gate(benchmark, stub: StubCellEngine, experiment):
+    gate, pop = run(
+        benchmark,
+        experiment.create_rectangle_gate,
+        stub.channels[0],
+        stub.channels[1],
+        "gate",
+        10,
+        1000,
+        10,
+        1000,
+    )
+    assert gate.name == "gate"
+
+
+def test_bench_create_gates_bulk(benchmark, stub: StubCellEngine, experiment):
+    def create():
+        gates = [
+            {
+                "type": "RectangleGate",
+                "x_channel": stub.channels[0],
+                "y_channel": stub.channels[1],
+                "name": f"gate {i}",
+                "x1": i,
+                "x2": i + 10,
+                "y1": i,
+                "y2": i + 10,
+            }
+            for i in range(200)
+        ]
+        return experiment.create_gates(gates)
+
+    gates = run(benchmark, create)
+    assert len(gates) == 200
+
+
+def test_bench_get_statistics(benchmark, stub: StubCellEngine, experiment):
+    stats = run(
+        benchmark,
+        experiment.get_statistics,
+        ["mean", "median", "eventcount"],
+        stub.channels,
+        population_ids=[p["_id"] for p in stub.populations],
+        format="pandas",
+    )
+    assert len(stats) == (
+        len(stub.fcs_files) * len(stub.populations) * len(stub.channels) * 3
+    )
+
+
+@pytest.mark.parametrize("format", ["pandas", "pandas-typed", "arrow"])
+def test_bench_get_statistics_format(
+    benchmark, stub: StubCellEngine, experiment, format
+):
+    if format == "arrow":
+        pytest.importorskip("pyarrow")
+    stats = run(
+        benchmark,
+        experiment.get_statistics,
+        ["mean", "median", "eventcount"],
+        stub.channels,
+        population_ids=[p["_id"] for p in stub.populations],
+        format=format,
+        batch_size=None,
+    )
+    assert len(stats) == (
+        len(stub.fcs_files) * len(stub.populations) * len(stub.channels) * 3
+    )
+
+
+def test_bench_create_from_dataframe(benchmark, stub: StubCellEngine, fcs_file):
+    df = fcs_file.events
+    created = run(
+        benchmark, FcsFile.create_from_dataframe, stub.experiment_id, "new.fcs", df
+    )
+    assert created.size > df.shape[0] * df.shape[1] * 4
+
+
+def test_bench_write_fcs(benchmark, fcs_file):
+    out = run(benchmark, lambda: write_fcs(BytesIO(), fcs_file.events))
+    assert out is None
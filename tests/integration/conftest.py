@@ -0,0 +1,30 @@
+import threading
+from typing import Callable, Iterator, List, Type
+
+import pytest
+
+from cellengine.utils.api_client import APIClient as api_client_module
+from local_server import LocalHandler, LocalServer
+
+
+@pytest.fixture()
+def local_server(monkeypatch) -> Iterator[Callable[..., LocalServer]]:
+    """Starts local servers: `local_server(Handler, **attributes)` serves a
+    subclass of `Handler` with the given class attributes (e.g. fresh lists
+    in which to record requests). Clients of the servers don't become the
+    current client for other tests."""
+    monkeypatch.setattr(api_client_module, "_default_client", None)
+    servers: List[LocalServer] = []
+
+    def start(handler: Type[LocalHandler], **attributes) -> LocalServer:
+        server = LocalServer(
+            ("127.0.0.1", 0), type(handler.__name__, (handler,), attributes)
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
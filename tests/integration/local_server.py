@@ -0,0 +1,55 @@
+"""A local stand-in for the CellEngine API, for tests that don't need
+credentials or network access.
+
+Tests implement only the routes they exercise, in a `LocalHandler` subclass,
+and serve it with the `local_server` fixture (see conftest.py):
+
+    class Handler(LocalHandler):
+        gets: list
+
+        def do_GET(self):
+            self.gets.append(self.path)
+            self._send(200, [{"_id": EXP_ID}])
+
+    def test_something(local_server):
+        server = local_server(Handler, gets=[])
+        client = server.client()
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from cellengine.utils.api_client.APIClient import APIClient
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _json_body(self) -> Any:
+        return json.loads(self._body())
+
+    def _send(self, status: int, body: Any, content_type: str = "application/json"):
+        """Sends `body` as JSON, or as is if it is bytes or a string."""
+        if isinstance(body, str):
+            body = body.encode()
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer(ThreadingHTTPServer):
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def client(self, **kwargs) -> APIClient:
+        """A client for this server."""
+        return APIClient(token="token", base_url=self.base_url, **kwargs)
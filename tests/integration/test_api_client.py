@@ -1,7 +1,89 @@
+import gc
+import socket
+import threading
+
+from cellengine.utils.api_client import APIClient as api_client_module
 from cellengine.utils.api_client.APIClient import APIClient
+from cellengine.utils.api_client.BaseAPIClient import (
+    BaseAPIClient,
+    KeepAliveHTTPAdapter,
+)
 from cellengine.resources.experiment import Experiment
+from cellengine.utils.concurrency import map_concurrent
+
+
+class ExampleClient(BaseAPIClient):
+    _API_NAME = "Example"
 
 
 def test_client_get_experiments(client: APIClient):
     experiments = client.get_experiments()
     assert all([type(exp) is Experiment for exp in experiments])
+
+
+def test_client_connection_settings(monkeypatch):
+    monkeypatch.setenv("CELLENGINE_POOL_MAXSIZE", "24")
+    monkeypatch.setenv("CELLENGINE_READ_TIMEOUT", "0")
+    client = ExampleClient(connect_timeout=5, tcp_keepalive=30)
+
+    assert client.timeout == (5, None)
+    adapter = client.requests_session.get_adapter("https://cellengine.com")
+    assert isinstance(adapter, KeepAliveHTTPAdapter)
+    assert adapter._pool_maxsize == 24
+    assert (
+        socket.SOL_SOCKET,
+        socket.SO_KEEPALIVE,
+        1,
+    ) in adapter.poolmanager.connection_pool_kw["socket_options"]
+
+
+def test_clients_are_independent_instances(monkeypatch):
+    monkeypatch.setattr(api_client_module, "_default_client", None)
+    default = APIClient(token="default-token")
+    other = APIClient(token="other-token", base_url="https://example.com")
+
+    assert other is not default
+    assert other.base_url == "https://example.com"
+    assert other._cookies.get("token") == "other-token"
+    assert APIClient() is default
+
+    with other.use():
+        assert APIClient() is other
+        assert Experiment({"_id": "1"}).client is other
+    assert APIClient() is default
+
+    bound = Experiment({"_id": "1"}, other)
+    assert bound.client is other
+
+    other.set_default()
+    assert APIClient() is other
+
+
+def test_client_uses_one_session_per_thread(monkeypatch):
+    monkeypatch.setattr(api_client_module, "_default_client", None)
+    client = APIClient(token="token")
+    sessions = []
+
+    def work():
+        sessions.append(client.requests_session)
+        sessions.append(client.requests_session)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    assert sessions[0] is sessions[1]
+    assert len(set(id(s) for s in sessions)) == 3
+    # Sessions share the client's cookies and connection pool
+    assert all(s.cookies is client._cookies for s in sessions)
+    assert all(s.get_adapter("https://") is client._adapter for s in sessions)
+
+
+def test_client_releases_sessions_of_finished_threads(monkeypatch):
+    monkeypatch.setattr(api_client_module, "_default_client", None)
+    client = APIClient(token="token")
+    for _ in range(5):
+        map_concurrent(lambda _: client.requests_session, range(8), max_workers=4)
+    gc.collect()
+    assert len(client._sessions) == 0
+    assert client.requests_session in client._sessions
@@ -0,0 +1,143 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cellengine.resources.experiment import Experiment
+from cellengine.resources.fcs_file import FcsFile
+from cellengine.utils.fcs_writer import write_fcs
+from cellengine.utils.parse_fcs_file import (
+    default_row_group_size,
+    parse_fcs_file,
+    parse_fcs_file_to_arrow,
+)
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture()
+def fcs_bytes():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        rng.normal(100, 20, size=(5_000, 3)),
+        columns=[["FSC-A", "FITC-A", "Time"], ["", "CD3", None]],
+    )
+    f = io.BytesIO()
+    write_fcs(f, df)
+    return f.getvalue()
+
+
+def test_parse_fcs_file_to_arrow(fcs_bytes):
+    table = parse_fcs_file_to_arrow(io.BytesIO(fcs_bytes), {"a": "b"})
+    expected = parse_fcs_file(io.BytesIO(fcs_bytes))
+    assert table.column_names == ["FSC-A", "FITC-A", "Time"]
+    assert all(t == pa.float32() for t in table.schema.types)
+    assert table.schema.field("FITC-A").metadata == {
+        b"$PnN": b"FITC-A",
+        b"$PnS": b"CD3",
+    }
+    assert table.schema.field("Time").metadata == {b"$PnN": b"Time"}
+    assert table.schema.metadata == {b"a": b"b"}
+    np.testing.assert_array_equal(
+        np.column_stack([c.to_numpy() for c in table.columns]), expected.to_numpy()
+    )
+
+
+class Client:
+    def __init__(self, fcs_bytes):
+        self.fcs_bytes = fcs_bytes
+        self.downloads = []
+
+    def download_fcs_file(self, experiment_id, fcs_file_id, **kwargs):
+        self.downloads.append((fcs_file_id, kwargs.get("populationId")))
+        if fcs_file_id == "bad":
+            raise RuntimeError("Download failed.")
+        return self.fcs_bytes
+
+
+def make_fcs_file(client, _id="1", annotations=[]):
+    properties = {
+        "_id": _id,
+        "experimentId": "2",
+        "filename": f"{_id}.fcs",
+        "annotations": annotations,
+    }
+    return FcsFile(properties, client=client)
+
+
+def test_get_events_arrow_and_to_parquet(fcs_bytes, tmp_path):
+    fcs_file = make_fcs_file(Client(fcs_bytes))
+
+    table = fcs_file.get_events(format="arrow")
+    assert table.num_rows == 5_000
+    assert table.schema.metadata[b"cellengine.fcsFileId"] == b"1"
+    with pytest.raises(ValueError):
+        fcs_file.get_events(format="arrow", inplace=True)
+    with pytest.raises(ValueError):
+        fcs_file.get_events(format="csv")
+
+    path = str(tmp_path / "a.parquet")
+    fcs_file.to_parquet(path, row_group_size=1_000)
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 5
+    assert parquet_file.read().equals(table)
+    assert default_row_group_size(16) == 1 << 20
+
+
+def test_write_fcs_from_arrow(fcs_bytes):
+    table = parse_fcs_file_to_arrow(io.BytesIO(fcs_bytes))
+    f = io.BytesIO()
+    write_fcs(f, table.slice(10))
+    parsed = parse_fcs_file(io.BytesIO(f.getvalue()))
+    expected = parse_fcs_file(io.BytesIO(fcs_bytes)).iloc[10:]
+    assert parsed.columns.tolist() == expected.columns.tolist()
+    np.testing.assert_array_equal(parsed.to_numpy(), expected.to_numpy())
+
+
+def test_export_events_dataset(fcs_bytes, tmp_path):
+    ds = pytest.importorskip("pyarrow.dataset")
+    client = Client(fcs_bytes)
+    files = [
+        make_fcs_file(client, "f1", [{"name": "plate", "value": "p/1"}]),
+        make_fcs_file(client, "f2", [{"name": "plate", "value": 2}]),
+        make_fcs_file(client, "bad", [{"name": "row", "value": "A"}]),
+    ]
+    experiment = Experiment({"_id": "2"}, client=client)  # type: ignore
+    path = str(tmp_path / "dataset")
+
+    failures = experiment.export_events_dataset(
+        path,
+        populations=[None, "pop1"],
+        channels=["Time", "FSC-A"],
+        partition_by=["plate", "populationId"],
+        fcs_files=files,
+        max_workers=2,
+    )
+
+    assert set(failures) == {("bad", None), ("bad", "pop1")}
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    table = dataset.to_table(filter=ds.field("plate") == "p/1")
+    assert table.num_rows == 10_000
+    assert table.column_names[:2] == ["Time", "FSC-A"]
+    assert set(table.column("populationId").to_pylist()) == {None, "pop1"}
+    assert set(table.column("fcsFileId").to_pylist()) == {"f1"}
+    assert dataset.count_rows() == 20_000
+
+    # Resuming only downloads the parts that failed.
+    client.downloads.clear()
+    experiment.export_events_dataset(
+        path,
+        populations=[None, "pop1"],
+        channels=["Time", "FSC-A"],
+        partition_by=["plate", "populationId"],
+        fcs_files=files[:2],
+    )
+    assert client.downloads == []
+    with pytest.raises(ValueError, match="different options"):
+        experiment.export_events_dataset(path, fcs_files=files)
+    with pytest.raises(ValueError, match="Cannot partition by"):
+        experiment.export_events_dataset(
+            str(tmp_path / "other"), partition_by=["FSC-A"], fcs_files=files
+        )
@@ -0,0 +1,81 @@
+import numpy as np
+from pandas import DataFrame
+
+from cellengine.resources.fcs_file import FcsFile
+from cellengine.resources.scaleset import ScaleSet, apply_scale
+from cellengine.utils.binning import density2d, histogram
+
+ASINH = {"type": "ArcSinhScale", "minimum": -200, "maximum": 5000, "cofactor": 150}
+LOG = {"type": "LogScale", "minimum": 1, "maximum": 1e5, "cofactor": None}
+
+
+def test_histogram():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1000, 1500, 10_000).astype("f4")
+    counts, edges = histogram(values, bins=64, scale=ASINH)
+    lo, hi = apply_scale(np.array([-200, 5000]), ASINH)
+    np.testing.assert_allclose(edges, np.linspace(lo, hi, 65), rtol=1e-6)
+    # Clipped values are counted in the edge bins.
+    expected, _ = np.histogram(
+        apply_scale(values, ASINH, clamp_q=True), bins=64, range=(lo, hi)
+    )
+    assert counts.sum() == len(values)
+    assert np.abs(counts - expected).max() <= 2  # float32 rounding at edges
+
+    counts, edges = histogram([0, 1, 2, 3, np.nan, 10], bins=2, range=(0, 4))
+    np.testing.assert_array_equal(counts, [2, 3])
+    np.testing.assert_array_equal(edges, [0, 2, 4])
+
+    mask = np.array([True, False, True, False, False, False])
+    counts, _ = histogram([0, 1, 2, 3, np.nan, 10], bins=2, mask=mask, range=(0, 4))
+    np.testing.assert_array_equal(counts, [1, 1])
+
+
+def test_density2d():
+    rng = np.random.default_rng(1)
+    x = rng.uniform(0, 10, 5000)
+    y = rng.uniform(0, 20, 5000)
+    counts, x_edges, y_edges = density2d(
+        x, y, bins=(10, 5), x_range=(0, 10), y_range=(0, 20)
+    )
+    expected, _, _ = np.histogram2d(x, y, bins=(10, 5), range=((0, 10), (0, 20)))
+    np.testing.assert_array_equal(counts, expected)
+    np.testing.assert_array_equal(x_edges, np.arange(11))
+    assert len(y_edges) == 6
+
+    idx = np.arange(0, 5000, 2)
+    counts, _, _ = density2d(x, y, bins=4, x_scale=LOG, y_scale=LOG, mask=idx)
+    assert counts.shape == (4, 4)
+    assert counts.sum() == len(idx)
+
+
+def test_fcs_file_histogram():
+    fcs_file = FcsFile(
+        {"_id": "f1", "experimentId": "e1", "filename": "a.fcs", "annotations": []}
+    )
+    values = np.array([[1, 10], [10, 100], [100, 1000], [1000, 10_000]], "f4")
+    fcs_file._events = DataFrame(values, columns=[["FSC-A", "CD3"], ["", "Foo"]])
+    scaleset = ScaleSet(
+        {
+            "_id": "s1",
+            "experimentId": "e1",
+            "name": "Scales",
+            "scales": [
+                {"channelName": "FSC-A", "scale": dict(LOG, maximum=1e4)},
+                {"channelName": "CD3", "scale": dict(LOG, maximum=1e4)},
+            ],
+        }
+    )
+    counts, edges = fcs_file.histogram("FSC-A", bins=4, scaleset=scaleset)
+    np.testing.assert_array_equal(counts, [1, 1, 1, 1])
+    np.testing.assert_allclose(edges, [0, 1, 2, 3, 4])
+
+    counts, _, _ = fcs_file.density2d(
+        "FSC-A", "CD3", bins=4, scaleset=scaleset, mask=[0, 1]
+    )
+    assert counts[0, 1] == counts[1, 2] == 1
+    assert counts.sum() == 2
+
+    counts, edges = fcs_file.histogram("CD3", bins=3)
+    np.testing.assert_array_equal(counts, [3, 0, 1])
+    assert edges[-1] == 10_000
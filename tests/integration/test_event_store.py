@@ -0,0 +1,90 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cellengine.resources.compensation import Compensation
+from cellengine.resources.fcs_file import FcsFile
+from cellengine.utils.fcs_writer import write_fcs
+
+pytest.importorskip("zarr")
+from cellengine.utils.event_store import EventStore  # noqa: E402
+
+
+@pytest.fixture()
+def df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        rng.normal(100, 20, size=(10_000, 3)).astype("f4"),
+        columns=[["FSC-A", "FITC-A", "Time"], ["", "CD3", ""]],
+    )
+
+
+class Client:
+    def __init__(self, df):
+        f = io.BytesIO()
+        write_fcs(f, df)
+        self.content = f.getvalue()
+        self.downloads = []
+
+    def download_fcs_file(self, experiment_id, fcs_file_id, **kwargs):
+        self.downloads.append(kwargs)
+        return self.content
+
+
+def test_get_events_lazy(df, tmp_path):
+    client = Client(df)
+    properties = {"_id": "f1", "experimentId": "e1", "filename": "a.fcs"}
+    fcs_file = FcsFile(dict(properties, annotations=[]), client=client)
+    path = str(tmp_path / "events.zarr")
+
+    events = fcs_file.get_events_lazy(path, inplace=True, seed=1)
+    assert fcs_file.lazy_events is events
+    assert events.shape == (10_000, 3)
+    pd.testing.assert_frame_equal(
+        events[100:200], df.iloc[100:200].reset_index(drop=True)
+    )
+    rows = np.array([5, 9_999, 0])
+    np.testing.assert_array_equal(
+        events.to_numpy(rows, ["Time", "FSC-A"]), df.to_numpy()[rows][:, [2, 0]]
+    )
+
+    # Served from the store; a different query is downloaded and stored apart.
+    store = EventStore(path, chunk_rows=1000)
+    again = fcs_file.get_events_lazy(store, seed=1)
+    assert client.downloads == [{"seed": 1}]
+    assert again.array.chunks == (1 << 16, 3)
+    assert again.array.attrs["query"] == {"seed": 1}
+    assert store.root["f1"].attrs["filename"] == "a.fcs"
+    other = fcs_file.get_events_lazy(store)
+    assert len(client.downloads) == 2
+    assert other.array.chunks == (1000, 3)
+    np.testing.assert_array_equal(other.to_dataframe().to_numpy(), df.to_numpy())
+
+    store.delete("f1")
+    assert store.get("f1") is None
+
+
+def test_events_after_get_events_lazy(df, tmp_path):
+    client = Client(df)
+    properties = {"_id": "f1", "experimentId": "e1", "filename": "a.fcs"}
+    fcs_file = FcsFile(dict(properties, annotations=[]), client=client)
+    fcs_file.get_events_lazy(str(tmp_path / "events.zarr"), inplace=True)
+    counts, _ = fcs_file.histogram("FSC-A", bins=8)
+    assert counts.sum() == len(df)
+    assert fcs_file._events is None  # Binned from the lazy events.
+    assert isinstance(fcs_file.events, pd.DataFrame)
+
+    comp = Compensation(
+        {
+            "_id": "c1",
+            "experimentId": "e1",
+            "name": "Comp",
+            "channels": ["FSC-A", "FITC-A"],
+            "spillMatrix": [1, 0, 0, 1],
+        }
+    )
+    comp.apply(fcs_file)
+    np.testing.assert_allclose(fcs_file.events.to_numpy(), df.to_numpy())
+    assert client.downloads == [{}]
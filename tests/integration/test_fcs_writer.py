@@ -0,0 +1,88 @@
+import io
+
+import flowio
+import numpy as np
+import pandas as pd
+import pytest
+
+from cellengine.resources.fcs_file import FcsFile
+from cellengine.utils.fcs_writer import FcsWriter, write_fcs
+from cellengine.utils.parse_fcs_file import parse_fcs_file
+
+
+@pytest.fixture()
+def df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        rng.lognormal(5, 2, size=(10_001, 4)),
+        columns=[["FSC-A", "FITC/A", "PE-A", "Time"], ["", "CD3", "CD4/8", None]],
+    )
+
+
+def roundtrip(df, **kwargs):
+    f = io.BytesIO()
+    write_fcs(f, df, **kwargs)
+    return f.getvalue(), parse_fcs_file(io.BytesIO(f.getvalue()))
+
+
+def test_write_fcs_roundtrip(df):
+    data, parsed = roundtrip(df)
+    assert parsed.columns.tolist() == [
+        ("FSC-A", ""),
+        ("FITC/A", "CD3"),
+        ("PE-A", "CD4/8"),
+        ("Time", ""),
+    ]
+    assert parsed.dtypes.unique().tolist() == [np.dtype("float32")]
+    np.testing.assert_array_equal(parsed.to_numpy(), df.to_numpy(dtype="f4"))
+    assert len(data) == FcsWriter(df).size
+
+
+def test_write_fcs_reagents_and_single_level_columns(df):
+    df.columns = df.columns.get_level_values(0)
+    _, parsed = roundtrip(df, reagents=["a", None, "c", ""])
+    assert parsed.columns.get_level_values(1).tolist() == ["a", "", "c", ""]
+    with pytest.raises(ValueError, match="one value per channel"):
+        FcsWriter(df, reagents=["a"])
+
+
+def test_write_fcs_headers(df):
+    headers = {
+        "P1D": "Linear,0,1000",
+        "$p2r": "1024",
+        "$TOT": "1",  # Ignored: set by the writer.
+        "$P3N": "X",  # Ignored: set by the writer.
+        "Custom": "a/b",
+    }
+    data, _ = roundtrip(df, headers=headers)
+    text = flowio.FlowData(io.BytesIO(data)).text
+    assert text["p1d"] == "Linear,0,1000"
+    assert text["p2r"] == "1024"
+    assert text["p1r"] == "262144"
+    assert text["tot"] == str(len(df))
+    assert text["p3n"] == "PE-A"
+    assert text["custom"] == "a/b"
+    assert b"/CUSTOM/a//b/" in data
+
+
+def test_write_fcs_chunks_and_empty(df):
+    writer = FcsWriter(df, chunk_bytes=1000)
+    chunks = list(writer.chunks())
+    assert len(chunks) > 100
+    assert sum(len(c) for c in chunks) == writer.size
+    assert writer.reader().read() == b"".join(chunks)
+
+    _, parsed = roundtrip(df.iloc[:0])
+    assert parsed.shape == (0, 4)
+
+
+def test_fcs_file_to_fcs(df, tmp_path):
+    fcs_file = FcsFile({"_id": "1", "filename": "orig.fcs", "annotations": []})
+    fcs_file._events = df
+    path = str(tmp_path / "out.fcs")
+    fcs_file.to_fcs(path, headers={"$P1D": "Linear,0,10"})
+    parsed = parse_fcs_file(path)
+    np.testing.assert_array_equal(parsed.to_numpy(), df.to_numpy(dtype="f4"))
+    text = flowio.FlowData(path).text
+    assert text["fil"] == "orig.fcs"
+    assert text["p1d"] == "Linear,0,10"
@@ -0,0 +1,125 @@
+import pytest
+
+from cellengine.resources.experiment import Experiment
+from cellengine.resources.gate import Gate, PartialGatesError, RectangleGate
+from local_server import LocalHandler, LocalServer
+
+EXP_ID = "5d38a6f79fae87499999a74b"
+SCALESET = {
+    "_id": "s1",
+    "experimentId": EXP_ID,
+    "name": "Scales",
+    "scales": [
+        {
+            "channelName": c,
+            "scale": {"type": "LinearScale", "minimum": 0, "maximum": 10},
+        }
+        for c in ("FSC-A", "SSC-A")
+    ],
+}
+
+
+class Handler(LocalHandler):
+    bodies: list
+    gets: list
+    failures: dict
+
+    def do_GET(self):
+        self.gets.append(self.path)
+        self._send(200, [SCALESET])
+
+    def do_POST(self):
+        body = self._json_body()
+        self.bodies.append(body)
+        names = {g.get("name") for g in body}
+        for name, remaining in self.failures.items():
+            if name in names and remaining:
+                self.failures[name] -= 1
+                return self._send(400, {"error": "Invalid gate."})
+        self._send(201, [dict(g, _id=f"id-{g['gid']}") for g in body])
+
+
+@pytest.fixture()
+def server(local_server) -> LocalServer:
+    return local_server(Handler, bodies=[], gets=[], failures={})
+
+
+@pytest.fixture()
+def experiment(server: LocalServer) -> Experiment:
+    return Experiment({"_id": EXP_ID}, server.client())
+
+
+def rectangles(n):
+    return [
+        {
+            "type": "RectangleGate",
+            "x_channel": "FSC-A",
+            "y_channel": "SSC-A",
+            "name": f"g{i}",
+            "x1": 1,
+            "x2": 2,
+            "y1": 1,
+            "y2": 2,
+        }
+        for i in range(n)
+    ]
+
+
+def test_create_gates_in_batches(server, experiment: Experiment):
+    gates = experiment.create_gates(rectangles(25), batch_size=10)
+    assert [g.name for g in gates] == [f"g{i}" for i in range(25)]
+    assert all(isinstance(g, RectangleGate) for g in gates)
+    assert sorted(len(b) for b in server.RequestHandlerClass.bodies) == [5, 10, 10]
+
+    gates = experiment.create_gates(rectangles(25), batch_size=None)
+    assert len(gates) == 25
+    assert len(server.RequestHandlerClass.bodies[-1]) == 25
+
+
+def test_create_gates_partial_failure(server, experiment: Experiment):
+    server.RequestHandlerClass.failures.update({"g12": 2})
+    with pytest.raises(PartialGatesError) as info:
+        experiment.create_gates(rectangles(25), batch_size=10, retries=1)
+    error = info.value
+    assert [g is None for g in error.gates] == [10 <= i < 20 for i in range(25)]
+    assert [g["name"] for g in error.failed_gates] == [f"g{i}" for i in range(10, 20)]
+    assert len(server.RequestHandlerClass.bodies) == 4  # Only g10-g19 retried.
+
+    gates = experiment.client.post_gates(EXP_ID, error.failed_gates)
+    assert [g.name for g in gates] == [f"g{i}" for i in range(10, 20)]
+
+
+def test_create_gates_retry(server, experiment: Experiment):
+    server.RequestHandlerClass.failures.update({"g3": 1, "g12": 1})
+    gates = experiment.create_gates(rectangles(25), batch_size=10, retries=1)
+    assert [g.name for g in gates] == [f"g{i}" for i in range(25)]
+
+    # If every batch fails, the first batch's error is raised.
+    server.RequestHandlerClass.failures.update({"g3": 1, "g12": 1, "g20": 1})
+    with pytest.raises(Exception, match="Invalid gate"):
+        experiment.create_gates(rectangles(25), batch_size=10)
+
+    # Gates that fit in one batch are retried too.
+    server.RequestHandlerClass.failures.update({"g3": 1})
+    gates = experiment.create_gates(rectangles(5), batch_size=None, retries=1)
+    assert len(gates) == 5
+
+
+def test_create_many_fetches_scaleset_once(server, experiment: Experiment):
+    gates = [
+        {
+            "experiment_id": EXP_ID,
+            "type": "QuadrantGate",
+            "x_channel": "FSC-A",
+            "y_channel": "SSC-A",
+            "name": f"q{i}",
+            "x": 5,
+            "y": 5,
+        }
+        for i in range(5)
+    ]
+    with experiment.client.use():
+        created = Gate.create_many(gates, batch_size=2)
+    assert len(created) == 5
+    assert len(server.RequestHandlerClass.gets) == 1
+    assert created[0].model["labels"][0] == [1e38, 1e38]
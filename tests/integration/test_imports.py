@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import pytest
+
+import cellengine
+
+
+HEAVY_MODULES = ["pandas", "numpy", "flowio", "requests_toolbelt", "PIL"]
+
+
+def loaded_modules(code: str):
+    """Runs `code` in a fresh interpreter and returns the heavy modules that
+    were imported."""
+    check = f"import sys; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    out = subprocess.run(
+        [sys.executable, "-c", f"{code}\n{check}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return eval(out.stdout)
+
+
+def test_import_does_not_load_heavy_dependencies():
+    assert loaded_modules("import cellengine") == []
+
+
+def test_accessing_resources_does_not_load_heavy_dependencies():
+    code = "import cellengine\n" + "\n".join(
+        f"cellengine.{name}" for name in cellengine.__all__
+    )
+    assert loaded_modules(code) == []
+
+
+def test_heavy_dependencies_load_when_used():
+    code = (
+        "import cellengine\n"
+        "cellengine.Compensation({'channels': ['a'], 'spillMatrix': [1]}).dataframe"
+    )
+    assert set(loaded_modules(code)) >= {"pandas", "numpy"}
+
+
+def test_lazy_attributes():
+    from cellengine import APIClient, Experiment
+    from cellengine.resources.experiment import Experiment as _Experiment
+
+    assert Experiment is _Experiment
+    assert APIClient is cellengine.APIClient
+    assert set(cellengine.__all__) <= set(dir(cellengine))
+    with pytest.raises(AttributeError, match="NotAResource"):
+        cellengine.NotAResource
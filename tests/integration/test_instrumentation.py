@@ -0,0 +1,103 @@
+import pytest
+
+from cellengine.utils.api_client.APIClient import APIClient
+from cellengine.utils.api_client.Instrumentation import (
+    RequestEvent,
+    RequestHook,
+    RequestStats,
+    endpoint_for_url,
+)
+from local_server import LocalHandler
+
+
+EXP_ID = "5d38a6f79fae87499999a74b"
+
+
+class Handler(LocalHandler):
+    def do_GET(self):
+        if self.path.startswith("/api/v1/experiments/missing"):
+            self._send(404, {"error": "Not found"})
+        else:
+            self._send(200, [{"_id": EXP_ID, "name": "exp"}])
+
+
+@pytest.fixture()
+def local_client(local_server) -> APIClient:
+    return local_server(Handler).client()
+
+
+def test_endpoint_for_url():
+    assert (
+        endpoint_for_url(
+            f"https://cellengine.com/api/v1/experiments/{EXP_ID}/fcsfiles/"
+            "5d38a7159fae87499999a74e.fcs?populationId=5d38a7159fae87499999a74f"
+        )
+        == "/api/v1/experiments/{id}/fcsfiles/{id}.fcs"
+    )
+
+
+def test_hooks_receive_request_events(local_client: APIClient):
+    events = []
+
+    class Recorder(RequestHook):
+        def on_request_start(self, event: RequestEvent):
+            events.append(("start", event.duration))
+
+        def on_request_end(self, event: RequestEvent):
+            events.append(("end", event))
+
+    local_client.add_hook(Recorder())
+    local_client.get_experiments()
+
+    assert events[0] == ("start", None)
+    end = events[1][1]
+    assert end.method == "GET"
+    assert end.endpoint == "/api/v1/experiments"
+    assert end.endpoint_class == "metadata"
+    assert end.status_code == 200
+    assert end.bytes_received > 0
+    assert end.duration > 0
+    assert end.retries == 0
+
+
+def test_hook_errors_do_not_break_requests(local_client: APIClient):
+    class Broken(RequestHook):
+        def on_request_end(self, event):
+            raise RuntimeError("oops")
+
+    local_client.add_hook(Broken())
+    with pytest.warns(UserWarning, match="oops"):
+        assert len(local_client.get_experiments()) == 1
+
+
+def test_request_stats_summary(local_client: APIClient):
+    stats = RequestStats()
+    local_client.add_hook(stats)
+    for _ in range(5):
+        local_client.get_experiments()
+    with pytest.raises(Exception):
+        local_client.get_experiment(_id="missing")
+    local_client._emit_cache_hit("GET", f"{local_client.base_url}/api/v1/experiments")
+
+    summary = stats.summary()
+    row = summary.loc[("GET", "/api/v1/experiments")]
+    assert row["count"] == 6
+    assert row["cache_hits"] == 1
+    assert row["errors"] == 0
+    assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+    assert summary.loc[("GET", "/api/v1/experiments/missing")]["errors"] == 1
+
+
+def test_request_stats_memory_is_bounded():
+    stats = RequestStats(max_samples=10)
+    for i in range(100):
+        event = RequestEvent("GET", "url", "/x", "metadata", duration=i / 1000)
+        event.bytes_received = 10
+        stats.on_request_end(event)
+    row = stats.summary().loc[("GET", "/x")]
+    assert row["count"] == 100
+    assert row["bytes_received"] == 1000
+    assert row["mean_ms"] == pytest.approx(49.5)
+    # Percentiles of the 10 most recent requests.
+    assert row["p50_ms"] == pytest.approx(94.5)
+    assert len(stats._stats[("GET", "/x")].latencies) == 10
@@ -0,0 +1,189 @@
+import os
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from cellengine.resources.experiment import Experiment
+from cellengine.resources.plot import Plot
+from cellengine.utils.api_client.PlotCache import PlotCache
+from cellengine.utils.api_client.APIClient import APIClient
+from local_server import LocalHandler, LocalServer
+
+EXP_ID = "5d38a6f79fae87499999a74b"
+
+
+class Handler(LocalHandler):
+    queries: list
+
+    def do_GET(self):
+        query = {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        self.queries.append(query)
+        status = 404 if query["fcsFileId"] == "bad" else 200
+        data = f"PNG {query['fcsFileId']} {query.get('width')}"
+        self._send(status, data, "image/png")
+
+
+@pytest.fixture()
+def server(local_server) -> LocalServer:
+    return local_server(Handler, queries=[])
+
+
+@pytest.fixture()
+def client(server: LocalServer) -> APIClient:
+    return server.client()
+
+
+def specs(n):
+    return [
+        {
+            "fcs_file_id": "bad" if i == 3 else f"f{i}",
+            "plot_type": "dot",
+            "x_channel": "FSC-A",
+            "y_channel": "530/30-A",
+            "population_id": None if i % 2 else "p1",
+            "width": 100 + i,
+        }
+        for i in range(n)
+    ]
+
+
+def test_get_plots(server, client: APIClient):
+    experiment = Experiment({"_id": EXP_ID}, client)
+    results = dict(experiment.get_plots(specs(6), max_workers=3))
+    assert sorted(results) == list(range(6))
+    assert isinstance(results[3], Exception)
+    plot = results[4]
+    assert isinstance(plot, Plot)
+    assert plot.fcs_file_id == "f4"
+    assert plot.population_id == "p1"
+    assert plot.data == b"PNG f4 104"
+    assert {q["width"] for q in server.RequestHandlerClass.queries} == {
+        str(100 + i) for i in range(6)
+    }
+
+
+def test_get_plots_to_directory(server, client: APIClient, tmp_path):
+    directory = str(tmp_path / "plots")
+    named = specs(2)
+    named[1]["filename"] = "second.png"
+    results = dict(client.get_plots(EXP_ID, named, directory=directory))
+    assert results[0].data == b""
+    assert results[0].path == os.path.join(directory, "f0_p1_dot_FSC-A_530_30-A.png")
+    assert sorted(os.listdir(directory)) == [
+        "f0_p1_dot_FSC-A_530_30-A.png",
+        "second.png",
+    ]
+    copy = str(tmp_path / "copy.png")
+    results[1].save(copy)
+    assert open(copy, "rb").read() == b"PNG f1 101"
+
+
+def test_plot_cache(server, tmp_path):
+    deep_updated = ["2024-01-01T00:00:00.000Z"]
+
+    class CacheHandler(server.RequestHandlerClass):
+        def do_GET(self):
+            if self.path.endswith(EXP_ID):
+                self._send(200, {"_id": EXP_ID, "deepUpdated": deep_updated[0]})
+            else:
+                super().do_GET()
+
+    server.RequestHandlerClass = CacheHandler
+    cache = PlotCache(str(tmp_path / "cache"))
+    client = server.client(plot_cache=cache)
+    queries = server.RequestHandlerClass.queries
+
+    first = dict(client.get_plots(EXP_ID, specs(3)))
+    assert len(queries) == 3
+    second = dict(client.get_plots(EXP_ID, specs(3)))
+    assert len(queries) == 3
+    assert cache.hits == 3
+    assert {i: p.data for i, p in second.items()} == {
+        i: p.data for i, p in first.items()
+    }
+    plot = client.get_plot(
+        EXP_ID, "f0", "dot", "FSC-A", "530/30-A", None, "p1", properties={"width": 100}
+    )
+    assert len(queries) == 3
+    assert plot.data == first[0].data
+
+    # Any change to the experiment invalidates the cached plots.
+    deep_updated[0] = "2024-01-02T00:00:00.000Z"
+    client.get_plots(EXP_ID, specs(1)).__next__()
+    assert len(queries) == 4
+
+
+def test_plot_cache_eviction(tmp_path):
+    path = str(tmp_path)
+    cache = PlotCache(path, max_bytes=25)
+    keys = [PlotCache.key(EXP_ID, "t", {"fcsFileId": f"f{i}"}) for i in range(3)]
+    assert PlotCache.key(EXP_ID, "t", {"width": 200, "zChannel": None}) == (
+        PlotCache.key(EXP_ID, "t", {"width": "200"})
+    )
+    cache.put(keys[0], b"0" * 10)
+    cache.put(keys[1], b"1" * 10)
+    assert cache.get(keys[0]) == b"0" * 10
+    cache.put(keys[2], b"2" * 10)
+    assert cache.get(keys[1]) is None
+    assert cache.size == 20
+    assert sorted(os.listdir(path)) == sorted(f"{k}.png" for k in keys[::2])
+
+    # Another cache on the same directory sees the images and its size limit.
+    assert PlotCache(path, max_bytes=15).size == 10
+    assert len(os.listdir(path)) == 1
+
+
+def png(color, size=(40, 30)) -> bytes:
+    Image = pytest.importorskip("PIL.Image")
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_plot(data: bytes) -> Plot:
+    return Plot(EXP_ID, "f1", "FSC-A", "SSC-A", None, "dot", None, 0, data)
+
+
+def test_plot_display_decodes_once(tmp_path):
+    red = png("red")
+    a, b = make_plot(red), make_plot(red)
+    assert a.display() is b.display()
+    assert a.display().size == (40, 30)
+
+    thumb = a.display(thumbnail=(20, 20))
+    assert thumb.size == (20, 15)
+    assert a.display(thumbnail=(20, 20)) is thumb
+    assert b.display(thumbnail=(20, 20), release_data=True) is thumb
+    assert b.data == b""
+    b.save(str(tmp_path / "b.png"))
+    assert make_plot(open(tmp_path / "b.png", "rb").read()).display().size == (20, 15)
+
+
+def test_plot_thumbnail_after_release_data(tmp_path):
+    plot = make_plot(png("blue", (100, 80)))
+    assert plot.display(release_data=True).size == (100, 80)
+    assert plot.data == b""
+    assert plot.display(thumbnail=(64, 64)).size == (64, 51)
+    assert plot.display().size == (100, 80)
+    grid = Plot.montage([plot], thumbnail=(32, 32), padding=0)
+    assert grid.size == (32, 26)
+    plot.display(thumbnail=(10, 10))
+    plot.save(str(tmp_path / "plot.png"))
+    saved = make_plot(open(tmp_path / "plot.png", "rb").read())
+    assert saved.display().size == (100, 80)
+
+
+def test_plot_montage():
+    plots = [make_plot(png(c)) for c in ("red", "green", "blue")]
+    plots.append(make_plot(png("red", (20, 30))))
+    grid = Plot.montage(plots, padding=2)
+    assert grid.size == (2 + 2 * 42, 2 + 2 * 32)
+    assert grid.getpixel((2, 2)) == (255, 0, 0, 255)
+    assert grid.getpixel((44, 2)) == (0, 128, 0, 255)
+    # Smaller plots are centered in their cells.
+    assert grid.getpixel((44, 34)) == (255, 255, 255, 255)
+    assert grid.getpixel((64, 40)) == (255, 0, 0, 255)
+
+    grid = Plot.montage(plots, columns=4, thumbnail=(10, 10), padding=0)
+    assert grid.size == (40, 10)
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+from cellengine.resources.fcs_file import FcsFile
+from cellengine.utils.plot_renderer import parse_color, render_plot, render_plots
+
+RED = [255, 0, 0, 255]
+
+
+@pytest.fixture(scope="module")
+def events():
+    rng = np.random.default_rng(0)
+    values = np.column_stack(
+        [
+            rng.normal(50, 10, 20_000),
+            rng.normal(30, 5, 20_000),
+            rng.uniform(size=20_000),
+        ]
+    ).astype("f4")
+    return DataFrame(values, columns=[["FSC-A", "SSC-A", "CD3"], ["", "", "Foo"]])
+
+
+def test_parse_color():
+    assert parse_color("#f00") == (255, 0, 0, 255)
+    assert parse_color("#00ff0080") == (0, 255, 0, 128)
+    with pytest.raises(ValueError, match="not a valid color"):
+        parse_color("#ggg")
+
+
+@pytest.mark.parametrize("plot_type", ["dot", "density", "contour", "histogram"])
+def test_render_plot_types(events, plot_type):
+    image = render_plot(
+        events,
+        plot_type,
+        "FSC-A",
+        "SSC-A",
+        width=120,
+        height=80,
+        smoothing=1,
+        format="rgba",
+    )
+    assert image.shape == (80, 120, 4)
+    assert image.dtype == np.uint8
+    drawn = (image[..., :3] != 255).any(axis=-1)
+    assert 0 < drawn.sum() < 120 * 80
+
+
+@pytest.mark.parametrize("plot_type", ["dot", "density", "contour"])
+def test_render_plot_empty_population(events, plot_type):
+    image = render_plot(
+        events,
+        plot_type,
+        "FSC-A",
+        "SSC-A",
+        width=120,
+        height=80,
+        mask=np.zeros(len(events), dtype=bool),
+        format="rgba",
+    )
+    assert (image[..., :3] == 255).all()
+
+
+def test_render_tailored_gates():
+    events = {"x": np.array([0.0, 100]), "y": np.array([0.0, 100])}
+
+    def gate(x1, fcs_file_id=None, gid="g1"):
+        return {
+            "type": "RectangleGate",
+            "gid": gid,
+            "fcsFileId": fcs_file_id,
+            "xChannel": "x",
+            "yChannel": "y",
+            "model": {"rectangle": {"x1": x1, "x2": 90, "y1": 10, "y2": 90}},
+        }
+
+    gates = [gate(10), gate(20, "f1"), gate(30, "f2"), gate(40, "f3", gid="g2")]
+
+    def left_edges(fcs_file_id):
+        image = render_plot(
+            events,
+            "dot",
+            "x",
+            "y",
+            width=100,
+            height=100,
+            gates=gates,
+            fcs_file_id=fcs_file_id,
+            format="rgba",
+        )
+        red = (image == RED).all(axis=-1)
+        return [x for x in (10, 20, 30, 40) if red[50, x]]
+
+    assert left_edges("f1") == [20]
+    assert left_edges("f3") == [10, 40]
+    assert left_edges(None) == [10]
+
+
+def test_render_dot_pixels():
+    events = {"x": np.array([0, 1, 2, 3]), "y": np.array([0, 1, 2, 3])}
+    image = render_plot(events, "dot", "x", "y", width=4, height=4, format="rgba")
+    # One event per pixel along the diagonal, with y increasing upwards.
+    drawn = (image[..., :3] == 0).all(axis=-1)
+    np.testing.assert_array_equal(drawn, np.eye(4, dtype=bool)[::-1])
+
+    masked = render_plot(
+        events, "dot", "x", "y", width=4, height=4, mask=[0, 3], format="rgba"
+    )
+    assert (masked[..., :3] == 0).all(axis=-1).sum() == 2
+
+
+def test_render_gates():
+    events = {"x": np.array([0.0, 100]), "y": np.array([0.0, 100])}
+    gates = [
+        {
+            "type": "RectangleGate",
+            "xChannel": "x",
+            "yChannel": "y",
+            "model": {"rectangle": {"x1": 25, "x2": 75, "y1": 25, "y2": 75}},
+        },
+        {
+            "type": "RectangleGate",
+            "xChannel": "other",
+            "yChannel": "y",
+            "model": {"rectangle": {"x1": 0, "x2": 100, "y1": 0, "y2": 100}},
+        },
+    ]
+    image = render_plot(
+        events, "dot", "x", "y", width=100, height=100, gates=gates, format="rgba"
+    )
+    red = (image == RED).all(axis=-1)
+    assert red[24, 25:75].all() and red[74, 25:75].all()
+    assert red[25:75, 25].all() and red[25:75, 75].all()
+    assert not red[50, 50] and not red[0, :].any()
+
+    split = {
+        "type": "SplitGate",
+        "xChannel": "x",
+        "model": {"split": {"x": 50, "y": 0.5}},
+    }
+    image = render_plot(
+        events, "histogram", "x", width=100, height=100, gates=[split], format="rgba"
+    )
+    assert (image[:, 50] == RED).all(axis=-1).all()
+
+
+def test_render_plots(events):
+    jobs = [
+        dict(events=events, plot_type=t, x_channel="FSC-A", y_channel="SSC-A")
+        for t in ("dot", "density")
+    ]
+    jobs = [dict(job, width=50, height=40, format="rgba") for job in jobs]
+    images = render_plots(jobs, max_workers=2)
+    np.testing.assert_array_equal(images[1], render_plot(**jobs[1]))
+
+
+def test_fcs_file_render_plot(events):
+    pytest.importorskip("PIL")
+    fcs_file = FcsFile(
+        {"_id": "f1", "experimentId": "e1", "filename": "a.fcs", "annotations": []}
+    )
+    fcs_file._events = events
+    plot = fcs_file.render_plot("dot", "FSC-A", "SSC-A", z_channel="CD3")
+    assert plot.data.startswith(b"\x89PNG")
+    assert plot.population_id is None
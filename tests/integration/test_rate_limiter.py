@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from cellengine.utils.api_client.RateLimiter import (
+    RateLimiter,
+    TokenBucket,
+    classify_endpoint,
+)
+
+
+BASE = "https://cellengine.com/api/v1/experiments/5d38a6f79fae87499999a74b"
+ID = "5d38a7159fae87499999a74e"
+
+
+def test_classify_endpoint():
+    assert classify_endpoint("GET", f"{BASE}/fcsfiles/{ID}.fcs") == "events"
+    assert classify_endpoint("POST", f"{BASE}/fcsfiles") == "events"
+    assert classify_endpoint("GET", f"{BASE}/attachments/{ID}") == "events"
+    assert classify_endpoint("GET", f"{BASE}/fcsfiles") == "metadata"
+    assert classify_endpoint("PATCH", f"{BASE}/fcsfiles/{ID}") == "metadata"
+    assert classify_endpoint("POST", f"{BASE}/bulkstatistics") == "statistics"
+    assert classify_endpoint("GET", f"{BASE}/plot?fcsFileId={ID}") == "plots"
+    assert classify_endpoint("GET", f"{BASE}/gates") == "metadata"
+
+
+def test_token_bucket_throttles_after_burst():
+    bucket = TokenBucket(rate=50, burst=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() > 0
+
+
+def test_rate_limiter_bounds_in_flight_requests():
+    limiter = RateLimiter(max_in_flight=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with limiter.limit("metadata"):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    assert max(peak) == 2
+    stats = limiter.stats["metadata"]
+    assert stats["requests"] == 6
+    assert stats["throttled"] > 0
+    assert stats["throttled_seconds"] > 0
+
+
+def test_rate_limiter_per_class_limits():
+    limiter = RateLimiter()
+    limiter.configure("events", rate=50, burst=1)
+    with limiter.limit("metadata"):
+        pass
+    with limiter.limit("events"):
+        pass
+    with limiter.limit("events"):
+        pass
+    assert limiter.stats["metadata"]["throttled"] == 0
+    assert limiter.stats["events"]["throttled"] == 1
+
+    with pytest.raises(ValueError):
+        limiter.configure("nope", rate=1)
+
+
+def test_rate_limiter_from_env(monkeypatch):
+    monkeypatch.setenv("CELLENGINE_MAX_IN_FLIGHT", "3")
+    monkeypatch.setenv("CELLENGINE_RATE_LIMIT_EVENTS", "5")
+    limiter = RateLimiter.from_env()
+    assert limiter._global.semaphore is not None
+    assert limiter._classes["events"].bucket.rate == 5
@@ -0,0 +1,361 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cellengine.utils.api_client.APIClient import APIClient
+from cellengine.utils.api_client.Instrumentation import RequestStats
+from cellengine.utils.api_client.StatisticsCache import StatisticsCache
+from cellengine.utils.statistics import (
+    STATISTICS_BATCH_SIZE,
+    PartialStatisticsError,
+    batch_ids,
+    concat_statistics,
+    pivot_statistics,
+    read_statistics_tsv,
+)
+from local_server import LocalHandler, LocalServer
+
+EXP_ID = "5d38a6f79fae87499999a74b"
+FILES = [
+    {"_id": f"f{i}", "isControl": i == 9, "annotations": [{"name": "n", "value": i}]}
+    for i in range(10)
+]
+
+
+class Handler(LocalHandler):
+    bodies: list
+    gets: list
+    deep_updated = "2024-01-01T00:00:00.000Z"
+
+    def do_GET(self):
+        self.gets.append(self.path)
+        if self.path.endswith(EXP_ID):
+            return self._send(200, {"_id": EXP_ID, "deepUpdated": self.deep_updated})
+        self._send(200, FILES)
+
+    def do_POST(self):
+        body = self._json_body()
+        self.bodies.append(body)
+        files = body.get("fcsFileIds", [f["_id"] for f in FILES if not f["isControl"]])
+        if "f6" in files and body["format"] == "json":
+            return self._send(500, {"error": "Timed out."})
+        rows = [
+            {"fcsFileId": f, "populationId": p, "mean": 1.0}
+            for f in files
+            for p in body.get("populationIds", [None])
+        ]
+        if body.get("layout") == "short-wide":
+            pops = body.get("populationIds", [None])
+            lines = ["\t".join(["fcsFileId"] + [f"{p} mean" for p in pops])]
+            lines += ["\t".join([f] + ["1"] * len(pops)) for f in files]
+            return self._send(200, "\n".join(lines) + "\n", "text/plain")
+        if body["format"] == "TSV (with header)":
+            lines = ["fcsFileId\tpopulationId\tplate\tmean"]
+            lines += [f"{r['fcsFileId']}\t{r['populationId']}\tA\t1" for r in rows]
+            return self._send(200, "\n".join(lines) + "\n", "text/plain")
+        self._send(200, rows)
+
+
+@pytest.fixture()
+def server(local_server) -> LocalServer:
+    return local_server(Handler, bodies=[], gets=[])
+
+
+@pytest.fixture()
+def client(server: LocalServer) -> APIClient:
+    return server.client()
+
+
+def test_batch_ids():
+    files = [f"f{i}" for i in range(5)]
+    assert batch_ids(files, ["a", "b"], 4) == [
+        (["f0", "f1"], ["a", "b"]),
+        (["f2", "f3"], ["a", "b"]),
+        (["f4"], ["a", "b"]),
+    ]
+    assert batch_ids(files[:2], ["a", "b", "c"], 2) == [
+        (["f0"], ["a", "b"]),
+        (["f0"], ["c"]),
+        (["f1"], ["a", "b"]),
+        (["f1"], ["c"]),
+    ]
+    assert batch_ids(files[:2], ["a", "b", "c"], 2, split_populations=False) == [
+        (["f0"], ["a", "b", "c"]),
+        (["f1"], ["a", "b", "c"]),
+    ]
+    assert batch_ids(files[:3], [], 2) == [(["f0", "f1"], [None]), (["f2"], [None])]
+    header = "a\tb\n"
+    assert concat_statistics(
+        [header + "1\t2", header + "3\t4\n"], "TSV (with header)"
+    ) == (header + "1\t2\n3\t4\n")
+
+
+def test_get_statistics_batches(server, client: APIClient):
+    stats = client.get_statistics(
+        EXP_ID,
+        ["mean"],
+        ["FSC-A"],
+        fcs_file_ids=["f0", "f1", "f2", "f3", "f4"],
+        population_ids=["p1", "p2"],
+        format="pandas",
+        batch_size=4,
+        max_workers=2,
+    )
+    assert len(server.RequestHandlerClass.bodies) == 3
+    assert stats["fcsFileId"].tolist() == [f"f{i}" for i in range(5) for _ in "12"]
+    assert stats.index.tolist() == list(range(10))
+
+    tsv = client.get_statistics(
+        EXP_ID, ["mean"], ["FSC-A"], format="TSV (with header)", batch_size=3
+    )
+    lines = tsv.splitlines()
+    assert lines[0] == "fcsFileId\tpopulationId\tplate\tmean"
+    # All non-control files, listed because fcs_file_ids was omitted.
+    assert [line.split("\t")[0] for line in lines[1:]] == [f"f{i}" for i in range(9)]
+
+
+def test_get_statistics_lists_files_to_batch(server, client: APIClient):
+    handler = server.RequestHandlerClass
+
+    def get(**kwargs):
+        return client.get_statistics(
+            EXP_ID, ["mean"], ["FSC-A"], format="pandas-typed", **kwargs
+        )
+
+    stats = get(population_ids=["p1"])
+    assert len(handler.gets) == 1
+    # Unbatched, the files are left to the server.
+    assert len(handler.bodies) == 1
+    assert "fcsFileIds" not in handler.bodies[0]
+    assert len(stats) == 9
+
+    # Fewer populations than a batch still need splitting over many files.
+    pops = [f"p{i}" for i in range(STATISTICS_BATCH_SIZE // 5)]
+    stats = get(population_ids=pops)
+    assert len(handler.gets) == 2
+    assert sorted(b["fcsFileIds"] for b in handler.bodies[1:]) == [
+        [f"f{i}" for i in range(5)],
+        [f"f{i}" for i in range(5, 9)],
+    ]
+    assert len(stats) == 9 * len(pops)
+
+    get(batch_size=None)
+    assert len(handler.gets) == 2
+    assert "fcsFileIds" not in handler.bodies[-1]
+
+
+def test_get_statistics_layouts_split_populations(server, client: APIClient):
+    def get(layout):
+        return client.get_statistics(
+            EXP_ID,
+            ["mean"],
+            ["FSC-A"],
+            fcs_file_ids=["f0", "f1"],
+            population_ids=["p1", "p2", "p3"],
+            format="TSV (with header)",
+            layout=layout,
+            batch_size=2,
+        )
+
+    # Rows span a file's populations, so they are batched by whole files.
+    assert get("short-wide").splitlines() == [
+        "fcsFileId\tp1 mean\tp2 mean\tp3 mean",
+        "f0\t1\t1\t1",
+        "f1\t1\t1\t1",
+    ]
+    bodies = server.RequestHandlerClass.bodies
+    assert sorted((b["fcsFileIds"], b["populationIds"]) for b in bodies) == [
+        (["f0"], ["p1", "p2", "p3"]),
+        (["f1"], ["p1", "p2", "p3"]),
+    ]
+
+    # Tall-skinny rows are per population, which can be split.
+    rows = get("tall-skinny").splitlines()[1:]
+    assert [tuple(row.split("\t")[:2]) for row in rows] == [
+        (f, p) for f in ["f0", "f1"] for p in ["p1", "p2", "p3"]
+    ]
+    assert len(bodies) == 6
+
+
+def test_get_statistics_partial_failure(server, client: APIClient):
+    with pytest.raises(PartialStatisticsError) as error:
+        client.get_statistics(EXP_ID, ["mean"], ["FSC-A"], format="json", batch_size=2)
+    assert [row["fcsFileId"] for row in error.value.result] == [
+        "f0",
+        "f1",
+        "f2",
+        "f3",
+        "f4",
+        "f5",
+        "f8",
+    ]
+    [(batch, cause)] = error.value.failures
+    assert batch == {"fcsFileIds": ["f6", "f7"], "populationIds": [None]}
+    assert "500" in str(cause)
+
+    # A single, unbatched request raises its error directly.
+    with pytest.raises(Exception, match="500"):
+        client.get_statistics(
+            EXP_ID, ["mean"], ["FSC-A"], fcs_file_ids=["f6"], format="json"
+        )
+
+
+def test_read_statistics_tsv():
+    data = b"fcsFileId\tchannel\tplate\tmean\teventCount\nf1\tNA\tA\t1.5\t3\nf2\t\tA\t\t4\n"
+    df = read_statistics_tsv(data)
+    assert df.dtypes.astype(str).tolist() == [
+        "category",
+        "category",
+        "category",
+        "float64",
+        "float64",
+    ]
+    assert df["channel"].tolist()[0] == "NA"
+    assert df["mean"].isna().tolist() == [False, True]
+
+
+def test_get_statistics_typed_formats(server, client: APIClient):
+    kwargs = dict(fcs_file_ids=["f0", "f1", "f2"], batch_size=2)
+    df = client.get_statistics(
+        EXP_ID, ["mean"], ["FSC-A"], format="pandas-typed", **kwargs
+    )
+    assert df["fcsFileId"].dtype == "category"
+    assert df["fcsFileId"].tolist() == ["f0", "f1", "f2"]
+    assert df["mean"].dtype == "float64"
+
+    pa = pytest.importorskip("pyarrow")
+    table = client.get_statistics(EXP_ID, ["mean"], ["FSC-A"], format="arrow", **kwargs)
+    assert table.column("fcsFileId").to_pylist() == ["f0", "f1", "f2"]
+    assert pa.types.is_dictionary(table.schema.field("fcsFileId").type)
+    assert table.schema.field("mean").type == pa.float64()
+    assert [b["format"] for b in server.RequestHandlerClass.bodies] == [
+        "TSV (with header)"
+    ] * 4
+
+
+def test_statistics_cache(server, client: APIClient, tmp_path):
+    client.statistics_cache = StatisticsCache(max_entries=2, path=str(tmp_path))
+    stats = RequestStats()
+    client.add_hook(stats)
+    handler = server.RequestHandlerClass
+
+    def get(**kwargs):
+        return client.get_statistics(
+            EXP_ID, ["mean"], ["FSC-A"], format="pandas-typed", batch_size=4, **kwargs
+        )
+
+    first = get()
+    assert len(handler.bodies) == 3
+    first.loc[0, "mean"] = 100  # Results are copies, not the cached objects.
+    second = get()
+    assert len(handler.bodies) == 3
+    assert second["mean"].tolist() == [1.0] * 9
+    assert handler.gets[-1].endswith(EXP_ID)
+    assert stats.summary()["cache_hits"].sum() == 4
+
+    # A different request, or any change to the experiment, misses.
+    get(population_ids=["p1"])
+    assert len(handler.bodies) == 6
+    handler.deep_updated = "2024-01-02T00:00:00.000Z"
+    get()
+    assert len(handler.bodies) == 9
+
+    # The disk cache outlives the memory cache and the process.
+    client.statistics_cache = StatisticsCache(path=str(tmp_path))
+    get()
+    assert len(handler.bodies) == 9
+    client.statistics_cache.clear()
+    get()
+    assert len(handler.bodies) == 12
+
+
+def test_pivot_statistics():
+    tall = pd.DataFrame(
+        {
+            "fcsFileId": ["f1"] * 4 + ["f2"] * 3,
+            "filename": ["a.fcs"] * 4 + ["b.fcs"] * 3,
+            "uniquePopulationName": ["P", "P", "P", None, "P", "P", "P"],
+            "channel": ["FSC", "FSC", "SSC", "FSC", "FSC", "FSC", "SSC"],
+            "statistic": ["mean", "eventCount", "mean", "eventCount"] + ["mean"] * 3,
+            "value": np.arange(7.0),
+        }
+    ).astype({"fcsFileId": "category", "channel": "category"})
+    files = [{"_id": "f2", "annotations": [{"name": "plate", "value": "A"}]}]
+    wide = pivot_statistics(tall, files)
+    assert wide.index.names == ["fcsFileId", "filename", "plate"]
+    assert wide.index.get_level_values("filename").tolist() == ["a.fcs", "b.fcs"]
+    assert wide.index.get_level_values("plate").fillna("").tolist() == ["", "A"]
+    assert wide.columns.tolist() == [
+        ("P", "FSC", "mean"),
+        ("P", "", "eventCount"),
+        ("P", "SSC", "mean"),
+        ("Ungated", "", "eventCount"),
+    ]
+    np.testing.assert_array_equal(
+        wide.to_numpy(), [[0, 1, 2, 3], [5, np.nan, 6, np.nan]]
+    )
+
+    medium = pd.DataFrame(
+        {
+            "fcsFileId": ["f1", "f1", "f2"],
+            "population": ["P", "P", "P"],
+            "channel": ["FSC", "SSC", "FSC"],
+            "mean": [1.0, 2.0, 3.0],
+            "eventCount": [10.0, 10.0, 20.0],
+        }
+    )
+    wide = pivot_statistics(medium)
+    assert wide.index.tolist() == ["f1", "f2"]
+    assert wide[("P", "", "eventCount")].tolist() == [10, 20]
+    assert wide[("P", "SSC", "mean")].isna().tolist() == [False, True]
+
+
+def test_pivot_statistics_percent_of():
+    tall = pd.DataFrame(
+        {
+            "fcsFileId": ["f1"] * 3,
+            "population": ["P"] * 3,
+            "channel": ["FSC"] * 3,
+            "statistic": ["percent", "percent", "mean"],
+            "percentOf": ["Ungated", "Q", "Ungated"],
+            "value": [10.0, 50.0, 3.0],
+        }
+    )
+    wide = pivot_statistics(tall)
+    assert wide.columns.names == ["population", "channel", "statistic", "percentOf"]
+    assert wide.columns.tolist() == [
+        ("P", "", "percent", "Ungated"),
+        ("P", "", "percent", "Q"),
+        ("P", "FSC", "mean", ""),
+    ]
+    assert wide.to_numpy().tolist() == [[10, 50, 3]]
+
+
+def test_get_statistics_wide(server, client: APIClient):
+    wide = client.get_statistics(
+        EXP_ID,
+        ["mean"],
+        ["FSC-A"],
+        fcs_file_ids=["f0", "f1", "f2"],
+        population_ids=["p1", "p2"],
+        annotations=True,
+        format="wide",
+        batch_size=2,
+    )
+    assert wide.index.tolist() == [("f0", 0), ("f1", 1), ("f2", 2)]
+    assert wide.columns.tolist() == [
+        ("p1", "", "mean"),
+        ("p2", "", "mean"),
+    ]
+    assert (wide.to_numpy() == 1).all()
+    bodies = server.RequestHandlerClass.bodies
+    assert {(b["layout"], b["annotations"]) for b in bodies} == {("tall-skinny", False)}
+
+    # The files listed for their annotations are also the ones batched.
+    gets = server.RequestHandlerClass.gets
+    gets.clear()
+    wide = client.get_statistics(
+        EXP_ID, ["mean"], ["FSC-A"], annotations=True, format="wide", batch_size=4
+    )
+    assert len(wide) == 9
+    assert len(gets) == 1
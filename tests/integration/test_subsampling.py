@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from cellengine.utils.subsampling import (
+    stratified_subsample,
+    subsample,
+    subsample_populations,
+)
+
+
+def test_subsample():
+    idx = subsample(1000, n=100, seed=1)
+    assert len(idx) == len(np.unique(idx)) == 100
+    assert (np.diff(idx) > 0).all()
+    np.testing.assert_array_equal(idx, subsample(1000, n=100, seed=1))
+    assert not np.array_equal(idx, subsample(1000, n=100, seed=2))
+    assert len(subsample(1000, p=0.25, seed=1)) == 250
+    np.testing.assert_array_equal(subsample(10, n=20), np.arange(10))
+    rng = np.random.default_rng(0)
+    assert len(subsample(10, n=5, seed=rng)) == 5
+    with pytest.raises(ValueError, match="exactly one"):
+        subsample(10, n=1, p=0.1)
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        subsample(10, p=2)
+
+
+def test_subsample_populations():
+    mask = np.zeros(1000, dtype=bool)
+    mask[::2] = True
+    populations = {"a": mask, "b": np.array([9, 3, 7, 1])}
+    result = subsample_populations(populations, n=50, seed=3)
+    assert len(result["a"]) == 50
+    assert (result["a"] % 2 == 0).all()
+    np.testing.assert_array_equal(result["b"], [1, 3, 7, 9])
+    # A population's subsample doesn't depend on the other populations.
+    alone = subsample_populations({"a": mask, "b": np.arange(3)}, n=50, seed=3)
+    np.testing.assert_array_equal(alone["a"], result["a"])
+
+    from_rng = subsample_populations(populations, n=50, seed=np.random.default_rng(3))
+    assert len(from_rng["a"]) == 50
+    again = subsample_populations(populations, n=50, seed=np.random.default_rng(3))
+    np.testing.assert_array_equal(again["a"], from_rng["a"])
+
+
+def test_stratified_subsample():
+    labels = np.repeat(["f2", "f1", "f3"], [100, 10, 50])
+    idx = stratified_subsample(labels, n=20, seed=0)
+    assert sorted(np.unique(labels[idx], return_counts=True)[1]) == [10, 20, 20]
+    np.testing.assert_array_equal(idx, stratified_subsample(labels, n=20, seed=0))
+
+    by_length = stratified_subsample([100, 10, 50], p=0.5, seed=0, lengths=True)
+    counts = np.bincount(np.searchsorted([100, 110, 160], by_length, side="right"))
+    assert counts.tolist() == [50, 5, 25]
+    assert len(stratified_subsample([], n=1)) == 0
@@ -0,0 +1,214 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cellengine.resources.fcs_file import FcsFile
+from cellengine.utils.api_client.APIClient import APIClient
+from cellengine.utils.atomic_write import write_atomic
+from cellengine.utils.checksums import file_checksums
+from cellengine.utils.concurrency import iter_concurrent, map_concurrent
+from cellengine.utils.generate_id import generate_id
+from cellengine.utils.parse_fcs_file import parse_fcs_file
+from local_server import LocalHandler, LocalServer
+
+
+EXP_ID = "5d38a6f79fae87499999a74b"
+
+
+def fcs_file_properties(filename, content: bytes):
+    return {
+        "_id": generate_id(),
+        "experimentId": EXP_ID,
+        "filename": filename,
+        "annotations": [],
+        "size": len(content),
+        "md5": hashlib.md5(content).hexdigest(),
+    }
+
+
+class Handler(LocalHandler):
+    files: list
+    posts: list
+    contents: dict
+
+    def do_GET(self):
+        self._send(200, self.files)
+
+    def do_POST(self):
+        body = self._body()
+        filename = body.split(b'filename="', 1)[1].split(b'"', 1)[0].decode()
+        content = body.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+        created = fcs_file_properties(filename, content)
+        self.posts.append(filename)
+        self.contents[filename] = content
+        self.files.append(created)
+        self._send(201, created)
+
+
+@pytest.fixture()
+def server(local_server) -> LocalServer:
+    return local_server(Handler, files=[], posts=[], contents={})
+
+
+@pytest.fixture()
+def client(server: LocalServer) -> APIClient:
+    return server.client()
+
+
+@pytest.fixture()
+def paths(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"file{i}.fcs"
+        path.write_bytes(f"FCS3.1 file {i}".encode() * 1000)
+        paths.append(str(path))
+    return paths
+
+
+def test_file_checksums():
+    checksums = file_checksums("tests/data/text.txt")
+    assert checksums.size == 13
+    assert checksums.md5 == "d300fa70af75aa4b157382293609dcd9"
+    assert checksums.crc32c in (None, "4afc08fb")
+
+    f = io.BytesIO(b"prefix" + open("tests/data/text.txt", "rb").read())
+    f.seek(6)
+    assert file_checksums(f, chunk_size=4).md5 == checksums.md5
+    assert f.tell() == 6
+
+
+def test_map_concurrent_preserves_order_and_errors():
+    def fn(i):
+        if i == 3:
+            raise ValueError("three")
+        return i * 2
+
+    results = map_concurrent(fn, range(10), max_workers=3)
+    assert results[:3] == [0, 2, 4]
+    assert isinstance(results[3], ValueError)
+    assert results[4:] == [8, 10, 12, 14, 16, 18]
+    unordered = dict(iter_concurrent(fn, range(10), max_workers=3, ordered=False))
+    assert sorted(unordered) == list(range(10))
+
+
+def test_upload_fcs_files(server, client: APIClient, paths):
+    existing = fcs_file_properties("other name.fcs", open(paths[0], "rb").read())
+    server.RequestHandlerClass.files.append(existing)
+    progress = []
+
+    results = client.upload_fcs_files(
+        EXP_ID,
+        paths + ["missing.fcs"],
+        max_workers=2,
+        progress=lambda path, sent, total: progress.append((path, sent, total)),
+    )
+
+    assert [type(r) for r in results[:3]] == [FcsFile] * 3
+    assert results[0]._id == existing["_id"]
+    assert [r.filename for r in results[1:3]] == ["file1.fcs", "file2.fcs"]
+    assert results[1].md5 == file_checksums(paths[1]).md5
+    assert isinstance(results[3], FileNotFoundError)
+    assert sorted(server.RequestHandlerClass.posts) == ["file1.fcs", "file2.fcs"]
+    assert {p for p, _, _ in progress} == set(paths[1:])
+    last = {p: (sent, total) for p, sent, total in progress}
+    assert all(sent == total > 0 for sent, total in last.values())
+
+
+def test_upload_fcs_files_resumes_from_manifest(server, client, paths, tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    first = client.upload_fcs_files(EXP_ID, paths[:2], manifest=manifest)
+    assert len(server.RequestHandlerClass.posts) == 2
+
+    results = client.upload_fcs_files(
+        EXP_ID, paths, skip_if_exists=False, manifest=manifest
+    )
+    assert [r._id for r in results[:2]] == [r._id for r in first]
+    assert sorted(server.RequestHandlerClass.posts) == [
+        "file0.fcs",
+        "file1.fcs",
+        "file2.fcs",
+    ]
+    assert len(json.load(open(manifest))["files"]) == 3
+
+    with pytest.raises(ValueError, match="is for experiment"):
+        client.upload_fcs_files("5d38a6f79fae87499999a74c", paths, manifest=manifest)
+
+
+def test_upload_skip_if_exists(server, client: APIClient, paths):
+    first = client.upload_fcs_file(EXP_ID, paths[0], skip_if_exists=True)
+    again = client.upload_fcs_file(EXP_ID, paths[0], skip_if_exists=True)
+    data = io.BytesIO(open(paths[0], "rb").read())
+    from_data = client.upload_fcs_file(EXP_ID, data, "x.fcs", skip_if_exists=True)
+    assert again._id == first._id == from_data._id
+    assert data.tell() == 0
+
+    attachment = client.upload_attachment(EXP_ID, paths[0], skip_if_exists=True)
+    assert attachment._id == first._id
+    client.upload_attachment(EXP_ID, paths[0])
+    assert server.RequestHandlerClass.posts == ["file0.fcs", "file0.fcs"]
+
+
+def test_create_from_dataframe_streams_fcs(server, client: APIClient):
+    df = pd.DataFrame(
+        np.arange(30_000, dtype="f8").reshape(-1, 3),
+        columns=[["FSC-A", "FITC-A", "Cluster"], ["", "CD3", None]],
+    )
+    with client.use():
+        created = FcsFile.create_from_dataframe(
+            EXP_ID, "df.fcs", df, headers={"P3D": "Linear,0,10"}
+        )
+    content = server.RequestHandlerClass.contents["df.fcs"]
+    assert created.size == len(content)
+    parsed = parse_fcs_file(io.BytesIO(content))
+    assert parsed.columns.tolist() == [
+        ("FSC-A", ""),
+        ("FITC-A", "CD3"),
+        ("Cluster", ""),
+    ]
+    np.testing.assert_array_equal(parsed.to_numpy(), df.to_numpy(dtype="f4"))
+    assert b"/$P3D/Linear,0,10/" in content
+    assert b"/$COM/Created by the CellEngine Python Toolkit" in content
+
+
+def test_create_many_from_dataframes(server, client: APIClient):
+    def dataframes():
+        for i in range(6):
+            if i == 2:
+                yield "bad.fcs", pd.DataFrame([[1.0]], columns=["A"]).iloc[:, :0]
+            else:
+                yield f"df{i}.fcs", pd.DataFrame(
+                    np.full((10, 2), i), columns=["A", "B"]
+                )
+
+    with client.use():
+        results = FcsFile.create_many_from_dataframes(
+            EXP_ID, dataframes(), headers={"$COM": "derived"}, max_workers=2
+        )
+
+    assert [r.filename for r in results if isinstance(r, FcsFile)] == [
+        "df0.fcs",
+        "df1.fcs",
+        "df3.fcs",
+        "df4.fcs",
+        "df5.fcs",
+    ]
+    assert isinstance(results[2], Exception)
+    content = server.RequestHandlerClass.contents["df4.fcs"]
+    assert parse_fcs_file(io.BytesIO(content)).to_numpy().tolist() == [[4, 4]] * 10
+    assert b"/$COM/derived/" in content
+
+
+def test_write_atomic_removes_tmp_on_error(tmp_path):
+    path = str(tmp_path / "entry.bin")
+    write_atomic(path, b"cached")
+    with pytest.raises(TypeError):
+        write_atomic(path, 1)  # type: ignore
+    assert os.listdir(tmp_path) == ["entry.bin"]
+    assert open(path, "rb").read() == b"cached"
+    write_atomic(path, "text")
+    assert open(path, "rb").read() == b"text"